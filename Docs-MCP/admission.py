@@ -0,0 +1,118 @@
+"""
+admission.py - Admission control for the Docs-MCP agent API
+
+At most `max_concurrent` agent turns run at once; up to `max_queue` more wait
+for a slot, and anything beyond that is rejected with Overloaded (HTTP 429
+with a Retry-After estimate) instead of piling more LLM and MCP calls onto the
+upstreams. Turns on the same session are serialised by a per-session lock, so
+concurrent requests cannot interleave their events in the shared session.
+"""
+
+import asyncio
+import math
+import time
+from collections import deque
+from typing import Any, Dict, Hashable, List, NamedTuple, Optional
+
+
+class Overloaded(Exception):
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class Admission(NamedTuple):
+    key: Hashable
+    entry: List[Any]  # [session lock, number of requests holding or waiting for it]
+    admitted_at: float
+
+
+class AdmissionController:
+    # Assumed turn duration before any turn has finished
+    DEFAULT_SERVICE_SECONDS = 5.0
+
+    def __init__(self, max_concurrent: int = 4, max_queue: int = 16, queue_timeout: float = 30.0):
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+        self._slots = asyncio.Semaphore(self.max_concurrent)
+        self._sessions: Dict[Hashable, List[Any]] = {}
+        self._active = 0
+        self._queued = 0
+        self._waits: deque = deque(maxlen=1000)
+        self._service_seconds: Optional[float] = None
+        self._stats: Dict[str, Any] = {"admitted": 0, "rejected": 0, "timedOut": 0}
+
+    async def acquire(self, key: Hashable) -> Admission:
+        """Wait for the session `key` and a global slot; raises Overloaded if the queue is full or the wait times out."""
+        # Counted rather than read off the locks, so a burst arriving in one event-loop tick is bounded too.
+        if self._active + self._queued >= self.max_concurrent + self.max_queue:
+            self._stats["rejected"] += 1
+            raise Overloaded(f"Server busy: {self._active} running, {self._queued} queued", self.retry_after())
+        entry = self._sessions.get(key)
+        if entry is None:
+            entry = self._sessions[key] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        started = time.monotonic()
+        self._queued += 1
+        try:
+            await asyncio.wait_for(self._enter(entry[0]), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._stats["timedOut"] += 1
+            self._forget(key, entry)
+            raise Overloaded(f"Timed out after {self.queue_timeout:g}s waiting for a slot", self.retry_after())
+        except BaseException:
+            self._forget(key, entry)
+            raise
+        finally:
+            self._queued -= 1
+        self._active += 1
+        self._stats["admitted"] += 1
+        now = time.monotonic()
+        self._waits.append(now - started)
+        return Admission(key, entry, now)
+
+    async def _enter(self, session_lock: asyncio.Lock) -> None:
+        # Take the session lock first, so a turn waiting on its own session does not hold a global slot.
+        await session_lock.acquire()
+        try:
+            await self._slots.acquire()
+        except BaseException:
+            session_lock.release()
+            raise
+
+    def release(self, admission: Admission) -> None:
+        self._active -= 1
+        self._slots.release()
+        admission.entry[0].release()
+        self._forget(admission.key, admission.entry)
+        elapsed = time.monotonic() - admission.admitted_at
+        # Exponentially weighted average turn duration, for Retry-After
+        self._service_seconds = elapsed if self._service_seconds is None else 0.8 * self._service_seconds + 0.2 * elapsed
+
+    def _forget(self, key: Hashable, entry: List[Any]) -> None:
+        entry[1] -= 1
+        if entry[1] == 0 and self._sessions.get(key) is entry:
+            del self._sessions[key]
+
+    def retry_after(self) -> int:
+        """Seconds until the current queue has likely drained."""
+        service = self._service_seconds if self._service_seconds is not None else self.DEFAULT_SERVICE_SECONDS
+        return max(1, math.ceil(service * (self._queued + 1) / self.max_concurrent))
+
+    def stats(self) -> Dict[str, Any]:
+        waits = sorted(self._waits)
+        return {
+            **self._stats,
+            "active": self._active,
+            "queued": self._queued,
+            "maxConcurrent": self.max_concurrent,
+            "maxQueue": self.max_queue,
+            "queueTimeoutSeconds": self.queue_timeout,
+            "sessions": len(self._sessions),
+            "waitMsAvg": round(sum(waits) / len(waits) * 1000, 1) if waits else None,
+            "waitMsP95": round(waits[min(len(waits) - 1, int(len(waits) * 0.95))] * 1000, 1) if waits else None,
+            "waitMsMax": round(waits[-1] * 1000, 1) if waits else None,
+            "turnSecondsAvg": round(self._service_seconds, 2) if self._service_seconds is not None else None,
+            "retryAfterSeconds": self.retry_after(),
+        }
@@ -0,0 +1,102 @@
+"""
+archive.py - Append-only archive of raw fetched responses for Docs-MCP
+
+Responses are appended as independent gzip members to segment files
+(WARC-like: one member per record, so any record can be read by seeking to
+its offset). A SQLite index maps (url, fetch time, library) to segment offsets.
+"""
+
+import gzip
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterator, List
+
+
+class PageArchive:
+    SEGMENT_BYTES = 1 << 30
+
+    def __init__(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(directory, "index.db"), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS records (
+                id INTEGER PRIMARY KEY,
+                url TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                project TEXT, library TEXT, version TEXT, content_type TEXT,
+                http_status INTEGER,
+                mime TEXT,
+                segment TEXT NOT NULL,
+                offset INTEGER NOT NULL,
+                length INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS ix_records_lib ON records (project, library, version, content_type, url, fetched_at);
+            """
+        )
+        self._db.commit()
+
+    def _segment(self) -> str:
+        names = sorted(n for n in os.listdir(self.directory) if n.startswith("segment-") and n.endswith(".gz"))
+        if names and os.path.getsize(os.path.join(self.directory, names[-1])) < self.SEGMENT_BYTES:
+            return names[-1]
+        return f"segment-{len(names) + 1:05d}.gz"
+
+    def append(self, url: str, body: bytes, mime: str, http_status: int, meta: Dict[str, Any]) -> None:
+        header = json.dumps({"url": url, "mime": mime, "status": http_status}).encode("utf-8")
+        member = gzip.compress(header + b"\n" + body)
+        fetched_at = time.time()
+        with self._lock:
+            segment = self._segment()
+            path = os.path.join(self.directory, segment)
+            with open(path, "ab") as f:
+                offset = f.tell()
+                f.write(member)
+            self._db.execute(
+                "INSERT INTO records (url, fetched_at, project, library, version, content_type, http_status, mime,"
+                " segment, offset, length) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, fetched_at, meta.get("project"), meta.get("library"), meta.get("version"),
+                 meta.get("content_type"), http_status, mime, segment, offset, len(member)),
+            )
+            self._db.commit()
+
+    def read(self, record: Dict[str, Any]) -> bytes:
+        with open(os.path.join(self.directory, record["segment"]), "rb") as f:
+            f.seek(record["offset"])
+            data = gzip.decompress(f.read(record["length"]))
+        return data.split(b"\n", 1)[1]
+
+    def latest(self, filters: Dict[str, Any], url_prefix: str = "") -> Iterator[Dict[str, Any]]:
+        """Yield the most recent record per URL matching filters."""
+        clauses: List[str] = []
+        params: List[Any] = []
+        for k, v in filters.items():
+            clauses.append(f"{k} = ?")
+            params.append(v)
+        if url_prefix:
+            clauses.append("substr(url, 1, ?) = ?")
+            params.extend([len(url_prefix), url_prefix])
+        where = " AND ".join(clauses) or "1 = 1"
+        sql = f"""
+        SELECT r.url, r.fetched_at, r.project, r.library, r.version, r.content_type, r.mime, r.segment, r.offset, r.length
+        FROM records r
+        JOIN (SELECT url, project, library, version, content_type, MAX(fetched_at) AS latest
+              FROM records WHERE {where}
+              GROUP BY url, project, library, version, content_type) m
+        ON r.url = m.url AND r.project = m.project AND r.library = m.library
+           AND r.version = m.version AND r.content_type = m.content_type AND r.fetched_at = m.latest
+        ORDER BY r.url
+        """
+        cols = ("url", "fetched_at", "project", "library", "version", "content_type", "mime", "segment", "offset", "length")
+        for row in self._db.execute(sql, params).fetchall():
+            yield dict(zip(cols, row))
+
+    def stats(self) -> Dict[str, Any]:
+        row = self._db.execute("SELECT COUNT(*), COUNT(DISTINCT url), SUM(length) FROM records").fetchone()
+        return {"records": row[0], "urls": row[1], "bytes": row[2] or 0}
@@ -0,0 +1,357 @@
+"""
+bench.py - Docs-MCP ingestion and retrieval benchmark
+Run with: python bench.py [--pages 100] [--queries 50] [--k 10] [--backend pgvector|local|both]
+Compare:  python bench.py --compare bench_results/old.json bench_results/new.json
+
+Uses the same .env as server.py (Postgres + pgvector must be reachable for the pgvector backend).
+"""
+
+import argparse
+import asyncio
+import inspect
+import json
+import os
+import random
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+server = None  # imported in _load_server() once DOCS_MCP_STORE is settled
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_results")
+
+_WORDS = (
+    "agent async batch cache client config connector context cursor deploy embedding "
+    "endpoint event filter handler index ingest kernel latency library loader memory "
+    "metric middleware model monitor parser partition pipeline plugin pool prompt query "
+    "queue request retry router runtime schema scheduler search session shard snapshot "
+    "storage stream template tenant token toolset trace vector version webhook worker"
+).split()
+
+
+# ---- Corpus ----
+
+
+def _sentence(rng: random.Random, n: int = 12) -> str:
+    words = [rng.choice(_WORDS) for _ in range(n)]
+    return " ".join(words).capitalize() + "."
+
+
+def _page(rng: random.Random, idx: int) -> Tuple[str, List[Tuple[str, str]]]:
+    """Return (title, sections) for a synthetic documentation page."""
+    title = f"Guide {idx}: {rng.choice(_WORDS)} {rng.choice(_WORDS)}"
+    sections = []
+    for s in range(rng.randint(3, 6)):
+        heading = f"{rng.choice(_WORDS).capitalize()} {rng.choice(_WORDS)} {idx}.{s}"
+        body = " ".join(_sentence(rng) for _ in range(rng.randint(4, 10)))
+        sections.append((heading, body))
+    return title, sections
+
+
+def generate_corpus(root: str, pages: int, seed: int = 42) -> List[str]:
+    """Write `pages` HTML pages under root/html and the same pages as markdown under root/md.
+
+    Returns a list of query strings sampled from the generated sections.
+    """
+    rng = random.Random(seed)
+    html_dir = os.path.join(root, "html")
+    md_dir = os.path.join(root, "md")
+    os.makedirs(html_dir, exist_ok=True)
+    os.makedirs(md_dir, exist_ok=True)
+
+    queries: List[str] = []
+    links = []
+    for i in range(pages):
+        title, sections = _page(rng, i)
+        name = f"page-{i:05d}"
+        links.append(f'<li><a href="{name}.html">{title}</a></li>')
+
+        body_html = "".join(f"<h2>{h}</h2><p>{b}</p>" for h, b in sections)
+        with open(os.path.join(html_dir, f"{name}.html"), "w", encoding="utf-8") as f:
+            f.write(
+                f"<!doctype html><html><head><title>{title}</title></head>"
+                f"<body><nav><a href=\"index.html\">Home</a></nav>"
+                f"<main><article><h1>{title}</h1>{body_html}</article></main>"
+                f"<footer>Synthetic docs footer</footer></body></html>"
+            )
+
+        body_md = "\n\n".join(f"## {h}\n\n{b}" for h, b in sections)
+        with open(os.path.join(md_dir, f"{name}.md"), "w", encoding="utf-8") as f:
+            f.write(f"# {title}\n\n{body_md}\n")
+
+        heading, body = rng.choice(sections)
+        queries.append(f"{heading} {body.split('.')[0]}")
+
+    with open(os.path.join(html_dir, "index.html"), "w", encoding="utf-8") as f:
+        f.write(
+            "<!doctype html><html><head><title>Index</title></head><body><main>"
+            f"<h1>Index</h1><ul>{''.join(links)}</ul></main></body></html>"
+        )
+
+    rng.shuffle(queries)
+    return queries
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):  # noqa: A002 - stdlib signature
+        pass
+
+
+def serve_directory(root: str) -> Tuple[ThreadingHTTPServer, str]:
+    """Serve root over HTTP on an ephemeral localhost port."""
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), partial(_QuietHandler, directory=root))
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return httpd, f"http://127.0.0.1:{httpd.server_address[1]}"
+
+
+# ---- Measurement helpers ----
+
+
+# One loop for every call, so the server's shared HTTP client and DB pool stay bound to it.
+_loop = asyncio.new_event_loop()
+
+
+def _call(tool, **kwargs):
+    """Call an @mcp.tool() function directly (FastMCP wraps it in a Tool object)."""
+    fn = getattr(tool, "fn", tool)
+    result = fn(**kwargs)
+    if inspect.isawaitable(result):
+        result = _loop.run_until_complete(result)
+    return result
+
+
+def _percentiles(samples_ms: List[float]) -> Dict[str, float]:
+    if not samples_ms:
+        return {}
+    arr = np.asarray(samples_ms)
+    return {
+        "mean_ms": round(float(arr.mean()), 2),
+        "p50_ms": round(float(np.percentile(arr, 50)), 2),
+        "p95_ms": round(float(np.percentile(arr, 95)), 2),
+        "p99_ms": round(float(np.percentile(arr, 99)), 2),
+    }
+
+
+def _timed(fn, *args, **kwargs) -> Tuple[Any, float]:
+    t0 = time.perf_counter()
+    out = fn(*args, **kwargs)
+    return out, (time.perf_counter() - t0) * 1000.0
+
+
+def _ingest(label: str, **kwargs) -> Dict[str, Any]:
+    result, ms = _timed(_call, server.scrape_docs, **kwargs)
+    if "error" in result:
+        raise RuntimeError(f"{label} ingest failed: {result['error']}")
+    secs = ms / 1000.0
+    return {
+        "pages": result["pagesScraped"],
+        "chunks": result["chunksIndexed"],
+        "seconds": round(secs, 3),
+        "pages_per_sec": round(result["pagesScraped"] / secs, 2) if secs else None,
+        "chunks_per_sec": round(result["chunksIndexed"] / secs, 2) if secs else None,
+    }
+
+
+def _recall_at_k(queries: List[str], filters: Dict[str, str], k: int) -> float:
+    """Recall@k of the store's similarity search against exact cosine similarity."""
+    rows = server._store.rows(filters, with_embeddings=True)
+    if not rows:
+        return 0.0
+    keys = [r["id"] for r in rows]
+    matrix = np.asarray([r["embedding"] for r in rows], dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1)
+    norms[norms == 0] = 1.0
+    matrix = matrix / norms[:, None]
+
+    hits = 0
+    total = 0
+    for q in queries:
+        qv = np.asarray(server._store.embeddings.embed_query(q), dtype=np.float32)
+        qv /= np.linalg.norm(qv) or 1.0
+        top = np.argsort(-(matrix @ qv))[:k]
+        exact = {keys[i] for i in top}
+        approx = {str(d.id) for d, _ in server._store.search(q, k, filters)}
+        hits += len(exact & approx)
+        total += len(exact)
+    return round(hits / total, 4) if total else 0.0
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL,
+        ).decode().strip()
+    except Exception:
+        return "unknown"
+
+
+# ---- Benchmark ----
+
+
+def _load_server(backend: str):
+    """Import server.py with the requested backend, or switch an already-imported one."""
+    global server
+    if server is None:
+        os.environ["DOCS_MCP_STORE"] = backend
+        import server as srv
+        server = srv
+    elif server.STORE_BACKEND != backend:
+        server._store = server.create_store(backend)
+        server.STORE_BACKEND = backend
+    return server
+
+
+def run(backend: str, pages: int, queries: int, k: int, repeats: int, seed: int, keep: bool) -> Dict[str, Any]:
+    _load_server(backend)
+    project = f"bench-{uuid.uuid4().hex[:8]}"
+    root = tempfile.mkdtemp(prefix="docs-mcp-bench-")
+    httpd = None
+    try:
+        query_texts = generate_corpus(root, pages, seed)[:queries]
+        httpd, base = serve_directory(root)
+
+        print(f"Corpus: {pages} pages in {root}, project={project}, backend={backend}")
+        ingest = {
+            "http_html": _ingest(
+                "http", project=project, library="bench-html", url=f"{base}/html/index.html",
+                maxPages=pages + 1, maxDepth=1,
+            ),
+            "file_markdown": _ingest(
+                "file", project=project, library="bench-md", url=f"file://{os.path.join(root, 'md')}",
+            ),
+        }
+
+        search: Dict[str, Any] = {}
+        for library in ("bench-html", "bench-md"):
+            latencies = []
+            for q in query_texts:
+                _, ms = _timed(_call, server.search_docs, project=project, library=library, query=q, limit=k)
+                latencies.append(ms)
+            filters = {"project": project, "library": library, "content_type": "docs"}
+            search[library] = {
+                **_percentiles(latencies),
+                "queries": len(latencies),
+                f"recall@{k}": _recall_at_k(query_texts, filters, k),
+            }
+
+        catalogue: Dict[str, Any] = {}
+        for name, tool, kwargs in (
+            ("list_projects", server.list_projects, {}),
+            ("detailed_stats", server.detailed_stats, {"project": project}),
+        ):
+            samples = [_timed(_call, tool, **kwargs)[1] for _ in range(repeats)]
+            catalogue[name] = _percentiles(samples)
+
+        return {
+            "commit": _git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "config": {
+                "backend": backend,
+                "pages": pages,
+                "queries": len(query_texts),
+                "k": k,
+                "repeats": repeats,
+                "seed": seed,
+                "embed_model": server.EMBED_MODEL,
+            },
+            "ingest": ingest,
+            "search": search,
+            "catalogue": catalogue,
+            "embedding": {k: v for k, v in server._embedder.stats().items() if k in ("lanes", "batching")},
+        }
+    finally:
+        if httpd is not None:
+            httpd.shutdown()
+        if not keep:
+            try:
+                _call(server.remove_project, project=project)
+            except Exception as e:
+                print(f"Cleanup failed for {project}: {e}")
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def save(result: Dict[str, Any], out_dir: str) -> str:
+    os.makedirs(out_dir, exist_ok=True)
+    stamp = result["timestamp"].replace(":", "").replace("-", "")
+    path = os.path.join(out_dir, f"{stamp}_{result['commit']}_{result['config']['backend']}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2, sort_keys=True)
+    return path
+
+
+def _flatten(d: Dict[str, Any], prefix: str = "") -> Dict[str, float]:
+    flat: Dict[str, float] = {}
+    for k, v in d.items():
+        key = f"{prefix}{k}"
+        if isinstance(v, dict):
+            flat.update(_flatten(v, f"{key}."))
+        elif isinstance(v, (int, float)) and not isinstance(v, bool):
+            flat[key] = v
+    return flat
+
+
+def compare(old_path: str, new_path: str) -> None:
+    """Print every numeric metric side by side with its relative change."""
+    with open(old_path, encoding="utf-8") as f:
+        old = json.load(f)
+    with open(new_path, encoding="utf-8") as f:
+        new = json.load(f)
+    print(f"{'metric':<45} {old.get('commit', 'old'):>12} {new.get('commit', 'new'):>12} {'change':>9}")
+    old_flat = _flatten({k: old.get(k, {}) for k in ("ingest", "search", "catalogue")})
+    new_flat = _flatten({k: new.get(k, {}) for k in ("ingest", "search", "catalogue")})
+    for key in sorted(set(old_flat) | set(new_flat)):
+        a = old_flat.get(key)
+        b = new_flat.get(key)
+        change = ""
+        if a not in (None, 0) and b is not None:
+            change = f"{(b - a) / a * 100:+.1f}%"
+        print(f"{key:<45} {'' if a is None else a:>12} {'' if b is None else b:>12} {change:>9}")
+
+
+def _print_summary(result: Dict[str, Any]) -> None:
+    for name, m in result["ingest"].items():
+        print(f"ingest {name}: {m['pages']} pages, {m['chunks']} chunks in {m['seconds']}s "
+              f"({m['pages_per_sec']} pages/s, {m['chunks_per_sec']} chunks/s)")
+    for name, m in result["search"].items():
+        recall = {k: v for k, v in m.items() if k.startswith("recall@")}
+        print(f"search {name}: p50={m['p50_ms']}ms p95={m['p95_ms']}ms p99={m['p99_ms']}ms {recall}")
+    for name, m in result["catalogue"].items():
+        print(f"{name}: p50={m['p50_ms']}ms p95={m['p95_ms']}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark Docs-MCP ingestion and retrieval")
+    parser.add_argument("--pages", type=int, default=100)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--repeats", type=int, default=20, help="Repetitions for catalogue tools")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--backend", choices=("pgvector", "local", "both"),
+                        default=os.getenv("DOCS_MCP_STORE") or "pgvector")
+    parser.add_argument("--out", default=RESULTS_DIR)
+    parser.add_argument("--keep", action="store_true", help="Keep the benchmark project after the run")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"))
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+    else:
+        saved = []
+        for backend in (("pgvector", "local") if args.backend == "both" else (args.backend,)):
+            res = run(backend, args.pages, args.queries, args.k, args.repeats, args.seed, args.keep)
+            _print_summary(res)
+            saved.append(save(res, args.out))
+            print(f"\nSaved {saved[-1]}\n")
+        if len(saved) == 2:
+            compare(*saved)
@@ -0,0 +1,63 @@
+"""
+checkpoint.py - Crawl checkpoints so long scrape_docs crawls can be resumed
+"""
+
+import hashlib
+import json
+import os
+import time
+from collections import deque
+from typing import Any, Dict, Optional, Set
+
+
+class CrawlCheckpoint:
+    """Frontier, seen-set and per-URL status of one crawl, saved as JSON.
+
+    The file is replaced atomically on every save, so a crash mid-write leaves
+    the previous checkpoint intact.
+    """
+
+    def __init__(self, directory: str, *key_parts: str):
+        os.makedirs(directory, exist_ok=True)
+        key = hashlib.sha1("\0".join(key_parts).encode("utf-8")).hexdigest()
+        self.path = os.path.join(directory, f"{key}.json")
+        self.frontier: deque = deque()
+        self.seen: Set[str] = set()
+        self.status: Dict[str, str] = {}
+        self.pages_total = 0
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def load(self) -> bool:
+        """Restore state from disk; returns False if there is no checkpoint."""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+        self.frontier = deque((u, int(d)) for u, d in data.get("frontier", []))
+        self.seen = set(data.get("seen", []))
+        self.status = dict(data.get("status", {}))
+        self.pages_total = int(data.get("pagesTotal", 0))
+        return True
+
+    def save(self, extra: Optional[Dict[str, Any]] = None) -> None:
+        data = {
+            "savedAt": time.time(),
+            "frontier": list(self.frontier),
+            "seen": sorted(self.seen),
+            "status": self.status,
+            "pagesTotal": self.pages_total,
+            **(extra or {}),
+        }
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp, self.path)
+
+    def clear(self) -> None:
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,136 @@
+"""
+chunking.py - Split markdown pages into chunks for embedding
+
+"fixed": 1200-char windows with 400-char overlap. "cdc": content-defined
+boundaries, so an edit only changes the chunks around it. "small2big": small
+passages that never cross a heading section; search returns the section.
+Chunks are returned as (start, end) offsets into the page.
+"""
+
+import hashlib
+from typing import List, Tuple
+
+
+def chunk_markdown(text: str, mode: str = "fixed", **sizes: int) -> List[str]:
+    return [text[a:b] for a, b in chunk_spans(text, mode, **sizes)]
+
+
+def chunk_spans(text: str, mode: str = "fixed", chunk_size: int = 1200, overlap: int = 400,
+                child_size: int = 400, section_size: int = 4000) -> List[Tuple[int, int]]:
+    """(start, end) offsets of each chunk of text."""
+    if mode == "cdc":
+        return cdc_spans(text)
+    if mode == "small2big":
+        return child_spans(text, child_size, section_size)
+    if mode != "fixed":
+        raise ValueError(f"Unknown chunking mode: {mode}")
+    spans: List[Tuple[int, int]] = []
+    i = 0
+    n = len(text)
+    while i < n:
+        end = min(i + chunk_size, n)
+        spans.append((i, end))
+        if end == n:
+            break
+        i = end - overlap
+        if i < 0:
+            i = 0
+    return spans
+
+
+# Gear table for the rolling hash: a fixed pseudo-random 32-bit value per byte.
+_GEAR = [int.from_bytes(hashlib.sha256(bytes([b])).digest()[:4], "big") for b in range(256)]
+
+
+def cdc_spans(text: str, min_size: int = 400, avg_size: int = 1000, max_size: int = 2000) -> List[Tuple[int, int]]:
+    """Split markdown at content-defined boundaries.
+
+    Cut points are only considered at line ends. A gear rolling hash over the
+    preceding ~32 characters decides whether a line end is a boundary, and headings
+    always start a new chunk once min_size is reached, so boundaries depend on
+    local content rather than absolute offsets. An edit only changes the chunks
+    around it; later chunks resynchronise at the next hash boundary. Chunks are
+    contiguous, non-overlapping slices of text.
+    """
+    # Roughly one in (avg_size - min_size) / 80 line ends should be a boundary.
+    # As in FastCDC, the mask tests the high bits: with h = (h << 1) + gear, bit k only
+    # depends on the last k + 1 characters, so the top bits cover the whole window.
+    bits = max(1, int((avg_size - min_size) / 80).bit_length())
+    mask = ((1 << bits) - 1) << (32 - bits)
+
+    spans: List[Tuple[int, int]] = []
+    lines = text.splitlines(keepends=True)
+    start = 0
+    pos = 0
+    h = 0
+    in_fence = False
+    for line in lines:
+        size = pos - start
+        if size >= min_size and not in_fence and line.lstrip().startswith("#"):
+            spans.append((start, pos))
+            start = pos
+        elif size > 0 and size + len(line) > max_size:
+            spans.append((start, pos))
+            start = pos
+
+        # A single line longer than max_size is cut at whitespace.
+        while pos + len(line) - start > max_size:
+            cut = text.rfind(" ", start + min_size, start + max_size)
+            cut = cut + 1 if cut > start else start + max_size
+            spans.append((start, cut))
+            start = cut
+
+        for ch in line:
+            h = ((h << 1) + _GEAR[ord(ch) & 0xFF]) & 0xFFFFFFFF
+        pos += len(line)
+        if line.lstrip().startswith("```"):
+            in_fence = not in_fence
+
+        if pos - start >= min_size and not in_fence and (h & mask) == 0:
+            spans.append((start, pos))
+            start = pos
+    if start < len(text):
+        spans.append((start, len(text)))
+    return spans
+
+
+def section_spans(text: str, max_size: int = 4000) -> List[Tuple[int, int]]:
+    """Heading sections of markdown as (start, end); sections longer than max_size are split at line ends."""
+    spans: List[Tuple[int, int]] = []
+    start = pos = 0
+    in_fence = False
+    for line in text.splitlines(keepends=True):
+        stripped = line.lstrip()
+        if (not in_fence and stripped.startswith("#") and pos > start) or (pos > start and pos + len(line) - start > max_size):
+            spans.append((start, pos))
+            start = pos
+        while pos + len(line) - start > max_size:
+            spans.append((start, start + max_size))
+            start += max_size
+        pos += len(line)
+        if stripped.startswith("```"):
+            in_fence = not in_fence
+    if start < len(text):
+        spans.append((start, len(text)))
+    return spans
+
+
+def child_spans(text: str, size: int = 400, section_size: int = 4000) -> List[Tuple[int, int]]:
+    """Small, non-overlapping passages that never cross a section boundary."""
+    spans: List[Tuple[int, int]] = []
+    for section_start, section_end in section_spans(text, section_size):
+        start = pos = section_start
+        for line in text[section_start:section_end].splitlines(keepends=True):
+            if pos > start and pos + len(line) - start > size:
+                spans.append((start, pos))
+                start = pos
+            # A line longer than size is cut at whitespace.
+            while pos + len(line) - start > size:
+                cut = text.rfind(" ", start + size // 2, start + size)
+                cut = cut + 1 if cut > start else start + size
+                spans.append((start, cut))
+                start = cut
+            pos += len(line)
+        if start < section_end:
+            spans.append((start, section_end))
+    return spans
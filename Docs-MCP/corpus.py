@@ -0,0 +1,84 @@
+"""
+corpus.py - Shared corpora: one indexed copy of a library@version, attached to many projects
+
+Shared chunks live in the SHARED_PROJECT partition with their real library,
+version and content_type. Projects reference a corpus by attaching to it; the
+attachments are kept in a JSON file in the state directory. A corpus is only
+deleted from the store once its last project detaches.
+"""
+
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+# Partition holding all shared corpora (not a user project)
+SHARED_PROJECT = "@shared"
+
+
+def corpus_key(library: str, version: str, content_type: str) -> str:
+    return f"{library}@{version} [{content_type}]"
+
+
+class CorpusRegistry:
+    """Project -> shared corpus references, persisted in `path`."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                self._corpora: Dict[str, Dict[str, Any]] = json.load(f)
+        except (OSError, ValueError):
+            self._corpora = {}
+
+    def _save(self) -> None:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._corpora, f, indent=2)
+        os.replace(tmp, self.path)
+
+    def attach(self, project: str, library: str, version: str, content_type: str) -> Dict[str, Any]:
+        key = corpus_key(library, version, content_type)
+        with self._lock:
+            corpus = self._corpora.setdefault(
+                key, {"library": library, "version": version, "content_type": content_type, "projects": []})
+            if project not in corpus["projects"]:
+                corpus["projects"].append(project)
+                self._save()
+            return dict(corpus)
+
+    def detach(self, project: str, library: Optional[str] = None, version: Optional[str] = None,
+               content_type: Optional[str] = None) -> Dict[str, List[Dict[str, Any]]]:
+        """Detach a project from matching corpora (None matches anything).
+
+        Returns {"detached": [...], "unreferenced": [...]}; unreferenced corpora are
+        forgotten here and should be deleted from the store by the caller.
+        """
+        detached, unreferenced = [], []
+        with self._lock:
+            for key, corpus in list(self._corpora.items()):
+                if project not in corpus["projects"] or not _matches(corpus, library, version, content_type):
+                    continue
+                corpus["projects"].remove(project)
+                detached.append(dict(corpus))
+                if not corpus["projects"]:
+                    unreferenced.append(self._corpora.pop(key))
+            if detached:
+                self._save()
+        return {"detached": detached, "unreferenced": unreferenced}
+
+    def attached(self, project: Optional[str] = None, library: Optional[str] = None,
+                 version: Optional[str] = None, content_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Corpora matching the arguments (all corpora if project is None)."""
+        with self._lock:
+            return [dict(c, projects=list(c["projects"])) for c in self._corpora.values()
+                    if (project is None or project in c["projects"]) and _matches(c, library, version, content_type)]
+
+
+def _matches(corpus: Dict[str, Any], library: Optional[str], version: Optional[str],
+             content_type: Optional[str]) -> bool:
+    return ((library is None or corpus["library"] == library)
+            and (version is None or corpus["version"] == version)
+            and (content_type is None or corpus["content_type"] == content_type))
@@ -0,0 +1,131 @@
+"""
+dedup.py - Boilerplate and near-duplicate suppression for Docs-MCP ingestion
+"""
+
+import hashlib
+import re
+from collections import Counter, defaultdict
+from typing import Dict, List, Set, Tuple
+
+# Lines that are boilerplate on any site, whatever their frequency. Only whole lines match
+# (after link markup is stripped), so prose that merely mentions these phrases is kept.
+_KNOWN_BOILERPLATE = re.compile(
+    r"\s*(?:edit (?:this|on) (?:page|github)|was this (?:page|article) helpful\??|skip to (?:main )?content|"
+    r"we use cookies\.?|cookie (?:policy|settings|preferences)|accept (?:all )?cookies|"
+    r"privacy policy|terms of (?:use|service)|all rights reserved\.?|"
+    r"improve this (?:page|doc)|on this page|table of contents|back to top|"
+    r"last updated(?: on)?:?(?:\s*(?:\d{4}-\d{2}-\d{2}|\d{1,2}/\d{1,2}/\d{2,4}|[a-z]+\.? \d{1,2},? \d{4}|\d{1,2} [a-z]+\.? \d{4}))?|"
+    r"(?:©|\(c\)|copyright)\s*(?:©\s*)?\d{4}(?:\s*-\s*\d{4})?[^\n]{0,80})\s*",
+    re.I,
+)
+_LINK = re.compile(r"!?\[([^\]]*)\]\([^)]*\)")
+# Footer links are often joined into one line: "Privacy Policy | Terms of Use"
+_SEPARATOR = re.compile(r"\s*[|·•]\s*")
+_MAX_BOILERPLATE_LEN = 160
+
+
+def _normalize(line: str) -> str:
+    return re.sub(r"\s+", " ", line.strip().lower())
+
+
+def _is_known_boilerplate(line: str) -> bool:
+    text = _LINK.sub(r"\1", line).strip(" *_>-")
+    parts = [p for p in _SEPARATOR.split(text) if p]
+    return bool(parts) and all(_KNOWN_BOILERPLATE.fullmatch(p) for p in parts)
+
+
+class BoilerplateFilter:
+    """Learns lines repeated across a site's pages and strips them.
+
+    A line is boilerplate once it has appeared on at least `min_pages` pages and on
+    at least `ratio` of the pages seen for that site. Headings, fenced code and long
+    lines are never treated as learned boilerplate.
+    """
+
+    def __init__(self, min_pages: int = 3, ratio: float = 0.5):
+        self.min_pages = min_pages
+        self.ratio = ratio
+        self._pages: Counter = Counter()
+        self._lines: Dict[str, Counter] = defaultdict(Counter)
+        self.removed = 0
+
+    @staticmethod
+    def _candidates(text: str) -> Set[str]:
+        out: Set[str] = set()
+        in_fence = False
+        for line in text.splitlines():
+            stripped = line.strip()
+            if stripped.startswith("```"):
+                in_fence = not in_fence
+                continue
+            if in_fence or not stripped or stripped.startswith("#") or len(stripped) > _MAX_BOILERPLATE_LEN:
+                continue
+            out.add(_normalize(stripped))
+        return out
+
+    def observe(self, site: str, text: str) -> None:
+        self._pages[site] += 1
+        self._lines[site].update(self._candidates(text))
+
+    def clean(self, site: str, text: str) -> str:
+        pages = self._pages[site]
+        threshold = max(self.min_pages, self.ratio * pages)
+        counts = self._lines[site]
+        kept: List[str] = []
+        in_fence = False
+        for line in text.splitlines(keepends=True):
+            stripped = line.strip()
+            if stripped.startswith("```"):
+                in_fence = not in_fence
+            elif not in_fence and stripped and not stripped.startswith("#") and len(stripped) <= _MAX_BOILERPLATE_LEN:
+                if counts[_normalize(stripped)] >= threshold or _is_known_boilerplate(stripped):
+                    self.removed += 1
+                    continue
+            kept.append(line)
+        return re.sub(r"\n{3,}", "\n\n", "".join(kept))
+
+
+def simhash(text: str, shingle: int = 3) -> int:
+    """64-bit SimHash over word shingles."""
+    words = re.findall(r"\w+", text.lower())
+    if len(words) < shingle:
+        grams = [" ".join(words)] if words else []
+    else:
+        grams = [" ".join(words[i:i + shingle]) for i in range(len(words) - shingle + 1)]
+    weights = [0] * 64
+    for g in grams:
+        h = int.from_bytes(hashlib.blake2b(g.encode("utf-8"), digest_size=8).digest(), "big")
+        for bit in range(64):
+            weights[bit] += 1 if (h >> bit) & 1 else -1
+    return sum(1 << bit for bit in range(64) if weights[bit] > 0)
+
+
+class NearDuplicateIndex:
+    """Detects chunks within `max_distance` Hamming bits of one already seen.
+
+    Fingerprints are split into 4 bands of 16 bits; with max_distance <= 3 any
+    near-duplicate shares at least one band exactly, so only those buckets are checked.
+    """
+
+    BANDS = 4
+
+    def __init__(self, max_distance: int = 3):
+        self.max_distance = max_distance
+        self._buckets: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+        self.skipped = 0
+
+    def _bands(self, fp: int) -> List[Tuple[int, int]]:
+        return [(b, (fp >> (16 * b)) & 0xFFFF) for b in range(self.BANDS)]
+
+    def seen(self, text: str) -> bool:
+        """Return True if text is a near-duplicate, otherwise remember it."""
+        fp = simhash(text)
+        bands = self._bands(fp)
+        for key in bands:
+            for other in self._buckets.get(key, ()):
+                if bin(fp ^ other).count("1") <= self.max_distance:
+                    self.skipped += 1
+                    return True
+        for key in bands:
+            self._buckets[key].append(fp)
+        return False
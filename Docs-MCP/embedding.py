@@ -0,0 +1,228 @@
+"""
+embedding.py - Shared embedding scheduler for Docs-MCP
+
+Every embedding request goes through one worker thread that owns the model.
+Requests wait in priority lanes. Interactive query embeddings ("query") always
+run before ingestion ("ingest"). Ingestion can also be held to a share of the
+model's time and to a number of concurrent store connections.
+
+Concurrent requests are coalesced into micro-batches. The worker waits at most
+max_latency after the oldest queued request for the batch to fill to max_batch
+texts, then embeds the whole batch in one model call. A batch never mixes
+lanes, so a query is not held up by a model call padded with ingestion texts.
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, List, Tuple
+
+from langchain_core.embeddings import Embeddings
+
+LANES = ("query", "ingest")
+
+
+class _LaneStats:
+    """Queue-wait and service counters for one lane."""
+
+    def __init__(self):
+        self.requests = 0
+        self.items = 0
+        self.busy = 0.0
+        self.wait_max = 0.0
+        self.wait_total = 0.0
+        self._recent: Deque[float] = deque(maxlen=1024)
+
+    def record(self, wait: float, items: int = 0, busy: float = 0.0) -> None:
+        self.requests += 1
+        self.items += items
+        self.busy += busy
+        self.wait_total += wait
+        self.wait_max = max(self.wait_max, wait)
+        self._recent.append(wait)
+
+    def snapshot(self) -> Dict[str, Any]:
+        recent = sorted(self._recent)
+
+        def pct(p: float) -> float:
+            if not recent:
+                return 0.0
+            return round(recent[min(len(recent) - 1, int(p * len(recent)))] * 1000, 2)
+
+        return {
+            "requests": self.requests,
+            "items": self.items,
+            "busySeconds": round(self.busy, 3),
+            "waitAvgMs": round(self.wait_total / self.requests * 1000, 2) if self.requests else 0.0,
+            "waitP50Ms": pct(0.50),
+            "waitP95Ms": pct(0.95),
+            "waitMaxMs": round(self.wait_max * 1000, 2),
+        }
+
+
+class EmbeddingScheduler(Embeddings):
+    """Embeddings wrapper that schedules all model calls by lane.
+
+    embed_query() uses the query lane and embed_documents() the ingest lane, so
+    the vector stores can use the scheduler in place of the model. Both lanes are
+    embedded with model.embed_documents(); for HuggingFaceEmbeddings that is also
+    what embed_query() does. ingest_share (0 < share <= 1) is the share of the
+    model's time that ingestion may use while work is queued. connection("ingest")
+    limits concurrent ingestion writers to ingest_connections (0 means no limit).
+    """
+
+    def __init__(self, model: Embeddings, max_batch: int = 32, max_latency: float = 0.005,
+                 ingest_share: float = 1.0, ingest_connections: int = 0):
+        self.model = model
+        self.max_batch = max(1, max_batch)
+        self.max_latency = max(0.0, max_latency)
+        self.ingest_share = min(1.0, max(0.05, ingest_share))
+        self._cond = threading.Condition()
+        self._queues: Dict[str, Deque[Tuple[List[str], Future, float]]] = {lane: deque() for lane in LANES}
+        self._stats: Dict[str, _LaneStats] = {lane: _LaneStats() for lane in LANES}
+        self._ingest_ready_at = 0.0
+        self._batches = 0
+        self._batched_texts = 0
+        self._model_seconds = 0.0
+        self._worker = None
+        self._slots = threading.BoundedSemaphore(ingest_connections) if ingest_connections > 0 else None
+        self._slot_limit = ingest_connections
+        self._slot_stats = _LaneStats()
+
+    # -- Embeddings interface --
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._submit("query", [text])[0].result()[0]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        futures = self._submit("ingest", list(texts))
+        return [vector for future in futures for vector in future.result()]
+
+    # -- scheduling --
+
+    def _submit(self, lane: str, texts: List[str]) -> List[Future]:
+        size = self.max_batch
+        futures = []
+        now = time.monotonic()
+        with self._cond:
+            self._start()
+            for i in range(0, len(texts), size):
+                future: Future = Future()
+                self._queues[lane].append((texts[i:i + size], future, now))
+                futures.append(future)
+            self._cond.notify()
+        return futures
+
+    def _start(self) -> None:
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._run, name="docs-mcp-embed", daemon=True)
+            self._worker.start()
+
+    def _ready(self, now: float) -> List[str]:
+        """Lanes whose head job may run now, in priority order."""
+        lanes = ["query"] if self._queues["query"] else []
+        if self._queues["ingest"] and now >= self._ingest_ready_at:
+            lanes.append("ingest")
+        return lanes
+
+    def _next_batch(self) -> List[Tuple[str, Tuple[List[str], Future, float]]]:
+        """Block until work is ready, then collect one micro-batch from the highest-priority ready lane."""
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                lanes = self._ready(now)
+                if lanes:
+                    # Re-evaluated on every wakeup, so a query arriving while ingest texts
+                    # are being collected takes over the next batch.
+                    lane = lanes[0]
+                    queue = self._queues[lane]
+                    queued = sum(len(job[0]) for job in queue)
+                    deadline = queue[0][2] + self.max_latency
+                    if queued >= self.max_batch or now >= deadline:
+                        break
+                    self._cond.wait(deadline - now)
+                elif self._queues["ingest"]:
+                    self._cond.wait(self._ingest_ready_at - now)
+                else:
+                    self._cond.wait()
+            batch: List[Tuple[str, Tuple[List[str], Future, float]]] = []
+            size = 0
+            while queue and (not batch or size + len(queue[0][0]) <= self.max_batch):
+                job = queue.popleft()
+                batch.append((lane, job))
+                size += len(job[0])
+            return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = [(lane, job) for lane, job in self._next_batch() if job[1].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            texts = [t for _, (job_texts, _, _) in batch for t in job_texts]
+            started = time.monotonic()
+            try:
+                vectors = self.model.embed_documents(texts)
+                error = None
+            except BaseException as e:
+                vectors, error = [], e
+            finished = time.monotonic()
+            elapsed = finished - started
+            with self._cond:
+                self._batches += 1
+                self._batched_texts += len(texts)
+                self._model_seconds += elapsed
+                ingest_texts = 0
+                for lane, (job_texts, _, enqueued) in batch:
+                    share = elapsed * len(job_texts) / len(texts)
+                    self._stats[lane].record(started - enqueued, len(job_texts), share)
+                    if lane == "ingest":
+                        ingest_texts += len(job_texts)
+                if ingest_texts and self.ingest_share < 1.0:
+                    # Idle the ingest lane long enough to keep it within its share.
+                    busy = elapsed * ingest_texts / len(texts)
+                    self._ingest_ready_at = finished + busy * (1 / self.ingest_share - 1)
+            offset = 0
+            for _, (job_texts, future, _) in batch:
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(vectors[offset:offset + len(job_texts)])
+                offset += len(job_texts)
+
+    @contextmanager
+    def connection(self, lane: str = "ingest") -> Iterator[None]:
+        """Hold one of the lane's store connection slots (only ingest is limited)."""
+        if lane != "ingest" or self._slots is None:
+            yield
+            return
+        enqueued = time.monotonic()
+        self._slots.acquire()
+        waited = time.monotonic() - enqueued
+        try:
+            yield
+        finally:
+            self._slots.release()
+            with self._cond:
+                self._slot_stats.record(waited, busy=time.monotonic() - enqueued - waited)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            lanes = {lane: {**self._stats[lane].snapshot(), "queued": sum(len(t) for t, _, _ in self._queues[lane])}
+                     for lane in LANES}
+            return {
+                "lanes": lanes,
+                "batching": {
+                    "maxBatch": self.max_batch,
+                    "maxLatencyMs": round(self.max_latency * 1000, 2),
+                    "batches": self._batches,
+                    "avgBatchSize": round(self._batched_texts / self._batches, 2) if self._batches else 0.0,
+                    "embeddingsPerSec": round(self._batched_texts / self._model_seconds, 1)
+                    if self._model_seconds else 0.0,
+                },
+                "ingestShare": self.ingest_share,
+                "ingestConnections": {"limit": self._slot_limit, **self._slot_stats.snapshot()},
+            }
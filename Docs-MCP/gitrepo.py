@@ -0,0 +1,93 @@
+"""
+gitrepo.py - Read files and changes from a local git repository for Docs-MCP ingestion
+
+Content is read from commits (not the working tree), so the commit recorded
+for a library is exactly what was indexed. Ignored and untracked files are
+never in a commit, which also keeps .git and build output out of the index.
+"""
+
+import subprocess
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+
+class GitError(RuntimeError):
+    pass
+
+
+class GitRepo:
+    def __init__(self, path: str):
+        self.root = self._git(path, "rev-parse", "--show-toplevel").decode("utf-8").strip()
+
+    @staticmethod
+    def _git(cwd: str, *args: str) -> bytes:
+        try:
+            proc = subprocess.run(["git", "-C", cwd, *args], capture_output=True, check=False)
+        except FileNotFoundError:
+            raise GitError("git executable not found")
+        if proc.returncode != 0:
+            raise GitError(proc.stderr.decode("utf-8", "replace").strip() or f"git {args[0]} failed")
+        return proc.stdout
+
+    @classmethod
+    def find(cls, path: str) -> Optional["GitRepo"]:
+        """The repository containing path, or None if it is not in a work tree."""
+        try:
+            return cls(path)
+        except GitError:
+            return None
+
+    def run(self, *args: str) -> bytes:
+        return self._git(self.root, *args)
+
+    def resolve(self, ref: str = "HEAD") -> str:
+        return self.run("rev-parse", "--verify", f"{ref}^{{commit}}").decode("ascii").strip()
+
+    def has_commit(self, sha: str) -> bool:
+        try:
+            self.run("cat-file", "-e", f"{sha}^{{commit}}")
+            return True
+        except GitError:
+            return False
+
+    def files(self, commit: str, pathspec: Sequence[str] = ()) -> List[str]:
+        """Regular files (no symlinks or submodules) in a commit, relative to the root."""
+        out = self.run("ls-tree", "-r", "-z", commit, "--", *pathspec)
+        paths = []
+        for entry in out.split(b"\0"):
+            if not entry:
+                continue
+            info, path = entry.split(b"\t", 1)
+            mode, kind, _ = info.split(b" ")
+            if kind == b"blob" and mode != b"120000":
+                paths.append(path.decode("utf-8", "surrogateescape"))
+        return paths
+
+    def diff(self, old: str, new: str, pathspec: Sequence[str] = ()) -> Tuple[List[str], List[str]]:
+        """(changed, deleted) paths between two commits, from `git diff --name-status`."""
+        out = self.run("diff", "--name-status", "--no-renames", "-z", old, new, "--", *pathspec)
+        fields = [f.decode("utf-8", "surrogateescape") for f in out.split(b"\0") if f]
+        changed, deleted = [], []
+        for status, path in zip(fields[0::2], fields[1::2]):
+            (deleted if status.startswith("D") else changed).append(path)
+        return changed, deleted
+
+    def blobs(self, commit: str, paths: Sequence[str]) -> Iterator[Tuple[str, bytes]]:
+        """Yield (path, content) for paths in a commit via one `git cat-file --batch`; non-blobs are skipped."""
+        if not paths:
+            return
+        proc = subprocess.Popen(["git", "-C", self.root, "cat-file", "--batch"],
+                                stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        try:
+            for path in paths:
+                proc.stdin.write(f"{commit}:{path}\n".encode("utf-8", "surrogateescape"))
+                proc.stdin.flush()
+                header = proc.stdout.readline().split()
+                if len(header) < 3:
+                    continue  # "<object> missing"
+                data = proc.stdout.read(int(header[2]))
+                proc.stdout.read(1)
+                if header[1] == b"blob":
+                    yield path, data
+        finally:
+            proc.stdin.close()
+            proc.wait()
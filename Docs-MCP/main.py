@@ -3,24 +3,55 @@ main.py - Single agent with all MCP tools
 Run with: python main.py
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
 import uvicorn
 import os
+import json
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
 from dotenv import load_dotenv
 
+from google.adk.agents.run_config import RunConfig, StreamingMode
 from google.adk.runners import Runner
 from google.adk.sessions import InMemorySessionService
 from google.adk.agents import Agent
+from google.adk.events import Event
 from google.adk.tools.mcp_tool import MCPToolset, StreamableHTTPConnectionParams
 from google.genai.types import Content, Part
 
+from admission import Admission, AdmissionController, Overloaded
+from mcp_client import ToolCaller, WarmToolset
+from router import Route, classify
+from sessions import SQLiteSessionService
+
 # Load environment variables
 load_dotenv()
 
-app = FastAPI(title="Docs-MCP Agent API")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Build the agent and connect to the MCP server before the first request arrives; disconnect on shutdown."""
+    try:
+        init_runner()
+        await toolset.start()
+        print(f"🔌 Connected to MCP server, {toolset.stats()['tools']} tools cached")
+    except Exception as e:
+        # The background refresher keeps retrying; /query reports the error if it persists.
+        print(f"⚠️ MCP warmup failed: {e}")
+    try:
+        yield
+    finally:
+        if toolset is not None:
+            await toolset.close()
+        if tool_caller is not None:
+            await tool_caller.close()
+
+
+app = FastAPI(title="Docs-MCP Agent API", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -30,13 +61,48 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-session_service = InMemorySessionService()
-toolset: MCPToolset | None = None
+# ---- Sessions ----
+# DOCS_MCP_SESSIONS=sqlite (default) persists sessions in DOCS_MCP_SESSION_DB; "memory" keeps them in process.
+SESSION_BACKEND = os.getenv("DOCS_MCP_SESSIONS") or "sqlite"
+SESSION_DB = os.getenv("DOCS_MCP_SESSION_DB") or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "docs_mcp_data", "sessions.db")
+# Sessions idle for longer than this are deleted
+SESSION_TTL_HOURS = float(os.getenv("DOCS_MCP_SESSION_TTL_HOURS") or 7 * 24)
+# Sessions longer than this are compacted to their most recent half
+SESSION_MAX_EVENTS = int(os.getenv("DOCS_MCP_SESSION_MAX_EVENTS") or 200)
+
+if SESSION_BACKEND == "memory":
+    session_service = InMemorySessionService()
+else:
+    session_service = SQLiteSessionService(SESSION_DB, ttl=SESSION_TTL_HOURS * 3600, max_events=SESSION_MAX_EVENTS)
+# ---- MCP connection ----
+MCP_URL = os.getenv("DOCS_MCP_URL") or "http://localhost:8009/mcp"
+# The MCP tool list is cached and refreshed in the background every MCP_TOOLS_REFRESH_SECONDS
+MCP_TOOLS_REFRESH_SECONDS = float(os.getenv("DOCS_MCP_TOOLS_REFRESH_SECONDS") or 300)
+
+# ---- Fast path ----
+# Catalogue questions ("list projects", "what's in project X") are answered by calling the MCP tool
+# directly when the router's confidence reaches ROUTER_THRESHOLD; DOCS_MCP_ROUTER=off disables it.
+ROUTER_ENABLED = (os.getenv("DOCS_MCP_ROUTER") or "on").lower() not in ("0", "off", "false", "no")
+ROUTER_THRESHOLD = float(os.getenv("DOCS_MCP_ROUTER_THRESHOLD") or 0.9)
+
+# ---- Admission control ----
+# At most MAX_CONCURRENT turns run at once and MAX_QUEUE more wait (up to QUEUE_TIMEOUT_SECONDS);
+# further requests get 429 with Retry-After. Turns on the same session always run one at a time.
+MAX_CONCURRENT = int(os.getenv("DOCS_MCP_MAX_CONCURRENT") or 4)
+MAX_QUEUE = int(os.getenv("DOCS_MCP_MAX_QUEUE") or 16)
+QUEUE_TIMEOUT_SECONDS = float(os.getenv("DOCS_MCP_QUEUE_TIMEOUT_SECONDS") or 30)
+
+admission = AdmissionController(MAX_CONCURRENT, MAX_QUEUE, QUEUE_TIMEOUT_SECONDS)
+
+toolset: WarmToolset | None = None
+tool_caller: ToolCaller | None = None
 runner: Runner | None = None
+router_stats: Dict[str, Any] = {"routed": 0, "agent": 0, "fallbacks": 0, "byIntent": {}}
 
 
 def init_runner():
-    global toolset, runner
+    global toolset, tool_caller, runner
     if runner is not None:
         return runner
 
@@ -48,11 +114,15 @@ def init_runner():
             "Get your key from: https://aistudio.google.com/apikey"
         )
 
-    toolset = MCPToolset(
-        connection_params=StreamableHTTPConnectionParams(
-            url="http://localhost:8009/mcp"
-        )
+    toolset = WarmToolset(
+        lambda: MCPToolset(
+            connection_params=StreamableHTTPConnectionParams(
+                url=MCP_URL
+            )
+        ),
+        refresh_interval=MCP_TOOLS_REFRESH_SECONDS,
     )
+    tool_caller = ToolCaller(StreamableHTTPConnectionParams(url=MCP_URL))
 
     agent = Agent(
         name="docs_mcp_agent",
@@ -62,18 +132,41 @@ def init_runner():
         You are the Docs-MCP assistant with access to all MCP tools.
         
         Available tools:
-        - scrape_docs(project, library, url, version?, content_type='docs', maxPages=50?, maxDepth=2?, scope='subpages'?, followRedirects=True?)
+        - scrape_docs(project, library, url, version?, content_type='docs', maxPages=50?, maxDepth=2?, scope='subpages'?, followRedirects=True?, resume=False?, shared=False?)
+          - If a crawl reports it is incomplete, call scrape_docs again with the same arguments and resume=True.
           - The 'url' argument can be a web URL (https://...), or a local file/folder path using the 'file://' protocol (e.g., file:///path/to/file.txt or file:///path/to/folder).
           - You are allowed and encouraged to use 'file://' for reading local files and folders, just as you would scrape a website.
           - Do NOT reject 'file://' arguments; process them as valid sources.
+          - For public libraries used by several projects, pass shared=True so the library is indexed once and shared.
         - search_docs(project, library, query, version?, content_type='docs', limit=5?)
+        - search_all_docs(query, projects='*'?, libraries='*'?, version?, content_type='docs', limit=10?)
+          - Use when the user does not say which project or library to search; it searches all matches in one call.
+        - reindex_from_archive(project, library, version?, content_type='docs', url_prefix?)
         - list_projects()
         - check_project(project)
         - list_libraries(project?)
         - find_version(project, library, content_type='docs', targetVersion?)
+        - attach_library(project, library, version?, content_type='docs')
+          - Before scraping a public library, try attach_library; it reuses a shared corpus already indexed by another project.
         - remove_docs(project, library, version?, content_type='docs')
+        - remove_project(project)
         - fetch_url(url, project, content_type='docs', followRedirects=True?)
         - detailed_stats(project?, library?, version?)
+        - scrape_git_repo(project, library, path, version?, content_type='docs', ref='HEAD'?, pathspec?)
+          - Use for local git repositories; calling it again only re-indexes files changed since the last indexed commit.
+        - watch_folder(project, library, path, version?, content_type='docs', intervalSeconds=30?, debounceSeconds=5?)
+          - Use when the user wants a local folder kept up to date; changed files are re-indexed automatically.
+        - unwatch_folder(project, library, path, version?, content_type='docs', removeDocs=False?)
+        - list_watches()
+        - extraction_progress()
+        - embedding_stats()
+        - start_reembed(model, batchSize=64?, pauseMs=200?, autoCutover=True?, minRecallRatio=0.9?, sample=50?)
+        - reembed_status()
+        - cutover_reembed(force=False?)
+        - cancel_reembed(dropShadow=True?)
+        - export_library(project, library, version?, content_type='docs', path?)
+        - import_library(path, project?, library?, version?, content_type?, replace=True?)
+          - Prefer import_library over scrape_docs when the user has a snapshot file; it restores a library without crawling.
         
         IMPORTANT BEHAVIOR:
         - For fetch_url requests: Return ONLY the raw markdown content from the tool, without any additional text, commentary, or explanation.
@@ -108,32 +201,204 @@ class QueryRequest(BaseModel):
     session_id: str = "default_session"
 
 
+class StreamQueryRequest(QueryRequest):
+    # "sse" (text/event-stream) or "ndjson" (one JSON event per line)
+    format: str = "sse"
+
+
+async def ensure_session(user_id: str, session_id: str) -> None:
+    existing = await session_service.get_session(
+        app_name="docs_mcp_agent",
+        user_id=user_id,
+        session_id=session_id,
+    )
+    if existing is None:
+        await session_service.create_session(
+            app_name="docs_mcp_agent",
+            user_id=user_id,
+            session_id=session_id,
+        )
+
+
+def _event_text(event) -> str:
+    if not event.content or not event.content.parts:
+        return ""
+    return "".join(part.text for part in event.content.parts if getattr(part, "text", None))
+
+
+async def record_turn(request: QueryRequest, answer: str) -> None:
+    """Append a question and its answer to the session, so follow-up questions to the agent see it."""
+    session = await session_service.get_session(
+        app_name="docs_mcp_agent",
+        user_id=request.user_id,
+        session_id=request.session_id,
+    )
+    invocation_id = Event.new_id()
+    await session_service.append_event(session, Event(
+        invocation_id=invocation_id, author="user",
+        content=Content(role="user", parts=[Part(text=request.query)])))
+    await session_service.append_event(session, Event(
+        invocation_id=invocation_id, author="docs_mcp_agent",
+        content=Content(role="model", parts=[Part(text=answer)])))
+
+
+async def fast_path(request: QueryRequest) -> Optional[Tuple[Route, str, float]]:
+    """Answer a catalogue question by calling its MCP tool directly.
+
+    Returns (route, answer, tool call ms), or None if the query should go to the agent: no
+    confident route, the router is disabled, or the tool call failed.
+    """
+    route = classify(request.query) if ROUTER_ENABLED else None
+    if route is None or route.confidence < ROUTER_THRESHOLD:
+        router_stats["agent"] += 1
+        return None
+    started = time.monotonic()
+    try:
+        answer = await tool_caller.call(route.tool, route.args)
+        duration = round((time.monotonic() - started) * 1000, 1)
+        if not answer:
+            raise RuntimeError("empty result")
+        await ensure_session(request.user_id, request.session_id)
+        await record_turn(request, answer)
+    except Exception as e:
+        print(f"Fast path {route.tool}({route.args}) failed, using the agent: {e}")
+        router_stats["fallbacks"] += 1
+        return None
+    router_stats["routed"] += 1
+    router_stats["byIntent"][route.intent] = router_stats["byIntent"].get(route.intent, 0) + 1
+    return route, answer, duration
+
+
+def _route_info(route: Route) -> Dict[str, Any]:
+    return {"intent": route.intent, "tool": route.tool, "args": route.args, "confidence": route.confidence}
+
+
+async def agent_events(request: QueryRequest) -> AsyncIterator[Dict[str, Any]]:
+    """Run one agent turn with streaming enabled, yielding events as they arrive.
+
+    Event types: tool_call, tool_result (with durationMs), text (partial model
+    output), final (the answer) and error. Every event carries elapsedMs since
+    the request started. Catalogue questions answered by the fast path yield
+    the tool call and result followed by final, with the route attached.
+    """
+    started = time.monotonic()
+    tool_started: Dict[str, float] = {}
+
+    def emit(kind: str, **fields) -> Dict[str, Any]:
+        return {"type": kind, "elapsedMs": round((time.monotonic() - started) * 1000, 1), **fields}
+
+    try:
+        routed = await fast_path(request)
+        if routed is not None:
+            route, answer, duration = routed
+            yield emit("tool_call", id=None, name=route.tool, args=route.args)
+            yield emit("tool_result", id=None, name=route.tool, durationMs=duration)
+            yield emit("final", text=answer, route=_route_info(route))
+            return
+        await ensure_session(request.user_id, request.session_id)
+        content = Content(role="user", parts=[Part(text=request.query)])
+        final_text = None
+        async for event in runner.run_async(
+            user_id=request.user_id,
+            session_id=request.session_id,
+            new_message=content,
+            run_config=RunConfig(streaming_mode=StreamingMode.SSE),
+        ):
+            for call in event.get_function_calls():
+                tool_started[call.id or call.name] = time.monotonic()
+                yield emit("tool_call", id=call.id, name=call.name, args=call.args or {})
+            for response in event.get_function_responses():
+                began = tool_started.pop(response.id or response.name, None)
+                duration = round((time.monotonic() - began) * 1000, 1) if began is not None else None
+                yield emit("tool_result", id=response.id, name=response.name, durationMs=duration)
+            text = _event_text(event)
+            if event.partial:
+                if text:
+                    yield emit("text", text=text)
+            elif event.is_final_response() and text:
+                final_text = text
+        if final_text:
+            yield emit("final", text=final_text)
+        else:
+            yield emit("error", error="No response from agent")
+    except Exception as e:
+        print(f"Error: {e}")
+        yield emit("error", error=str(e))
+
+
+class AdmittedStreamingResponse(StreamingResponse):
+    """StreamingResponse that releases its admission ticket however the response ends.
+
+    Releasing in the body generator or a background task is not enough: neither
+    runs if the client disconnects before or while the body is sent.
+    """
+
+    def __init__(self, ticket: Admission, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.ticket = ticket
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            admission.release(self.ticket)
+
+
+@app.exception_handler(Overloaded)
+async def overloaded(request: Request, exc: Overloaded):
+    return JSONResponse(status_code=429, content={"error": str(exc), "retryAfter": exc.retry_after},
+                        headers={"Retry-After": str(exc.retry_after)})
+
+
 @app.get("/")
 async def health():
     return {"status": "ok", "message": "Docs-MCP Agent API"}
 
 
+@app.get("/stats/mcp")
+async def mcp_stats():
+    """MCP connection state, reconnects, tool-list cache age and list latency"""
+    if toolset is None:
+        return {"state": "not started"}
+    return toolset.stats()
+
+
+@app.get("/stats/router")
+async def router_stats_endpoint():
+    """Queries answered by the fast path vs. the agent, and fast-path tool call latency"""
+    return {
+        **router_stats,
+        "enabled": ROUTER_ENABLED,
+        "threshold": ROUTER_THRESHOLD,
+        "toolCalls": tool_caller.stats() if tool_caller is not None else None,
+    }
+
+
+@app.get("/stats/admission")
+async def admission_stats():
+    """Running and queued turns, rejections, and queue wait times"""
+    return admission.stats()
+
+
 @app.post("/query")
 async def query_agent(request: QueryRequest):
     """Single endpoint - agent decides which tool to use"""
     init_runner()
 
+    # Raises Overloaded (429) when the queue is full
+    ticket = await admission.acquire((request.user_id, request.session_id))
     try:
+        # Catalogue questions skip the LLM when the router is confident
+        routed = await fast_path(request)
+        if routed is not None:
+            route, answer, _ = routed
+            return JSONResponse(status_code=200, content={"result": answer, "route": _route_info(route)})
+
         user_id = request.user_id
         session_id = request.session_id
 
         # Ensure session exists
-        existing = await session_service.get_session(
-            app_name="docs_mcp_agent",
-            user_id=user_id,
-            session_id=session_id,
-        )
-        if existing is None:
-            await session_service.create_session(
-                app_name="docs_mcp_agent",
-                user_id=user_id,
-                session_id=session_id,
-            )
+        await ensure_session(user_id, session_id)
 
         content = Content(role="user", parts=[Part(text=request.query)])
 
@@ -157,6 +422,31 @@ async def query_agent(request: QueryRequest):
     except Exception as e:
         print(f"Error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        admission.release(ticket)
+
+
+@app.post("/query/stream")
+async def query_agent_stream(request: StreamQueryRequest):
+    """Like /query, but streams tool calls, partial text and the final answer as they happen"""
+    if request.format not in ("sse", "ndjson"):
+        raise HTTPException(status_code=400, detail="format must be 'sse' or 'ndjson'")
+    init_runner()
+    # Admit before the response starts, so an overloaded server can still answer 429
+    ticket = await admission.acquire((request.user_id, request.session_id))
+
+    async def event_generator():
+        async for event in agent_events(request):
+            data = json.dumps(event, default=str)
+            if request.format == "sse":
+                yield f"event: {event['type']}\ndata: {data}\n\n"
+            else:
+                yield data + "\n"
+
+    media_type = "text/event-stream" if request.format == "sse" else "application/x-ndjson"
+    # Disable proxy buffering so each event is delivered immediately.
+    return AdmittedStreamingResponse(ticket, event_generator(), media_type=media_type,
+                                     headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 if __name__ == "__main__":
     print("🚀 Starting Docs-MCP Agent API on http://localhost:8002")
@@ -0,0 +1,168 @@
+"""
+mcp_client.py - Warm, self-healing MCP toolset for the Docs-MCP agent API
+
+WarmToolset wraps an ADK MCP toolset. It connects and lists the tools at
+startup, serves the cached tool list to every agent turn, and refreshes the
+list in the background. If listing fails (e.g. the MCP server restarted), the
+underlying toolset is rebuilt and the connection retried with exponential
+backoff.
+
+ToolCaller calls a single MCP tool directly, without the agent, over a pooled
+session that is re-established when the server drops it.
+"""
+
+import asyncio
+import time
+import traceback
+from typing import Any, Callable, Dict, List, Optional
+
+from google.adk.tools.base_toolset import BaseToolset
+from google.adk.tools.mcp_tool.mcp_session_manager import MCPSessionManager
+
+
+class WarmToolset(BaseToolset):
+    def __init__(self, factory: Callable[[], BaseToolset], refresh_interval: float = 300.0,
+                 backoff_min: float = 0.5, backoff_max: float = 30.0, attempts: int = 3):
+        super().__init__()
+        self.factory = factory
+        self.refresh_interval = refresh_interval
+        self.backoff_min = backoff_min
+        self.backoff_max = backoff_max
+        self.attempts = max(1, attempts)
+        self._inner = factory()
+        self._tools: Optional[List[Any]] = None
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._stats: Dict[str, Any] = {
+            "state": "disconnected", "connects": 0, "reconnects": 0, "refreshes": 0, "failures": 0,
+            "cacheHits": 0, "lastError": None, "lastRefreshAt": None, "listLatencyMs": None,
+        }
+        self._list_seconds_total = 0.0
+
+    async def start(self) -> None:
+        """Connect and load the tool list now, then keep it fresh in the background."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._refresher())
+        await self.refresh()
+
+    async def get_tools(self, readonly_context=None) -> List[Any]:
+        tools = self._tools
+        if tools is None:
+            if self._task is None or self._task.done():
+                self._task = asyncio.create_task(self._refresher())
+            tools = await self.refresh()
+        else:
+            self._stats["cacheHits"] += 1
+        return tools
+
+    async def refresh(self) -> List[Any]:
+        """List the tools, rebuilding the connection with backoff on failure."""
+        async with self._lock:
+            delay = self.backoff_min
+            for attempt in range(1, self.attempts + 1):
+                started = time.monotonic()
+                try:
+                    tools = await self._inner.get_tools()
+                except Exception as e:
+                    self._stats["failures"] += 1
+                    self._stats["lastError"] = f"{type(e).__name__}: {e}"
+                    self._stats["state"] = "reconnecting"
+                    if attempt == self.attempts:
+                        self._stats["state"] = "disconnected"
+                        raise
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, self.backoff_max)
+                    await self._reconnect()
+                    continue
+                elapsed = time.monotonic() - started
+                self._list_seconds_total += elapsed
+                if self._stats["state"] != "connected":
+                    self._stats["connects"] += 1
+                self._stats.update(state="connected", lastRefreshAt=time.time(),
+                                   refreshes=self._stats["refreshes"] + 1,
+                                   listLatencyMs=round(elapsed * 1000, 1))
+                self._tools = tools
+                return tools
+
+    async def _reconnect(self) -> None:
+        old, self._inner = self._inner, self.factory()
+        self._stats["reconnects"] += 1
+        try:
+            await old.close()
+        except Exception:
+            pass
+
+    async def _refresher(self) -> None:
+        delay = self.refresh_interval
+        while True:
+            await asyncio.sleep(delay)
+            try:
+                await self.refresh()
+                delay = self.refresh_interval
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                traceback.print_exc()
+                # Keep serving the last good tool list and try to reconnect again soon.
+                delay = min(self.backoff_max, self.refresh_interval)
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        await self._inner.close()
+        self._stats["state"] = "disconnected"
+
+    def stats(self) -> Dict[str, Any]:
+        refreshed = self._stats["lastRefreshAt"]
+        refreshes = self._stats["refreshes"]
+        return {
+            **self._stats,
+            "tools": len(self._tools) if self._tools is not None else 0,
+            "cacheAgeSeconds": round(time.time() - refreshed, 1) if refreshed else None,
+            "listLatencyAvgMs": round(self._list_seconds_total / refreshes * 1000, 1) if refreshes else None,
+            "refreshIntervalSeconds": self.refresh_interval,
+        }
+
+
+class ToolCaller:
+    def __init__(self, connection_params: Any, attempts: int = 2):
+        self.connection_params = connection_params
+        self.attempts = max(1, attempts)
+        self._sessions = MCPSessionManager(connection_params)
+        self._stats: Dict[str, Any] = {"calls": 0, "errors": 0, "lastError": None}
+        self._call_seconds_total = 0.0
+
+    async def call(self, name: str, args: Dict[str, Any]) -> str:
+        """Call MCP tool `name` and return its text output; raises if the tool reports an error."""
+        for attempt in range(1, self.attempts + 1):
+            started = time.monotonic()
+            try:
+                session = await self._sessions.create_session()
+                result = await session.call_tool(name, arguments=args)
+            except Exception as e:
+                self._stats["errors"] += 1
+                self._stats["lastError"] = f"{type(e).__name__}: {e}"
+                if attempt == self.attempts:
+                    raise
+                # The session manager replaces a disconnected session on the next create_session().
+                continue
+            self._call_seconds_total += time.monotonic() - started
+            self._stats["calls"] += 1
+            text = "\n".join(c.text for c in result.content if getattr(c, "text", None))
+            # mcp 1.x names the flag isError, 2.x is_error
+            if getattr(result, "is_error", None) or getattr(result, "isError", False):
+                self._stats["errors"] += 1
+                self._stats["lastError"] = text
+                raise RuntimeError(text or f"Tool {name} failed")
+            return text
+
+    async def close(self) -> None:
+        await self._sessions.close()
+
+    def stats(self) -> Dict[str, Any]:
+        calls = self._stats["calls"]
+        return {
+            **self._stats,
+            "callLatencyAvgMs": round(self._call_seconds_total / calls * 1000, 1) if calls else None,
+        }
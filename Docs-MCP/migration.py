@@ -0,0 +1,480 @@
+"""
+migration.py - Re-embed the Docs-MCP index with a new model, without downtime
+
+A migration copies every stored chunk into a shadow store, embedding it with the
+new model. The copy runs in throttled background batches. Meanwhile
+DualWriteStore keeps serving reads from the active store and mirrors every write
+into the shadow from a background thread. When the copy is complete and a recall
+check passes, the caller switches to the shadow in one step, and the replaced
+index is dropped shortly after. Chunk text comes from the store itself, so
+nothing is re-crawled. Rows are read in fixed-size batches throughout.
+"""
+
+import json
+import os
+import queue
+import random
+import re
+import threading
+import time
+import traceback
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from store import CORE_FIELDS, VectorStore
+
+# Phases in which the shadow must keep receiving writes (also after a restart).
+ACTIVE_PHASES = ("backfill", "verifying", "ready")
+
+
+def write_json(path: str, data: Dict[str, Any]) -> None:
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp, path)
+
+
+def read_json(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def index_slug(model: str) -> str:
+    """Storage-safe name for the index of an embedding model."""
+    return re.sub(r"[^a-z0-9]+", "-", model.lower()).strip("-")
+
+
+def drop_index(store: VectorStore) -> int:
+    """Drop every project partition of an index that is no longer served; returns chunks removed."""
+    return sum(store.drop_project(project) for project in store.projects())
+
+
+def _chunk_ids(store: VectorStore, project: str) -> Set[str]:
+    return {cid for ids in store.chunk_hashes({"project": project}).values() for cid in ids}
+
+
+class _WriteGate:
+    """Lets writes run concurrently, but lets cutover wait for them to drain and hold new ones.
+
+    Re-entrant per thread, so a page can hold the gate around all of its writes.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._active = 0
+        self._closed = False
+        self._held = threading.local()
+
+    def __enter__(self):
+        depth = getattr(self._held, "depth", 0)
+        with self._cond:
+            while self._closed and not depth:
+                self._cond.wait()
+            self._active += 1
+        self._held.depth = depth + 1
+
+    def __exit__(self, *exc):
+        self._held.depth -= 1
+        with self._cond:
+            self._active -= 1
+            self._cond.notify_all()
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            while self._active:
+                self._cond.wait()
+
+    def open(self) -> None:
+        with self._cond:
+            self._closed = False
+            self._cond.notify_all()
+
+
+class DualWriteStore(VectorStore):
+    """Reads from `primary`; every write is applied to `primary` and mirrored to `shadow`.
+
+    Chunks keep the same id in both stores. Mirrored writes are queued and applied
+    in order by a background thread, so ingestion does not wait for the shadow to
+    embed added chunks with its own model. Once MAX_PENDING writes are waiting,
+    writers block until the shadow catches up, so no write is ever skipped. A
+    failed shadow write does not fail ingestion: it is recorded in
+    shadow_errors and blocks cutover. Once cut over, a write that was waiting on
+    the gate goes straight to the shadow, which is then the active index.
+    """
+
+    MAX_PENDING = 256
+
+    def __init__(self, primary: VectorStore, shadow: VectorStore):
+        super().__init__(primary.embeddings)
+        self.primary = primary
+        self.shadow = shadow
+        self.gate = _WriteGate()
+        self.shadow_errors: List[str] = []
+        # Projects written to since the migration started; "*" means any project.
+        self.dirty: Set[str] = set()
+        self.cut_over = False
+        self._mirroring = True
+        self._pending: "queue.Queue[Optional[tuple]]" = queue.Queue(self.MAX_PENDING)
+        self._worker = threading.Thread(target=self._apply, name="docs-mcp-shadow", daemon=True)
+        self._worker.start()
+
+    def _touch(self, project: Any) -> None:
+        self.dirty.add(str(project) if project is not None else "*")
+
+    def hold_writes(self):
+        return self.gate
+
+    def _write(self, project: Any, name: str, *args) -> Any:
+        self._touch(project)
+        with self.gate:
+            if self.cut_over:
+                return getattr(self.shadow, name)(*args)
+            result = getattr(self.primary, name)(*args)
+            self._mirror(getattr(self.shadow, name), *args)
+        return result
+
+    def _mirror(self, fn: Callable, *args) -> None:
+        if self._mirroring:
+            self._pending.put((fn, args))
+
+    def _apply(self) -> None:
+        while True:
+            item = self._pending.get()
+            try:
+                if item is None:
+                    return
+                fn, args = item
+                try:
+                    fn(*args)
+                except Exception as e:
+                    print(f"Shadow write failed: {e}")
+                    self.shadow_errors.append(f"{getattr(fn, '__name__', 'write')}: {e}")
+            finally:
+                self._pending.task_done()
+
+    def flush(self) -> None:
+        """Wait until every queued shadow write has been applied."""
+        self._pending.join()
+
+    def close(self, discard: bool = False) -> None:
+        """Stop mirroring, after applying queued writes unless discard is set."""
+        # Wait out writers that may still be queueing, so none blocks on a queue nobody drains.
+        self.gate.close()
+        self._mirroring = False
+        self.gate.open()
+        if discard:
+            while True:
+                try:
+                    self._pending.get_nowait()
+                except queue.Empty:
+                    break
+                self._pending.task_done()
+        self._pending.put(None)
+        self._worker.join()
+
+    # -- writes --
+
+    def add_embeddings(self, texts, embeddings, metadatas, ids=None) -> int:
+        ids = ids or [str(uuid.uuid4()) for _ in texts]
+        for meta in metadatas:
+            self._touch(meta.get("project"))
+        with self.gate:
+            if self.cut_over:
+                # The vectors come from the old model; the shadow embeds with its own.
+                return self.shadow.add(texts, metadatas, ids)
+            added = self.primary.add_embeddings(texts, embeddings, metadatas, ids)
+            self._mirror(self.shadow.add, texts, metadatas, ids)
+        return added
+
+    def delete(self, filters) -> int:
+        return self._write(filters.get("project"), "delete", filters)
+
+    def delete_ids(self, project, ids) -> int:
+        return self._write(project, "delete_ids", project, ids)
+
+    def update_offsets(self, project, offsets) -> None:
+        self._write(project, "update_offsets", project, offsets)
+
+    def put_page(self, meta, page_id, content) -> None:
+        self._write(meta.get("project"), "put_page", meta, page_id, content)
+
+    def delete_pages(self, filters) -> int:
+        return self._write(filters.get("project"), "delete_pages", filters)
+
+    def drop_project(self, project: str) -> int:
+        return self._write(project, "drop_project", project)
+
+    # -- reads --
+
+    def _search_by_vector(self, embedding, k, filters):
+        return self.primary._search_by_vector(embedding, k, filters)
+
+    def _rows(self, filters, with_embeddings=False):
+        return self.primary._rows(filters, with_embeddings)
+
+    def _rows_after(self, filters, after, limit):
+        return self.primary._rows_after(filters, after, limit)
+
+    def _rows_by_ids(self, project, ids):
+        return self.primary._rows_by_ids(project, ids)
+
+    def chunk_hashes(self, filters):
+        return self.primary.chunk_hashes(filters)
+
+    def get_pages(self, project, page_ids):
+        return self.primary.get_pages(project, page_ids)
+
+    def distinct_values(self, field, filters=None):
+        return self.primary.distinct_values(field, filters)
+
+    def project_stats(self):
+        return self.primary.project_stats()
+
+    def url_stats(self, filters):
+        return self.primary.url_stats(filters)
+
+    def projects(self):
+        return self.primary.projects()
+
+    async def asearch(self, query, k, filters):
+        return await self.primary.asearch(query, k, filters)
+
+    async def asearch_by_vector(self, embedding, k, filters):
+        return await self.primary.asearch_by_vector(embedding, k, filters)
+
+    async def aget_pages(self, project, page_ids):
+        return await self.primary.aget_pages(project, page_ids)
+
+    async def adistinct_values(self, field, filters=None):
+        return await self.primary.adistinct_values(field, filters)
+
+    async def aproject_stats(self):
+        return await self.primary.aproject_stats()
+
+    async def aurl_stats(self, filters):
+        return await self.primary.aurl_stats(filters)
+
+    async def aprojects(self):
+        return await self.primary.aprojects()
+
+
+class ReembedMigration:
+    """Backfills `dual.shadow` from `dual.primary` and verifies it before cutover.
+
+    Progress is saved to `state_path` after every batch. The backfill compares
+    chunk ids per project, so a restarted migration only copies what is still
+    missing. The same comparison runs once more while writes are held at cutover.
+    The replaced index is dropped DROP_GRACE_SECONDS after cutover, once reads
+    already in flight on it have finished.
+    """
+
+    DROP_GRACE_SECONDS = 30.0
+
+    def __init__(self, state_path: str, dual: DualWriteStore, state: Dict[str, Any],
+                 activate: Callable[["ReembedMigration"], None]):
+        self.state_path = state_path
+        self.dual = dual
+        self.state = state
+        self.activate = activate
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def source(self) -> VectorStore:
+        return self.dual.primary
+
+    @property
+    def target(self) -> VectorStore:
+        return self.dual.shadow
+
+    def save(self) -> None:
+        with self._lock:
+            self.state["updatedAt"] = time.time()
+            write_json(self.state_path, self.state)
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="docs-mcp-reembed", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def _set_phase(self, phase: str, **extra: Any) -> None:
+        self.state.update(phase=phase, **extra)
+        self.save()
+
+    def _run(self) -> None:
+        try:
+            if self.state["phase"] == "backfill":
+                for project in self.source.projects():
+                    if self._stop.is_set():
+                        return
+                    self._sync_project(project, throttle=True)
+                if self._stop.is_set():
+                    return
+                self._set_phase("verifying")
+            if self.state["phase"] == "verifying":
+                self.verify()
+                if self.state["recall"]["passed"] and self.state.get("autoCutover"):
+                    self.cutover()
+        except Exception as e:
+            traceback.print_exc()
+            self._set_phase("failed", error=str(e))
+
+    def _sync_project(self, project: str, throttle: bool) -> int:
+        """Make the shadow's chunks of one project match the source's; returns chunks copied."""
+        src_ids = _chunk_ids(self.source, project)
+        dst_ids = _chunk_ids(self.target, project)
+        extra = list(dst_ids - src_ids)
+        if extra:
+            self.target.delete_ids(project, extra)
+        missing = sorted(src_ids - dst_ids)
+        progress = self.state["projects"].setdefault(project, {"chunks": 0, "copied": 0})
+        progress["chunks"] = len(src_ids)
+        if not missing:
+            progress["copied"] = len(src_ids)
+            self.save()
+            return 0
+
+        copied_pages: Set[str] = set()
+        batch_size = max(1, int(self.state.get("batchSize", 64)))
+        pause = max(0, int(self.state.get("pauseMs", 0))) / 1000
+        done = 0
+        copied = 0
+        for i in range(0, len(missing), batch_size):
+            if throttle and self._stop.is_set():
+                break
+            # Only one batch of chunk texts is held at a time.
+            batch = [r for r in self.source.rows_by_ids(project, missing[i:i + batch_size]) if r["document"]]
+            if batch:
+                self._copy_pages(project, batch, copied_pages)
+                self.target.add([r["document"] for r in batch], [r["metadata"] for r in batch],
+                                [r["id"] for r in batch])
+            done += len(missing[i:i + batch_size])
+            copied += len(batch)
+            progress["copied"] = len(src_ids) - len(missing) + done
+            self.state["copied"] = self.state.get("copied", 0) + len(batch)
+            self.save()
+            if throttle and pause:
+                time.sleep(pause)
+        return copied
+
+    def _sync_offsets(self, project: str) -> None:
+        """Re-apply source offsets to copied chunks the backfill may have read before an update."""
+        for batch in self.source.iter_rows({"project": project}, hydrate=False):
+            spans = {r["id"]: (int(r["metadata"]["start"]), int(r["metadata"]["end"]))
+                     for r in batch if "start" in r["metadata"]}
+            moved = {r["id"]: spans[r["id"]] for r in self.target.rows_by_ids(project, list(spans), hydrate=False)
+                     if (r["metadata"].get("start"), r["metadata"].get("end")) != spans[r["id"]]}
+            if moved:
+                self.target.update_offsets(project, moved)
+
+    def _copy_pages(self, project: str, rows: List[Dict[str, Any]], done: Set[str]) -> None:
+        metas = {}
+        for r in rows:
+            page_id = r["metadata"].get("page_id")
+            if page_id and page_id not in done:
+                metas[page_id] = {f: r["metadata"].get(f) for f in CORE_FIELDS}
+        if not metas:
+            return
+        for page_id, content in self.source.get_pages(project, list(metas)).items():
+            self.target.put_page(metas[page_id], page_id, content)
+        done.update(metas)
+
+    def _self_recall(self, store: VectorStore, samples: List[Dict[str, Any]], k: int) -> float:
+        hits = 0
+        for row in samples:
+            found = store.search(row["query"], k, {"project": row["project"]})
+            hits += any(str(getattr(d, "id", "")) == row["id"] for d, _ in found)
+        return round(hits / len(samples), 4) if samples else 1.0
+
+    def _samples(self, count: int) -> List[Dict[str, Any]]:
+        """Random chunks, each queried by a short span of its own text."""
+        rng = random.Random(0)
+        # Reservoir sample, so memory stays bounded by `count` whatever the corpus size
+        pool: List[Any] = []
+        seen = 0
+        for project in self.source.projects():
+            for batch in self.source.iter_rows({"project": project}):
+                for r in batch:
+                    words = r["document"].split()
+                    if len(words) < 8:
+                        continue
+                    seen += 1
+                    if len(pool) < count:
+                        pool.append((project, r["id"], words))
+                    else:
+                        j = rng.randrange(seen)
+                        if j < count:
+                            pool[j] = (project, r["id"], words)
+        out = []
+        for project, cid, words in pool:
+            start = rng.randrange(0, max(1, len(words) - 12))
+            out.append({"project": project, "id": cid, "query": " ".join(words[start:start + 12])})
+        return out
+
+    def verify(self) -> Dict[str, Any]:
+        """Compare self-retrieval recall of the shadow with the active index."""
+        samples = self._samples(int(self.state.get("sample", 50)))
+        k = int(self.state.get("k", 10))
+        source_recall = self._self_recall(self.source, samples, k)
+        target_recall = self._self_recall(self.target, samples, k)
+        ratio = float(self.state.get("minRecallRatio", 0.9))
+        recall = {
+            "samples": len(samples),
+            "k": k,
+            "active": source_recall,
+            "shadow": target_recall,
+            "minRatio": ratio,
+            "passed": target_recall >= ratio * source_recall and not self.dual.shadow_errors,
+        }
+        self._set_phase("ready" if recall["passed"] else "verifying", recall=recall)
+        return recall
+
+    def cutover(self, force: bool = False) -> None:
+        """Hold writes, copy the last changes, then let the caller switch to the shadow."""
+        if self.dual.shadow_errors and not force:
+            raise RuntimeError(f"{len(self.dual.shadow_errors)} shadow writes failed; cancel and restart the migration")
+        self.dual.gate.close()
+        try:
+            self.dual.flush()
+            dirty = self.dual.dirty
+            for project in self.source.projects():
+                self._sync_project(project, throttle=False)
+                if "*" in dirty or project in dirty:
+                    self._sync_offsets(project)
+            for project in set(self.target.projects()) - set(self.source.projects()):
+                self.target.drop_project(project)
+            self.activate(self)
+            self.dual.cut_over = True
+            self._set_phase("done", finishedAt=time.time(), previousIndex="pending")
+        finally:
+            self.dual.gate.open()
+        self.dual.close()
+        threading.Thread(target=self._drop_previous, name="docs-mcp-drop-index", daemon=True).start()
+
+    def _drop_previous(self) -> None:
+        time.sleep(self.DROP_GRACE_SECONDS)
+        try:
+            dropped = drop_index(self.source)
+        except Exception as e:
+            traceback.print_exc()
+            self.state["previousIndex"] = f"drop failed: {e}"
+        else:
+            self.state["previousIndex"] = "dropped"
+            print(f"Dropped the replaced {self.state.get('fromModel')} index ({dropped} chunks)")
+        self.save()
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            status = json.loads(json.dumps(self.state))
+        status["shadowWriteErrors"] = len(self.dual.shadow_errors)
+        status["shadowWritesPending"] = self.dual._pending.qsize()
+        return status
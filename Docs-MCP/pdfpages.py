@@ -0,0 +1,180 @@
+"""
+pdfpages.py - Page-parallel PDF conversion with a per-page markdown cache
+
+A PDF is split into page ranges that are converted concurrently. The markdown
+of every converted page is cached under (document hash, page number), so a
+re-scrape or a retry only converts pages that are not cached yet. A range that
+fails is retried one page at a time; pages that still fail are reported and
+left out rather than failing the whole document.
+"""
+
+import hashlib
+import os
+import threading
+import time
+import traceback
+from concurrent.futures import Executor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Page counting is optional (pypdfium2 ships with docling); without it PDFs are converted whole.
+try:
+    import pypdfium2  # type: ignore
+except Exception:
+    pypdfium2 = None  # type: ignore
+
+# convert(path, first_page, last_page) -> {page_no: markdown} for that inclusive, 1-based range
+RangeConverter = Callable[[str, int, int], Dict[int, str]]
+
+
+def file_digest(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def page_count(path: str) -> Optional[int]:
+    if pypdfium2 is None:
+        return None
+    try:
+        pdf = pypdfium2.PdfDocument(path)
+    except Exception:
+        return None
+    try:
+        return len(pdf)
+    finally:
+        pdf.close()
+
+
+class PageCache:
+    """Markdown per (document sha256, page) as files under `<directory>/<sha[:2]>/<sha>/<page>.md`."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def _dir(self, digest: str) -> str:
+        return os.path.join(self.directory, digest[:2], digest)
+
+    def get(self, digest: str, page: int) -> Optional[str]:
+        try:
+            with open(os.path.join(self._dir(digest), f"{page}.md"), "r", encoding="utf-8") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def put(self, digest: str, page: int, markdown: str) -> None:
+        directory = self._dir(digest)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{page}.md")
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(markdown)
+        os.replace(tmp, path)
+
+
+class ExtractionProgress:
+    """Per-page progress of the PDF conversions currently running (and the last few finished)."""
+
+    KEEP_FINISHED = 20
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._docs: Dict[str, Dict[str, Any]] = {}
+
+    def start(self, path: str, pages: int, cached: int) -> Dict[str, Any]:
+        entry = {"path": path, "pages": pages, "cached": cached, "converted": 0, "failed": [],
+                 "startedAt": time.time(), "finishedAt": None}
+        with self._lock:
+            self._docs[path] = entry
+            finished = [p for p, e in self._docs.items() if e["finishedAt"] is not None]
+            for p in finished[:-self.KEEP_FINISHED]:
+                del self._docs[p]
+        return entry
+
+    def update(self, entry: Dict[str, Any], converted: int = 0, failed: Optional[List[int]] = None) -> None:
+        with self._lock:
+            entry["converted"] += converted
+            if failed:
+                entry["failed"] = sorted(set(entry["failed"]) | set(failed))
+
+    def finish(self, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            entry["finishedAt"] = time.time()
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [dict(e, failed=list(e["failed"])) for e in self._docs.values()]
+
+
+def _ranges(pages: List[int], size: int) -> List[Tuple[int, int]]:
+    """Group sorted page numbers into consecutive runs of at most `size` pages."""
+    out: List[Tuple[int, int]] = []
+    for page in pages:
+        if out and page == out[-1][1] + 1 and page - out[-1][0] < size:
+            out[-1] = (out[-1][0], page)
+        else:
+            out.append((page, page))
+    return out
+
+
+def convert_pdf(path: str, convert: RangeConverter, pool: Executor, cache: PageCache,
+                progress: ExtractionProgress, pages_per_task: int = 4, retries: int = 1,
+                label: Optional[str] = None) -> Tuple[str, Dict[str, Any]]:
+    """Markdown for a PDF, converted in page ranges on `pool`; returns (markdown, summary).
+
+    `label` names the document in progress reports (default: path).
+
+    Raises ValueError if the page count cannot be read (callers fall back to a
+    whole-document conversion) and RuntimeError if no page could be converted.
+    """
+    total = page_count(path)
+    if not total:
+        raise ValueError(f"Cannot read page count of {path}")
+    digest = file_digest(path)
+    pages: Dict[int, str] = {}
+    for page in range(1, total + 1):
+        cached = cache.get(digest, page)
+        if cached is not None:
+            pages[page] = cached
+    entry = progress.start(label or path, total, len(pages))
+    failed: List[int] = []
+
+    def run(first: int, last: int) -> Dict[int, str]:
+        result = convert(path, first, last)
+        for page in range(first, last + 1):
+            markdown = result.get(page, "")
+            cache.put(digest, page, markdown)
+        progress.update(entry, converted=last - first + 1)
+        return {page: result.get(page, "") for page in range(first, last + 1)}
+
+    try:
+        missing = [p for p in range(1, total + 1) if p not in pages]
+        futures = [(r, pool.submit(run, *r)) for r in _ranges(missing, max(1, pages_per_task))]
+        for (first, last), future in futures:
+            try:
+                pages.update(future.result())
+            except Exception as e:
+                print(f"PDF pages {first}-{last} of {path} failed: {e}")
+                failed.extend(range(first, last + 1))
+        # Retry failed ranges page by page, so one bad page does not take its neighbours with it.
+        for _ in range(max(0, retries)):
+            if not failed:
+                break
+            futures = [(p, pool.submit(run, p, p)) for p in failed]
+            failed = []
+            for page, future in futures:
+                try:
+                    pages.update(future.result())
+                except Exception:
+                    traceback.print_exc()
+                    failed.append(page)
+        progress.update(entry, failed=failed)
+    finally:
+        progress.finish(entry)
+    if len(failed) == total:
+        raise RuntimeError(f"All {total} pages of {path} failed to convert")
+    summary = {"pages": total, "cachedPages": entry["cached"], "convertedPages": entry["converted"],
+               "failedPages": failed}
+    markdown = "\n\n".join(pages[p] for p in sorted(pages) if pages[p].strip())
+    return markdown, summary
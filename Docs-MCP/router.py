@@ -0,0 +1,101 @@
+"""
+router.py - Rule-based fast path for catalogue questions
+
+Questions like "list projects", "what's in project X" or "show detailed stats
+for Y" map to one MCP tool whose output is the answer, so they do not need the
+LLM. classify() matches a query against a small set of intent patterns and
+returns the tool to call with its arguments and a confidence; callers route
+the query directly when the confidence clears their threshold and send
+everything else to the agent.
+
+Confidence is the rule's base confidence scaled by how much of the query the
+pattern covers, so "list projects" routes while "list projects that use react"
+falls back to the agent.
+"""
+
+import re
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+
+class Route(NamedTuple):
+    intent: str
+    tool: str
+    args: Dict[str, Any]
+    confidence: float
+
+
+# A project/library name, optionally quoted
+_NAME = r"[\"'`]?(?P<{0}>[\w.@/-]+)[\"'`]?"
+_LIST = r"(?:list|show|display|get|give me)(?:\s+me)?(?:\s+all)?(?:\s+the)?(?:\s+(?:indexed|available))?"
+
+
+def _scoped(match: "re.Match") -> Dict[str, Any]:
+    name = match.groupdict().get("name")
+    if not name:
+        return {}
+    return {"library" if (match.groupdict().get("kind") or "").lower() == "library" else "project": name}
+
+
+def _project(match: "re.Match") -> Dict[str, Any]:
+    return {"project": match.group("name")} if match.groupdict().get("name") else {}
+
+
+def _none(match: "re.Match") -> Dict[str, Any]:
+    return {}
+
+
+# (intent, tool, pattern, argument builder, base confidence); an intent may have several rules
+RULES: List[Tuple[str, str, "re.Pattern", Callable[["re.Match"], Dict[str, Any]], float]] = [
+    ("list_projects", "list_projects", re.compile(
+        rf"{_LIST}\s+projects|(?:what|which)\s+projects\s+(?:are\s+there|do\s+(?:i|we)\s+have|exist|are\s+indexed)",
+        re.IGNORECASE), _none, 0.95),
+    ("check_project", "check_project", re.compile(
+        r"(?:what'?s|what\s+is)\s+in(?:\s+the)?\s+project\s+" + _NAME.format("name"), re.IGNORECASE),
+     _project, 0.95),
+    ("check_project", "check_project", re.compile(
+        r"(?:check|describe|inspect|show(?:\s+me)?)(?:\s+the)?\s+project\s+" + _NAME.format("name"),
+        re.IGNORECASE), _project, 0.95),
+    ("check_project", "check_project", re.compile(
+        r"does(?:\s+the)?\s+project\s+" + _NAME.format("name") + r"\s+exist", re.IGNORECASE),
+     _project, 0.95),
+    ("list_libraries", "list_libraries", re.compile(
+        rf"(?:{_LIST}|(?:what|which))\s+libraries(?:\s+(?:are\s+)?(?:there|indexed))?"
+        r"(?:\s+(?:in|for)(?:\s+the)?(?:\s+project)?\s+" + _NAME.format("name") + r")?",
+        re.IGNORECASE), _project, 0.95),
+    ("embedding_stats", "embedding_stats", re.compile(
+        rf"(?:{_LIST}\s+)?(?:the\s+)?embedding\s+(?:stats|statistics|metrics)", re.IGNORECASE), _none, 0.95),
+    ("detailed_stats", "detailed_stats", re.compile(
+        rf"(?:{_LIST}\s+)?(?:the\s+)?(?:detailed\s+)?(?:stats|statistics)"
+        r"(?:\s+(?:for|of)(?:\s+the)?(?:\s+(?P<kind>project|library))?\s+" + _NAME.format("name") + r")?",
+        re.IGNORECASE), _scoped, 0.95),
+    ("list_watches", "list_watches", re.compile(
+        rf"{_LIST}\s+(?:folder\s+)?watch(?:es|ers)|(?:what|which)\s+folders\s+are\s+(?:being\s+)?watched",
+        re.IGNORECASE), _none, 0.95),
+    ("reembed_status", "reembed_status", re.compile(
+        rf"(?:{_LIST}\s+)?(?:the\s+)?re-?embed(?:ding)?\s+(?:status|progress)", re.IGNORECASE), _none, 0.95),
+    ("extraction_progress", "extraction_progress", re.compile(
+        rf"(?:{_LIST}\s+)?(?:the\s+)?(?:pdf\s+)?extraction\s+(?:progress|status)", re.IGNORECASE), _none, 0.95),
+]
+
+
+def _normalize(query: str) -> str:
+    text = " ".join(query.split()).strip(" ?.!")
+    text = re.sub(r"^(?:please|can you|could you)\s+|\s+please$", "", text, flags=re.IGNORECASE)
+    return text.strip(" ?.!")
+
+
+def classify(query: str) -> Optional[Route]:
+    """Best matching catalogue intent for `query`, or None if no rule matches."""
+    text = _normalize(query)
+    if not text:
+        return None
+    best: Optional[Route] = None
+    for intent, tool, pattern, build, base in RULES:
+        match = pattern.search(text)
+        if not match or not match.group(0):
+            continue
+        coverage = len(match.group(0)) / len(text)
+        confidence = round(base * coverage, 3)
+        if best is None or confidence > best.confidence:
+            best = Route(intent, tool, build(match), confidence)
+    return best
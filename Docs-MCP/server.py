@@ -3,19 +3,40 @@ import os
 import re
 import json
 import uuid
-import requests
-from typing import Optional, List, Dict, Any, Tuple
+import asyncio
+import contextlib
+import hashlib
+import time
+import fnmatch
+import functools
+import tempfile
+import threading
+import httpx
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, List, Dict, Any, Iterator, Tuple
 from urllib.parse import urljoin, urlparse
-from collections import deque
 import mimetypes
 from docling.document_converter import DocumentConverter
 
 
 from langchain_huggingface.embeddings import HuggingFaceEmbeddings
-from langchain_postgres import PGVector
 
 from dotenv import load_dotenv
 
+from archive import PageArchive
+from checkpoint import CrawlCheckpoint
+from chunking import chunk_spans, section_spans
+from corpus import SHARED_PROJECT, CorpusRegistry
+from dedup import BoilerplateFilter, NearDuplicateIndex
+from embedding import EmbeddingScheduler
+from gitrepo import GitError, GitRepo
+from watch import FolderWatch, FolderWatcher
+from pdfpages import ExtractionProgress, PageCache, convert_pdf
+from migration import (ACTIVE_PHASES, DualWriteStore, ReembedMigration, drop_index, index_slug, read_json,
+                       write_json)
+from snapshot import export_snapshot, import_snapshot
+from store import LocalVectorStore, PGVectorStore, VectorStore
+
 load_dotenv()
 
 # Optional HTML → Markdown
@@ -37,7 +58,14 @@ except Exception:
 # ---- Server ----
 mcp = FastMCP("Docs-MCP")
 
-# ---- PGVector config ----
+# ---- Storage config ----
+# DOCS_MCP_STORE selects the vector backend: "pgvector" (default) or "local"
+STORE_BACKEND = os.getenv("DOCS_MCP_STORE") or "pgvector"
+LOCAL_STORE_PATH = os.getenv("DOCS_MCP_LOCAL_PATH") or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "docs_mcp_data")
+LOCAL_STORE_INDEX = os.getenv("DOCS_MCP_LOCAL_INDEX") or "flat"
+LOCAL_STORE_NPROBE = int(os.getenv("DOCS_MCP_LOCAL_NPROBE") or 8)
+
 PG_USER = os.getenv("POSTGRES_USER")
 PG_PASSWORD = os.getenv("POSTGRES_PASSWORD")
 PG_HOST = os.getenv("POSTGRES_HOST", "localhost")
@@ -46,34 +74,262 @@ PG_PORT = os.getenv("POSTGRES_PORT", "5432")
 PG_COLLECTION = os.getenv("PG_COLLECTION", "docs_mcp")
 EMBED_MODEL = os.getenv("EMBED_MODEL", "BAAI/bge-small-en")
 
-if not all([PG_USER, PG_PASSWORD, PG_HOST, PG_DB]):
-    raise RuntimeError("Missing required Postgres env vars")
-
-PG_CONN = f"postgresql+psycopg://{PG_USER}:{PG_PASSWORD}@{PG_HOST}:{PG_PORT}/{PG_DB}"
+# ---- Chunking config ----
+# "fixed": 1200-char windows with 400-char overlap; "cdc": content-defined boundaries;
+# "small2big": small non-overlapping passages are embedded and search returns their heading section
+CHUNK_MODE = os.getenv("DOCS_MCP_CHUNKER") or "fixed"
+# small2big sizes: embedded passage length and maximum returned section length
+CHILD_CHUNK_CHARS = int(os.getenv("DOCS_MCP_CHILD_CHARS") or 400)
+PARENT_SECTION_CHARS = int(os.getenv("DOCS_MCP_PARENT_CHARS") or 4000)
+
+# ---- Ingestion config ----
+# Boilerplate removal on crawled HTML pages and SimHash near-duplicate skipping (set to 0 to disable)
+DEDUP_ENABLED = (os.getenv("DOCS_MCP_DEDUP") or "1") != "0"
+# Also strip boilerplate from file://, git and watched-folder sources (off by default: lines repeated
+# across code or markdown files, like `return None` or table separators, are real content)
+DEDUP_LOCAL_BOILERPLATE = (os.getenv("DOCS_MCP_DEDUP_LOCAL") or "0") == "1"
+# Pages buffered per crawl before boilerplate statistics are trusted
+DEDUP_WARMUP_PAGES = int(os.getenv("DOCS_MCP_DEDUP_WARMUP") or 8)
+
+# Local state (crawl checkpoints etc.)
+STATE_DIR = os.getenv("DOCS_MCP_STATE_DIR") or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "docs_mcp_data", "state")
+# Web crawls checkpoint their frontier every N indexed pages
+CHECKPOINT_EVERY = int(os.getenv("DOCS_MCP_CHECKPOINT_EVERY") or 25)
+# Optional archive of raw fetched responses for reindex_from_archive (set to 1 to enable)
+ARCHIVE_ENABLED = (os.getenv("DOCS_MCP_ARCHIVE") or "0") == "1"
+ARCHIVE_DIR = os.getenv("DOCS_MCP_ARCHIVE_DIR") or os.path.join(STATE_DIR, "archive")
+# Default location of export_library snapshots
+SNAPSHOT_DIR = os.getenv("DOCS_MCP_SNAPSHOT_DIR") or os.path.join(STATE_DIR, "snapshots")
+
+# ---- Fetch limits ----
+# Responses are streamed and abandoned once they exceed these sizes
+MAX_FETCH_BYTES = int(os.getenv("DOCS_MCP_MAX_FETCH_BYTES") or 10 * 1024 * 1024)
+MAX_DOCUMENT_BYTES = int(os.getenv("DOCS_MCP_MAX_DOCUMENT_BYTES") or 100 * 1024 * 1024)
+
+# ---- Concurrency ----
+# Tools are async; embedding, Docling/HTML conversion and store writes run on this many worker threads
+CPU_WORKERS = int(os.getenv("DOCS_MCP_CPU_WORKERS") or min(4, os.cpu_count() or 1))
+# Size of the async Postgres connection pool used by search and stats tools
+PG_POOL_SIZE = int(os.getenv("DOCS_MCP_PG_POOL_SIZE") or 10)
+# Concurrent embedding requests are coalesced into batches of up to EMBED_MAX_BATCH texts,
+# waiting at most EMBED_MAX_LATENCY_MS for a batch to fill.
+EMBED_MAX_BATCH = int(os.getenv("DOCS_MCP_EMBED_MAX_BATCH") or 32)
+EMBED_MAX_LATENCY_MS = float(os.getenv("DOCS_MCP_EMBED_MAX_LATENCY_MS") or 5)
+# Query embeddings always run before ingestion. Ingestion may use at most INGEST_SHARE of the
+# model's time while work is queued and at most INGEST_CONNECTIONS concurrent store writers (0 = unlimited).
+INGEST_SHARE = float(os.getenv("DOCS_MCP_INGEST_SHARE") or 1.0)
+INGEST_CONNECTIONS = int(os.getenv("DOCS_MCP_INGEST_CONNECTIONS") or 2)
+# PDFs are converted in ranges of PDF_PAGES_PER_TASK pages on PDF_WORKERS threads;
+# converted pages are cached by document hash + page number
+PDF_WORKERS = int(os.getenv("DOCS_MCP_PDF_WORKERS") or 2)
+PDF_PAGES_PER_TASK = int(os.getenv("DOCS_MCP_PDF_PAGES_PER_TASK") or 4)
+PDF_RETRIES = int(os.getenv("DOCS_MCP_PDF_RETRIES") or 1)
+PDF_CACHE_DIR = os.getenv("DOCS_MCP_PDF_CACHE_DIR") or os.path.join(STATE_DIR, "pdf_pages")
+
+PG_DSN = f"postgresql://{PG_USER}:{PG_PASSWORD}@{PG_HOST}:{PG_PORT}/{PG_DB}"
+
+# ---- Re-embed migrations ----
+# Model and storage location of the index currently served; written at cutover by cutover_reembed
+ACTIVE_INDEX_PATH = os.path.join(STATE_DIR, "active_index.json")
+REEMBED_STATE_PATH = os.path.join(STATE_DIR, "reembed.json")
+_active_index: Dict[str, Any] = read_json(ACTIVE_INDEX_PATH) or {}
+EMBED_MODEL = _active_index.get("model") or EMBED_MODEL
 
 # ---- Embeddings & VectorStore ----
-_embeddings = HuggingFaceEmbeddings(
-    model_name=EMBED_MODEL,
-    model_kwargs={"device": "cpu"},
-    encode_kwargs={"normalize_embeddings": True},
-)
-
-_vector = PGVector(
-    embeddings=_embeddings,
-    collection_name=PG_COLLECTION,
-    connection=PG_CONN,
-    use_jsonb=True,
-)
+
+
+def _make_embedder(model: str) -> EmbeddingScheduler:
+    embeddings = HuggingFaceEmbeddings(
+        model_name=model,
+        model_kwargs={"device": "cpu"},
+        encode_kwargs={"normalize_embeddings": True},
+    )
+    return EmbeddingScheduler(embeddings, max_batch=EMBED_MAX_BATCH, max_latency=EMBED_MAX_LATENCY_MS / 1000,
+                              ingest_share=INGEST_SHARE, ingest_connections=INGEST_CONNECTIONS)
+
+
+_embedder = _make_embedder(EMBED_MODEL)
+
+
+def create_store(backend: str, embedder: Optional[EmbeddingScheduler] = None,
+                 index: Optional[Dict[str, Any]] = None) -> VectorStore:
+    """Open a store; `index` (collection / localPath) defaults to the active index."""
+    embedder = embedder or _embedder
+    index = _active_index if index is None else index
+    if backend == "pgvector":
+        if not all([PG_USER, PG_PASSWORD, PG_HOST, PG_DB]):
+            raise RuntimeError("Missing required Postgres env vars")
+        return PGVectorStore(embedder, index.get("collection") or PG_COLLECTION, PG_DSN, pool_size=PG_POOL_SIZE)
+    if backend == "local":
+        return LocalVectorStore(embedder, index.get("localPath") or LOCAL_STORE_PATH,
+                                index=LOCAL_STORE_INDEX, nprobe=LOCAL_STORE_NPROBE)
+    raise RuntimeError(f"Unknown DOCS_MCP_STORE backend: {backend}")
+
+
+_store = create_store(STORE_BACKEND)
+_migration: Optional[ReembedMigration] = None
+_archive = PageArchive(ARCHIVE_DIR) if ARCHIVE_ENABLED else None
+# Which projects reference which shared corpora
+_corpora = CorpusRegistry(os.path.join(STATE_DIR, "corpora.json"))
+_cpu_pool = ThreadPoolExecutor(max_workers=CPU_WORKERS, thread_name_prefix="docs-mcp-cpu")
+_http: Optional[httpx.AsyncClient] = None
+_pdf_pool = ThreadPoolExecutor(max_workers=PDF_WORKERS, thread_name_prefix="docs-mcp-pdf")
+_pdf_cache = PageCache(PDF_CACHE_DIR)
+_pdf_progress = ExtractionProgress()
+_docling = threading.local()
+
+
+async def _run_cpu(fn, *args, **kwargs):
+    """Run blocking work (embedding, conversion, store writes) off the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_cpu_pool, functools.partial(fn, *args, **kwargs))
+
+
+def _http_client() -> httpx.AsyncClient:
+    global _http
+    if _http is None or _http.is_closed:
+        _http = httpx.AsyncClient(headers={"User-Agent": "Docs-MCP/1.0"},
+                                  limits=httpx.Limits(max_connections=20, max_keepalive_connections=10))
+    return _http
 
 # ---- Helpers ----
 
 
-def extract_text_with_docling(source_path: str) -> str:
-    converter = DocumentConverter()
-    doc = converter.convert(source_path).document
+def _docling_converter() -> DocumentConverter:
+    """One converter per thread; building one loads Docling's models."""
+    converter = getattr(_docling, "converter", None)
+    if converter is None:
+        converter = _docling.converter = DocumentConverter()
+    return converter
+
+
+def _docling_pages(source_path: str, first: int, last: int) -> Dict[int, str]:
+    doc = _docling_converter().convert(source_path, page_range=(first, last)).document
+    return {page: doc.export_to_markdown(page_no=page) for page in range(first, last + 1)}
+
+
+def extract_text_with_docling(source_path: str, label: Optional[str] = None) -> str:
+    if source_path.lower().endswith(".pdf"):
+        try:
+            markdown, summary = convert_pdf(source_path, _docling_pages, _pdf_pool, _pdf_cache, _pdf_progress,
+                                            PDF_PAGES_PER_TASK, PDF_RETRIES, label)
+        except ValueError:
+            pass  # page count unavailable: convert the whole document
+        else:
+            if summary["failedPages"]:
+                print(f"Skipped {len(summary['failedPages'])} unconvertible pages of {label or source_path}: "
+                      f"{summary['failedPages']}")
+            return markdown
+    doc = _docling_converter().convert(source_path).document
     return doc.export_to_markdown()
 
 
+DOCLING_EXTS = [".pdf", ".docx", ".pptx"]
+
+
+def _read_local(fpath: str) -> str:
+    ext = os.path.splitext(fpath)[1].lower()
+    if ext in DOCLING_EXTS:
+        return extract_text_with_docling(fpath)
+    with open(fpath, "r", encoding="utf-8", errors="ignore") as f:
+        return f.read()
+
+
+def _document_bytes_to_markdown(data: bytes, url: str) -> str:
+    """Run Docling on an in-memory PDF/DOCX/PPTX."""
+    suffix = os.path.splitext(urlparse(url).path)[1].lower() or ".pdf"
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, f"document{suffix}")
+        with open(path, "wb") as f:
+            f.write(data)
+        return extract_text_with_docling(path, url)
+
+
+_DOCUMENT_MIME_HINTS = ("application/pdf", "officedocument", "msword", "ms-powerpoint")
+_TEXT_MIMES = ("application/json", "application/xml", "application/x-yaml", "application/yaml")
+
+
+def _sniff_kind(content_type: str, head: bytes, url: str) -> str:
+    """Classify a response as 'html', 'document' (Docling), 'text' or 'other' from headers and first bytes."""
+    ctype = content_type.split(";")[0].strip().lower()
+    ext = os.path.splitext(urlparse(url).path)[1].lower()
+    if head.startswith(b"%PDF-"):
+        return "document"
+    # DOCX/PPTX are zip containers
+    if head.startswith(b"PK\x03\x04") and (ext in (".docx", ".pptx") or "officedocument" in ctype):
+        return "document"
+    if any(h in ctype for h in _DOCUMENT_MIME_HINTS):
+        return "document"
+    start = head[:1024].lstrip().lower()
+    if "html" in ctype or start.startswith(b"<!doctype html") or start.startswith(b"<html"):
+        return "html"
+    if ctype.startswith("text/") or ctype in _TEXT_MIMES:
+        return "text"
+    if not ctype and head and b"\x00" not in head[:1024]:
+        return "text"
+    return "other"
+
+
+async def _fetch(url: str, follow_redirects: bool = True, kinds: Tuple[str, ...] = ("html",),
+                 timeout: Tuple[int, int] = (10, 20)) -> Dict[str, Any]:
+    """Stream a URL, stopping early for unwanted kinds and oversized bodies.
+
+    Returns a dict with status, url (after redirects), mime, kind, body and
+    truncated. body is None unless the response is a 200 of one of `kinds` that
+    fits the size cap; HTML and text over the cap are kept truncated, documents
+    over the cap are dropped.
+    """
+    connect, read = timeout
+    async with _http_client().stream("GET", url, follow_redirects=follow_redirects,
+                                     timeout=httpx.Timeout(read, connect=connect)) as resp:
+        mime = resp.headers.get("Content-Type", "")
+        final_url = str(resp.url)
+        result: Dict[str, Any] = {"status": resp.status_code, "url": final_url, "mime": mime,
+                                  "kind": None, "body": None, "truncated": False}
+        if resp.status_code != 200:
+            return result
+        chunks = resp.aiter_bytes(64 * 1024)
+        head = await anext(chunks, b"")
+        kind = _sniff_kind(mime, head, final_url)
+        result["kind"] = kind
+        if kind not in kinds:
+            return result
+
+        limit = MAX_DOCUMENT_BYTES if kind == "document" else MAX_FETCH_BYTES
+        declared = resp.headers.get("Content-Length")
+        if kind == "document" and declared and declared.isdigit() and int(declared) > limit:
+            result["truncated"] = True
+            return result
+        body = bytearray(head)
+        if len(body) <= limit:
+            async for chunk in chunks:
+                body.extend(chunk)
+                if len(body) > limit:
+                    break
+        result["truncated"] = len(body) > limit
+        if result["truncated"]:
+            if kind == "document":
+                return result
+            del body[limit:]
+        result["body"] = bytes(body)
+        return result
+
+
+def _decode(body: bytes, mime: str) -> str:
+    charset = re.search(r"charset=([\w-]+)", mime or "")
+    if charset:
+        name = charset.group(1)
+    else:
+        meta = re.search(rb"<meta[^>]+charset=[\"']?([\w-]+)", body[:2048], re.I)
+        name = meta.group(1).decode("ascii") if meta else "utf-8"
+    try:
+        return body.decode(name, errors="replace")
+    except LookupError:
+        # Unknown charset name in the header or <meta>
+        return body.decode("utf-8", errors="replace")
+
+
 def _html_to_markdown(html: str) -> Tuple[str, str]:
     """Convert HTML to clean, readable markdown using readability extraction."""
     if not html:
@@ -254,92 +510,223 @@ def _match_target_version(available: List[str], target: Optional[str]) -> Option
     return None
 
 
-def _chunk_markdown(text: str, chunk_size: int = 1200, overlap: int = 400) -> List[str]:
-    chunks: List[str] = []
-    i = 0
-    n = len(text)
-    while i < n:
-        end = min(i + chunk_size, n)
-        chunk = text[i:end]
-        chunks.append(chunk)
-        if end == n:
-            break
-        i = end - overlap
-        if i < 0:
-            i = 0
-    return chunks
-
-
-def _add_documents(docs: List[Tuple[str, Dict[str, Any]]]) -> int:
+def _chunk_spans(text: str) -> List[Tuple[int, int]]:
+    """(start, end) offsets of each chunk of text, using the configured chunking mode."""
+    return chunk_spans(text, CHUNK_MODE, child_size=CHILD_CHUNK_CHARS, section_size=PARENT_SECTION_CHARS)
+
+
+async def _expand_to_sections(results: List[Tuple[Any, float]]) -> List[Tuple[Any, float]]:
+    """Replace small2big passages by their heading section, keeping each section once at its best rank."""
+    wanted: Dict[str, set] = {}
+    for doc, _ in results:
+        if doc.metadata.get("parent") == "section":
+            wanted.setdefault(str(doc.metadata["project"]), set()).add(doc.metadata["page_id"])
+    if not wanted:
+        return results
+    pages: Dict[Tuple[str, str], str] = {}
+    for project, ids in wanted.items():
+        for page_id, content in (await _store.aget_pages(project, sorted(ids))).items():
+            pages[(project, page_id)] = content
+    sections: Dict[Tuple[str, str], List[Tuple[int, int]]] = {}
+    out: List[Tuple[Any, float]] = []
+    seen = set()
+    for doc, distance in results:
+        meta = doc.metadata
+        key = (str(meta.get("project")), meta.get("page_id"))
+        page = pages.get(key) if meta.get("parent") == "section" else None
+        if page is None:
+            out.append((doc, distance))
+            continue
+        if key not in sections:
+            sections[key] = section_spans(page, PARENT_SECTION_CHARS)
+        start = int(meta["start"])
+        span = next(((a, b) for a, b in sections[key] if a <= start < b), (start, int(meta["end"])))
+        if (key, span) in seen:
+            continue
+        seen.add((key, span))
+        doc.page_content = page[span[0]:span[1]]
+        doc.metadata = {**meta, "section_start": span[0], "section_end": span[1]}
+        out.append((doc, distance))
+    return out
+
+
+async def _search_sections(query: str, limit: int, filters: List[Dict[str, Any]]) -> List[Tuple[Any, float]]:
+    """Top `limit` results; with small2big, extra passages are fetched since several may share a section."""
+    k = max(1, int(limit))
+    fetch = k * 3 if CHUNK_MODE == "small2big" else k
+    return (await _expand_to_sections(await _store.asearch_any(query, fetch, filters)))[:k]
+
+
+def _chunk_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def _add_documents(store: VectorStore, docs: List[Tuple[str, Dict[str, Any]]]) -> int:
     if not docs:
         return 0
     texts = [d[0] for d in docs]
     metadatas = [d[1] for d in docs]
-    _vector.add_texts(texts=texts, metadatas=metadatas)
-    return len(texts)
-
-
-def _delete_documents_by_metadata(filters: Dict[str, Any]) -> int:
-    import psycopg
-    where_clauses = []
-    params: List[Any] = []
-    for k, v in filters.items():
-        where_clauses.append(f"(cmetadata ->> %s) = %s")
-        params.extend([k, str(v)])
-    where = " AND ".join(where_clauses) if where_clauses else "TRUE"
-    sql = f"DELETE FROM langchain_pg_embedding WHERE {where} AND collection_id = (SELECT uuid FROM langchain_pg_collection WHERE name = %s)"
-    params.append(PG_COLLECTION)
-    with psycopg.connect(f"postgresql://{PG_USER}:{PG_PASSWORD}@{PG_HOST}:{PG_PORT}/{PG_DB}") as conn:
-        with conn.cursor() as cur:
-            cur.execute(sql, params)
-            deleted = cur.rowcount or 0
-    return deleted
+    # Embed outside the connection slot so waiting on the model does not hold one.
+    vectors = store.embeddings.embed_documents(texts)
+    with store.embeddings.connection("ingest"):
+        return store.add_embeddings(texts, vectors, metadatas)
+
+
+def _page_id(base_meta: Dict[str, Any], url: str) -> str:
+    key = "\0".join(str(base_meta[f]) for f in ("project", "library", "version", "content_type")) + "\0" + url
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+@contextlib.contextmanager
+def _writable_store() -> Iterator[VectorStore]:
+    """The active store, with a re-embed cutover held off until the block exits."""
+    while True:
+        store = _store
+        with store.hold_writes():
+            # A cutover may have switched stores while this thread waited for the gate.
+            if store is _store:
+                yield store
+                return
+
+
+def _index_page(base_meta: Dict[str, Any], url: str, content: str,
+                near_dups: Optional[NearDuplicateIndex] = None) -> Tuple[int, int]:
+    """Index one page's content, reusing stored chunks whose text is unchanged.
+
+    The page markdown is stored once in the page store; chunk rows only carry
+    (page_id, start, end) and their embedding. Existing rows for the same page are
+    matched by chunk_hash: unchanged chunks only get their offsets updated, new
+    chunk texts are embedded and rows for chunks that disappeared are deleted, so
+    re-indexing an edited page costs in proportion to the edit. Chunks that
+    near_dups has already seen are not indexed. Returns (embedded, reused).
+    """
+    project = base_meta["project"]
+    page_filter = {**base_meta, "url": url}
+    page_id = _page_id(base_meta, url)
+    # All of the page's reads and writes go to one index: a re-embed cutover waits for them.
+    with _writable_store() as store:
+        embedder = store.embeddings
+        with embedder.connection("ingest"):
+            existing = store.chunk_hashes(page_filter)
+
+        docs: List[Tuple[str, Dict[str, Any]]] = []
+        moved: Dict[str, Tuple[int, int]] = {}
+        for start, end in _chunk_spans(content):
+            chunk = content[start:end]
+            if not chunk.strip():
+                continue
+            if near_dups is not None and near_dups.seen(chunk):
+                continue
+            digest = _chunk_hash(chunk)
+            if existing.get(digest):
+                moved[existing[digest].pop()] = (start, end)
+                continue
+            meta = {**page_filter, "chunk_hash": digest, "page_id": page_id, "start": start, "end": end}
+            if CHUNK_MODE == "small2big":
+                meta["parent"] = "section"
+            docs.append((chunk, meta))
+
+        stale = [cid for ids in existing.values() for cid in ids]
+        with embedder.connection("ingest"):
+            if stale:
+                store.delete_ids(project, stale)
+            if not docs and not moved:
+                store.delete_pages(page_filter)
+                return 0, 0
+            store.put_page(page_filter, page_id, content)
+            if moved:
+                store.update_offsets(project, moved)
+        return _add_documents(store, docs), len(moved)
+
+
+class _IngestPipeline:
+    """Per-call ingestion state for scrape_docs: dedup stages and counters.
+
+    With dedup enabled, the first DEDUP_WARMUP_PAGES pages are buffered so that
+    per-site boilerplate lines can be learned before anything is indexed; later
+    pages are learned from and cleaned as they arrive. Only pages added with
+    boilerplate=True (crawled HTML) go through the boilerplate stage. If `failed`
+    is given, a page that fails to index is recorded there by url instead of
+    raising.
+    """
+
+    def __init__(self, base_meta: Dict[str, Any], dedup: bool = DEDUP_ENABLED,
+                 failed: Optional[Dict[str, str]] = None):
+        self.base_meta = base_meta
+        self.failed = failed
+        self.boilerplate = BoilerplateFilter() if dedup else None
+        self.near_dups = NearDuplicateIndex() if dedup else None
+        self._pending: List[Tuple[str, str, str, bool]] = []
+        self._warm = not dedup
+        self.pages = 0
+        self.added = 0
+        self.reused = 0
+
+    def add(self, site: str, url: str, content: str, boilerplate: bool = False) -> None:
+        self.pages += 1
+        if boilerplate and self.boilerplate is not None:
+            self.boilerplate.observe(site, content)
+        if not self._warm:
+            self._pending.append((site, url, content, boilerplate))
+            if len(self._pending) >= DEDUP_WARMUP_PAGES:
+                self.flush()
+            return
+        self._index(site, url, content, boilerplate)
+
+    def flush(self) -> None:
+        pending, self._pending = self._pending, []
+        self._warm = True
+        for site, url, content, boilerplate in pending:
+            self._index(site, url, content, boilerplate)
+
+    def _index(self, site: str, url: str, content: str, boilerplate: bool) -> None:
+        if boilerplate and self.boilerplate is not None:
+            content = self.boilerplate.clean(site, content)
+        try:
+            added, reused = _index_page(self.base_meta, url, content, self.near_dups)
+        except Exception as e:
+            if self.failed is None:
+                raise
+            print(f"Failed to index {url}: {e}")
+            self.failed[url] = str(e)
+            return
+        self.added += added
+        self.reused += reused
+
+    def summary(self, message: str) -> Dict[str, Any]:
+        self.flush()
+        total = self.added + self.reused
+        return {
+            "pagesScraped": self.pages,
+            "chunksIndexed": total,
+            "chunksEmbedded": self.added,
+            "chunksReused": self.reused,
+            "boilerplateLinesRemoved": self.boilerplate.removed if self.boilerplate else 0,
+            "nearDuplicateChunksSkipped": self.near_dups.skipped if self.near_dups else 0,
+            "message": message.replace("{chunks}", str(total)),
+        }
+
+
+async def _delete_documents_by_metadata(filters: Dict[str, Any]) -> int:
+    return await _store.adelete(filters)
 
 
-def _distinct_values(field: str, extra: Optional[Dict[str, Any]] = None) -> List[str]:
-    import psycopg
-    clauses = [
-        "collection_id = (SELECT uuid FROM langchain_pg_collection WHERE name = %s)"]
-    params: List[Any] = [PG_COLLECTION]
-    if extra:
-        for k, v in extra.items():
-            clauses.append("(cmetadata ->> %s) = %s")
-            params.extend([k, str(v)])
-    sql = f"SELECT DISTINCT cmetadata ->> %s AS v FROM langchain_pg_embedding WHERE {' AND '.join(clauses)}"
-    params.insert(0, field)  # Insert field at the beginning
-    with psycopg.connect(f"postgresql://{PG_USER}:{PG_PASSWORD}@{PG_HOST}:{PG_PORT}/{PG_DB}") as conn:
-        with conn.cursor() as cur:
-            cur.execute(sql, params)
-            rows = cur.fetchall()
-    return [r[0] for r in rows if r and r[0]]
-
-
-def _get_project_stats() -> List[Dict[str, Any]]:
+async def _distinct_values(field: str, extra: Optional[Dict[str, Any]] = None) -> List[str]:
+    return await _store.adistinct_values(field, extra)
+
+
+async def _get_project_stats() -> List[Dict[str, Any]]:
     """Get project statistics with libraries grouped by project"""
-    import psycopg
-    sql = """
-    SELECT 
-        cmetadata ->> 'project' as project,
-        cmetadata ->> 'library' as library,
-        cmetadata ->> 'version' as version,
-        COUNT(*) as document_count,
-        COUNT(DISTINCT cmetadata ->> 'url') as unique_url_count
-    FROM langchain_pg_embedding 
-    WHERE collection_id = (SELECT uuid FROM langchain_pg_collection WHERE name = %s)
-    AND cmetadata ->> 'project' IS NOT NULL
-    AND cmetadata ->> 'library' IS NOT NULL
-    GROUP BY cmetadata ->> 'project', cmetadata ->> 'library', cmetadata ->> 'version'
-    ORDER BY project, library, version
-    """
-    with psycopg.connect(f"postgresql://{PG_USER}:{PG_PASSWORD}@{PG_HOST}:{PG_PORT}/{PG_DB}") as conn:
-        with conn.cursor() as cur:
-            cur.execute(sql, [PG_COLLECTION])
-            rows = cur.fetchall()
+    rows = await _store.aproject_stats()
 
     # Group by project, then by library
     projects = {}
+    shared = {}
     for row in rows:
         project, library, version, doc_count, url_count = row
+        if project == SHARED_PROJECT:
+            shared[(library, version)] = (doc_count, url_count)
+            continue
         if project not in projects:
             projects[project] = {}
         if library not in projects[project]:
@@ -351,14 +738,271 @@ def _get_project_stats() -> List[Dict[str, Any]]:
             "status": "completed"
         })
 
+    # Shared corpora count towards every project attached to them
+    for corpus in _corpora.attached():
+        doc_count, url_count = shared.get((corpus["library"], corpus["version"]), (0, 0))
+        for project in corpus["projects"]:
+            projects.setdefault(project, {}).setdefault(corpus["library"], []).append({
+                "version": corpus["version"],
+                "documentCount": doc_count,
+                "uniqueUrlCount": url_count,
+                "status": "shared"
+            })
+
     return [{"name": proj, "libraries": libs} for proj, libs in projects.items()]
 
 
+def _search_filters(project: str, library: str, version: str, content_type: str) -> List[Dict[str, Any]]:
+    """Store filters for a project's library: its own chunks plus any attached shared corpora."""
+    own: Dict[str, Any] = {"project": project, "content_type": content_type, "library": library}
+    if version:
+        own["version"] = version
+    shared = [{"project": SHARED_PROJECT, "content_type": content_type, "library": library,
+               "version": corpus["version"]}
+              for corpus in _corpora.attached(project, library, version or None, content_type)]
+    return [own] + shared
+
+
+async def _reclaim_corpora(corpora: List[Dict[str, Any]]) -> int:
+    """Delete shared corpora that no project references any more."""
+    deleted = 0
+    for corpus in corpora:
+        deleted += await _store.adelete({"project": SHARED_PROJECT, "library": corpus["library"],
+                                         "version": corpus["version"], "content_type": corpus["content_type"]})
+    return deleted
+
+
+def _shadow_index(model: str) -> Dict[str, Any]:
+    slug = index_slug(model)
+    return {
+        "model": model,
+        "backend": STORE_BACKEND,
+        "collection": f"{PG_COLLECTION}@{slug}",
+        "localPath": os.path.join(LOCAL_STORE_PATH, "indexes", slug),
+    }
+
+
+def _activate_index(migration: ReembedMigration) -> None:
+    """Make a migration's shadow the served index (called with ingestion writes held)."""
+    global _store, _embedder, _active_index, EMBED_MODEL
+    state = migration.state
+    index = {
+        "model": state["model"],
+        "backend": state["backend"],
+        "collection": state["collection"],
+        "localPath": state["localPath"],
+        "activatedAt": time.time(),
+        "previous": {"model": EMBED_MODEL, "collection": _active_index.get("collection") or PG_COLLECTION,
+                     "localPath": _active_index.get("localPath") or LOCAL_STORE_PATH},
+    }
+    os.makedirs(STATE_DIR, exist_ok=True)
+    tmp = f"{ACTIVE_INDEX_PATH}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=2)
+    os.replace(tmp, ACTIVE_INDEX_PATH)
+    _active_index = index
+    _embedder = migration.target.embeddings
+    EMBED_MODEL = state["model"]
+    _store = migration.target
+
+
+def _open_migration(state: Dict[str, Any]) -> ReembedMigration:
+    """Open the shadow store for a migration and route ingestion writes to both indexes."""
+    global _store
+    shadow = create_store(state["backend"], _make_embedder(state["model"]), state)
+    dual = DualWriteStore(_store, shadow)
+    migration = ReembedMigration(REEMBED_STATE_PATH, dual, state, _activate_index)
+    _store = dual
+    return migration
+
+
+def _drop_previous_index(state: Dict[str, Any]) -> None:
+    try:
+        dropped = drop_index(create_store(state["backend"], index=_active_index.get("previous") or {}))
+        state["previousIndex"] = "dropped"
+        print(f"Dropped the replaced {state.get('fromModel')} index ({dropped} chunks)")
+    except Exception as e:
+        print(f"Dropping the replaced index failed: {e}")
+        state["previousIndex"] = f"drop failed: {e}"
+    state["updatedAt"] = time.time()
+    write_json(REEMBED_STATE_PATH, state)
+
+
+def _resume_migration() -> None:
+    """Continue a migration that was running when the server stopped."""
+    global _migration
+    state = read_json(REEMBED_STATE_PATH)
+    if not state or state.get("backend") != STORE_BACKEND:
+        return
+    if state.get("phase") == "done" and state.get("previousIndex") == "pending":
+        # The server stopped before the replaced index was dropped.
+        threading.Thread(target=_drop_previous_index, args=(state,), name="docs-mcp-drop-index", daemon=True).start()
+    if state.get("phase") not in ACTIVE_PHASES:
+        return
+    _migration = _open_migration(state)
+    # Writes made before the restart are not tracked, so re-check offsets everywhere at cutover.
+    _migration.dual.dirty.add("*")
+    _migration.start()
+    print(f"Resumed re-embed migration to {state['model']} ({state['phase']})")
+
+
+
+def _index_watched(watch: FolderWatch, changed: List[str], deleted: List[str]) -> Dict[str, Any]:
+    """Re-index changed files and remove deleted ones for a watched folder.
+
+    A file that cannot be read or indexed does not stop the others; it is reported
+    under "failed" and the watcher retries it later.
+    """
+    failed: Dict[str, str] = {}
+    pipeline = _IngestPipeline(dict(watch.meta), failed=failed)
+    removed = 0
+    # Files deleted between the scan and the read; the watcher drops them from its snapshot.
+    vanished = []
+    for fpath in changed:
+        try:
+            content = _read_local(fpath)
+        except FileNotFoundError:
+            vanished.append(fpath)
+            continue
+        except Exception as e:
+            print(f"Failed to read {fpath}: {e}")
+            failed[f"file://{fpath}"] = str(e)
+            continue
+        pipeline.add(watch.path, f"file://{fpath}", content, DEDUP_LOCAL_BOILERPLATE)
+    for fpath in deleted + vanished:
+        removed += _store.delete({**watch.meta, "url": f"file://{fpath}"})
+    summary = pipeline.summary("Re-indexed {chunks} chunks from "
+                               f"{len(changed) - len(vanished) - len(failed)} changed files in '{watch.path}'")
+    summary["filesRemoved"] = len(deleted) + len(vanished)
+    summary["chunksRemoved"] = removed
+    summary["vanished"] = vanished
+    summary["failed"] = {url[len("file://"):]: error for url, error in failed.items()}
+    return summary
+
+
+_watcher = FolderWatcher(STATE_DIR, _index_watched)
+
+
+def start_background_tasks() -> None:
+    """Resume an interrupted re-embed migration and start watching folders.
+
+    Called when the server starts rather than on import, so importing server.py
+    (e.g. from bench.py) does not touch migrations or watched folders.
+    """
+    _resume_migration()
+    _watcher.start()
+
+
+def _git_state_path(root: str, base_meta: Dict[str, Any], pathspec: List[str]) -> str:
+    key = "\0".join([root] + [str(base_meta[f]) for f in ("project", "library", "version", "content_type")] + pathspec)
+    return os.path.join(STATE_DIR, "git", hashlib.sha1(key.encode("utf-8")).hexdigest()[:16] + ".json")
+
+
+def _forget_git_state(meta: Dict[str, Any]) -> int:
+    """Delete the git index state of libraries matching `meta`, so the next scrape_git_repo indexes in full."""
+    directory = os.path.join(STATE_DIR, "git")
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return 0
+    removed = 0
+    for name in names:
+        if not name.endswith(".json"):
+            continue
+        path = os.path.join(directory, name)
+        state = read_json(path) or {}
+        if all(state.get("meta", {}).get(field) == value for field, value in meta.items()):
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                pass
+    return removed
+
+
+def _git_text(path: str, data: bytes) -> Optional[str]:
+    """Markdown/text for a file at a commit, or None for binaries and oversized files."""
+    if os.path.splitext(path)[1].lower() in DOCLING_EXTS:
+        return _document_bytes_to_markdown(data, path) if len(data) <= MAX_DOCUMENT_BYTES else None
+    if len(data) > MAX_FETCH_BYTES or b"\x00" in data[:8192]:
+        return None
+    return data.decode("utf-8", errors="ignore")
+
+
+def _ingest_git(repo: GitRepo, base_meta: Dict[str, Any], ref: str = "HEAD",
+                pathspec: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Index a git repository at `ref`, only touching files changed since the last indexed commit.
+
+    The indexed commit and file list are kept in <state>/git/. If that commit is
+    still in the repository, `git diff --name-status` between it and `ref` selects
+    the files to re-index or remove; otherwise every file at `ref` is indexed and
+    files no longer present are removed.
+    """
+    pathspec = list(pathspec or [])
+    state_path = _git_state_path(repo.root, base_meta, pathspec)
+    state = read_json(state_path) or {}
+    commit = repo.resolve(ref)
+    previous = state.get("commit")
+    indexed = set(state.get("files", []))
+    if previous == commit:
+        return {"pagesScraped": 0, "chunksIndexed": 0, "commit": commit, "previousCommit": previous,
+                "mode": "unchanged", "message": f"{repo.root} is already indexed at {commit[:12]}"}
+
+    if previous and repo.has_commit(previous):
+        mode = "incremental"
+        changed, deleted = repo.diff(previous, commit, pathspec)
+    else:
+        mode = "full"
+        changed = repo.files(commit, pathspec)
+        deleted = sorted(indexed - set(changed))
+
+    pipeline = _IngestPipeline(base_meta)
+    skipped = []
+    for path, data in repo.blobs(commit, changed):
+        text = _git_text(path, data)
+        if text is None:
+            skipped.append(path)
+            continue
+        pipeline.add(repo.root, f"file://{os.path.join(repo.root, path)}", text, DEDUP_LOCAL_BOILERPLATE)
+        indexed.add(path)
+    removed = 0
+    for path in deleted + skipped:
+        removed += _store.delete({**base_meta, "url": f"file://{os.path.join(repo.root, path)}"})
+        indexed.discard(path)
+
+    result = pipeline.summary(
+        f"Indexed {{chunks}} chunks from {pipeline.pages} files of {repo.root} at {commit[:12]} ({mode})")
+    result.update(commit=commit, previousCommit=previous, mode=mode, filesChanged=len(changed),
+                  filesDeleted=len(deleted), filesSkipped=len(skipped), chunksRemoved=removed)
+    os.makedirs(os.path.dirname(state_path), exist_ok=True)
+    tmp = f"{state_path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"repo": repo.root, "ref": ref, "pathspec": pathspec, "meta": base_meta, "commit": commit,
+                   "indexedAt": time.time(), "files": sorted(indexed)}, f)
+    os.replace(tmp, state_path)
+    return result
+
+
+def _page_links(html: str, page_url: str, root_url: str, scope: str, seen: set) -> List[str]:
+    if BeautifulSoup is None:
+        return []
+    links = []
+    soup = BeautifulSoup(html, "html.parser")
+    for a in soup.find_all("a", href=True):
+        href = a.get("href")
+        if not href or href.startswith("#") or href.startswith("mailto:") or href.startswith("javascript:"):
+            continue
+        next_url = urljoin(page_url, href)
+        if next_url not in seen and _same_scope(scope, root_url, next_url):
+            links.append(next_url)
+    return links
+
+
 # ---- Tools ----
 
 
 @mcp.tool()
-def scrape_docs(
+async def scrape_docs(
     project: str,
     library: str,
     url: str,
@@ -368,10 +1012,14 @@ def scrape_docs(
     maxDepth: int = 2,
     scope: str = "subpages",
     followRedirects: bool = True,
+    resume: bool = False,
+    shared: bool = False,
 ) -> Dict[str, Any]:
     """
     Scrape and index documentation from a URL, file, or folder into a project.
     Supports: local web files, web docs, folder trees, PDF/DOCX/PPTX via Docling, markdown/txt/html as plain, and web crawl.
+    With shared=True the library@version is indexed once as a shared corpus and the project attaches to it;
+    other projects can then use attach_library instead of scraping it again.
 
     Args:
         project: Project name (main grouping) - create new or add to existing
@@ -383,37 +1031,61 @@ def scrape_docs(
         maxDepth: Maximum crawl depth (default: 2)
         scope: Crawl scope ('subpages', 'hostname', 'domain')
         followRedirects: Whether to follow redirects (default: True)
+        resume: Continue a web crawl from its last checkpoint instead of the seed URL
+        shared: Index into the shared corpus for this library@version and attach the project to it
 
     Returns:
         Summary of scraping results with page and chunk counts
     """
     version = _normalize_version(version)
-    docling_exts = [".pdf", ".docx", ".pptx"]
+    base_meta = {
+        "project": SHARED_PROJECT if shared else project,
+        "content_type": content_type,
+        "library": library,
+        "version": version or "unversioned",
+    }
+    result = await _scrape(project, base_meta, url, maxPages, maxDepth, scope, followRedirects, resume)
+    if shared:
+        # Attach only once the corpus holds documents, so a failed or empty scrape leaves no reference to it.
+        corpus = {"library": library, "version": base_meta["version"], "content_type": content_type}
+        indexed = "error" not in result and (
+            result.get("chunksIndexed", 0) > 0
+            or bool(await _store.adistinct_values("url", {"project": SHARED_PROJECT, **corpus})))
+        if indexed:
+            _corpora.attach(project, **corpus)
+        else:
+            if not _corpora.attached(**corpus):
+                await _reclaim_corpora([corpus])
+            if "error" not in result:
+                result["message"] = (result.get("message", "") +
+                                     "; nothing was indexed, so the project was not attached to the shared corpus")
+    return result
+
+
+async def _scrape(project: str, base_meta: Dict[str, Any], url: str, maxPages: int, maxDepth: int,
+                  scope: str, followRedirects: bool, resume: bool) -> Dict[str, Any]:
+    """Index `url` into the partition of base_meta; returns the scrape_docs result."""
+    library, content_type = base_meta["library"], base_meta["content_type"]
+    version = base_meta["version"]
+    docling_exts = DOCLING_EXTS
+    pipeline = _IngestPipeline(base_meta)
+
+    def index_local(site: str, page_url: str, fpath: str) -> None:
+        pipeline.add(site, page_url, _read_local(fpath), DEDUP_LOCAL_BOILERPLATE)
 
     try:
         # --- 1. Docling-eligible HTTP(S) files (PDF/DOCX/PPTX) ---
         if (url.startswith("http://") or url.startswith("https://")) and any(url.lower().endswith(ext) for ext in docling_exts):
-            content = extract_text_with_docling(url)
-            docs = [
-                (
-                    chunk,
-                    {
-                        "project": project,
-                        "content_type": content_type,
-                        "library": library,
-                        "version": version or "unversioned",
-                        "url": url,
-                        "fts_content": chunk,
-                    }
-                )
-                for chunk in _chunk_markdown(content)
-            ]
-            added = _add_documents(docs)
-            return {
-                "pagesScraped": 1,
-                "chunksIndexed": added,
-                "message": f"Indexed {added} chunks from {url}"
-            }
+            fetched = await _fetch(url, followRedirects, kinds=("document",), timeout=(10, 60))
+            if fetched["body"] is None:
+                reason = "larger than DOCS_MCP_MAX_DOCUMENT_BYTES" if fetched["truncated"] else \
+                    f"status {fetched['status']}, {fetched['mime'] or 'unknown type'}"
+                return {"error": f"Could not fetch document {url} ({reason})"}
+            if _archive is not None:
+                await asyncio.to_thread(_archive.append, url, fetched["body"], fetched["mime"], fetched["status"], base_meta)
+            content = await _run_cpu(_document_bytes_to_markdown, fetched["body"], url)
+            await _run_cpu(pipeline.add, urlparse(url).netloc, url, content)
+            return await _run_cpu(pipeline.summary, f"Indexed {{chunks}} chunks from {url}")
 
         # --- 2. Local file/folder handler (with Docling for PDFs, DOCX, PPTX) ---
         if url.startswith("file://"):
@@ -424,123 +1096,136 @@ def scrape_docs(
                     for fname in files:
                         fpath = os.path.join(root, fname)
                         found_files.append(fpath)
-                docs = []
                 for fpath in found_files:
-                    ext = os.path.splitext(fpath)[1].lower()
-                    if ext in docling_exts:
-                        content = extract_text_with_docling(fpath)
-                    else:
-                        with open(fpath, "r", encoding="utf-8", errors="ignore") as f:
-                            content = f.read()
-                    for chunk in _chunk_markdown(content):
-                        docs.append(
-                            (chunk, {
-                                "project": project,
-                                "content_type": content_type,
-                                "library": library,
-                                "version": version or "unversioned",
-                                "url": f"file://{fpath}",
-                                "fts_content": chunk,
-                            })
-                        )
-                added = _add_documents(docs)
-                return {
-                    "pagesScraped": len(found_files),
-                    "chunksIndexed": added,
-                    "message": f"Indexed {added} chunks from folder '{path}'"
-                }
+                    await _run_cpu(index_local, path, f"file://{fpath}", fpath)
+                return await _run_cpu(pipeline.summary, f"Indexed {{chunks}} chunks from folder '{path}'")
             elif os.path.isfile(path):
-                ext = os.path.splitext(path)[1].lower()
-                if ext in docling_exts:
-                    content = extract_text_with_docling(path)
-                else:
-                    with open(path, "r", encoding="utf-8", errors="ignore") as f:
-                        content = f.read()
-                docs = [
-                    (
-                        chunk,
-                        {
-                            "project": project,
-                            "content_type": content_type,
-                            "library": library,
-                            "version": version or "unversioned",
-                            "url": url,
-                            "fts_content": chunk,
-                        }
-                    )
-                    for chunk in _chunk_markdown(content)
-                ]
-                added = _add_documents(docs)
-                return {
-                    "pagesScraped": 1,
-                    "chunksIndexed": added,
-                    "message": f"Indexed {added} chunks from file '{path}'"
-                }
+                await _run_cpu(index_local, path, url, path)
+                return await _run_cpu(pipeline.summary, f"Indexed {{chunks}} chunks from file '{path}'")
             else:
                 return {"error": f"Path not found: {path}"}
 
         # --- 3. Standard web docs crawling (HTML/doc sites) ---
-        seen = set()
-        q = deque()
-        q.append((url, 0))
-        pages = 0
-        added = 0
+        ckpt = CrawlCheckpoint(os.path.join(STATE_DIR, "crawls"), base_meta["project"], library,
+                               version or "unversioned", content_type, url, scope)
+        resumed = resume and ckpt.load()
+        if not resumed:
+            ckpt.frontier.append((url, 0))
+        seen = ckpt.seen
+        q = ckpt.frontier
+        next_checkpoint = CHECKPOINT_EVERY
         timeout = (10, 20)
 
-        while q and pages < maxPages:
+        while q and pipeline.pages < maxPages:
+            if pipeline.pages >= next_checkpoint:
+                # Flush buffered pages first so everything marked indexed really is.
+                await _run_cpu(pipeline.flush)
+                await asyncio.to_thread(ckpt.save)
+                next_checkpoint += CHECKPOINT_EVERY
             u, depth = q.popleft()
             if u in seen:
                 continue
             seen.add(u)
             try:
-                resp = requests.get(u, allow_redirects=followRedirects, timeout=timeout, headers={
-                                    "User-Agent": "Docs-MCP/1.0"})
-                if resp.status_code != 200 or "text/html" not in resp.headers.get("Content-Type", ""):
+                # PDF/DOCX/PPTX links found while crawling go through Docling.
+                fetched = await _fetch(u, followRedirects, kinds=("html", "document"), timeout=timeout)
+                if fetched["body"] is None:
+                    ckpt.status[u] = f"skipped ({fetched['status']}, {fetched['kind'] or fetched['mime']})"
                     continue
-                html = resp.text
-                html, md = _html_to_markdown(html)
-                chunks = _chunk_markdown(md)
-                docs = [
-                    (
-                        chunk,
-                        {
-                            "project": project,
-                            "content_type": content_type,
-                            "library": library,
-                            "version": version or "unversioned",
-                            "url": u,
-                            "fts_content": chunk,
-                        }
-                    )
-                    for chunk in chunks if chunk.strip()
-                ]
-                added += _add_documents(docs)
-                pages += 1
-
-                if depth < maxDepth and BeautifulSoup is not None:
-                    soup = BeautifulSoup(html, "html.parser")
-                    for a in soup.find_all("a", href=True):
-                        href = a.get("href")
-                        if not href or href.startswith("#") or href.startswith("mailto:") or href.startswith("javascript:"):
-                            continue
-                        next_url = urljoin(u, href)
-                        if _same_scope(scope, url, next_url):
-                            q.append((next_url, depth + 1))
+                if _archive is not None:
+                    await asyncio.to_thread(_archive.append, u, fetched["body"], fetched["mime"], fetched["status"], base_meta)
+                if fetched["kind"] == "document":
+                    content = await _run_cpu(_document_bytes_to_markdown, fetched["body"], u)
+                    await _run_cpu(pipeline.add, urlparse(u).netloc, u, content)
+                    ckpt.status[u] = "indexed"
+                    ckpt.pages_total += 1
+                    continue
+                html, md = await _run_cpu(_html_to_markdown, _decode(fetched["body"], fetched["mime"]))
+                await _run_cpu(pipeline.add, urlparse(u).netloc, u, md, True)
+                ckpt.status[u] = "indexed"
+                ckpt.pages_total += 1
+
+                if depth < maxDepth:
+                    for next_url in await _run_cpu(_page_links, html, u, url, scope, seen):
+                        q.append((next_url, depth + 1))
             except Exception as e:
                 print("Web crawl error:", e)
+                ckpt.status[u] = f"error ({e})"
                 continue
 
-        return {
-            "pagesScraped": pages,
-            "chunksIndexed": added,
-            "message": f"Indexed {added} chunks from {pages} pages for project={project}, library={library}@{version or 'unversioned'} [{content_type}]",
-        }
+        result = await _run_cpu(
+            pipeline.summary,
+            f"Indexed {{chunks}} chunks from {pipeline.pages} pages for project={project}, library={library}@{version or 'unversioned'} [{content_type}]",
+        )
+        result["resumed"] = bool(resumed)
+        result["pagesScrapedTotal"] = ckpt.pages_total
+        result["pendingUrls"] = len(q)
+        if q:
+            await asyncio.to_thread(ckpt.save)
+            result["message"] += " (crawl incomplete: call again with resume=True to continue)"
+        else:
+            ckpt.clear()
+        return result
     except Exception as e:
         return {"error": str(e)}
 
 
 @mcp.tool()
-def search_docs(
+async def reindex_from_archive(
+    project: str,
+    library: str,
+    version: str = "",
+    content_type: str = "docs",
+    url_prefix: str = "",
+) -> Dict[str, Any]:
+    """
+    Re-run conversion, chunking and embedding for a library from the local page archive, without re-fetching.
+    Use after changing the chunker or HTML converter; unchanged chunks keep their stored vectors, so to change the
+    embedding model use start_reembed instead. Requires DOCS_MCP_ARCHIVE=1 when scraping.
+
+    Args:
+        project: Project name
+        library: Library name
+        version: Library version (optional, defaults to 'unversioned')
+        content_type: Type of content ('docs', 'api', etc.)
+        url_prefix: Only reindex archived URLs starting with this prefix (optional)
+
+    Returns:
+        Summary of reindexing results with page and chunk counts
+    """
+    if _archive is None:
+        return {"error": "Page archive is disabled. Set DOCS_MCP_ARCHIVE=1 and scrape once to populate it."}
+    version = _normalize_version(version)
+    base_meta = {
+        "project": project,
+        "content_type": content_type,
+        "library": library,
+        "version": version or "unversioned",
+    }
+    pipeline = _IngestPipeline(base_meta)
+
+    def reindex() -> Dict[str, Any]:
+        for record in _archive.latest(base_meta, url_prefix):
+            body = _archive.read(record)
+            html = _sniff_kind(record["mime"] or "", body[:1024], record["url"]) != "document"
+            if html:
+                content = _html_to_markdown(_decode(body, record["mime"] or ""))[1]
+            else:
+                content = _document_bytes_to_markdown(body, record["url"])
+            pipeline.add(urlparse(record["url"]).netloc, record["url"], content, html)
+        return pipeline.summary(
+            f"Reindexed {{chunks}} chunks from {pipeline.pages} archived pages for project={project}, "
+            f"library={library}@{version or 'unversioned'} [{content_type}]"
+        )
+
+    try:
+        return await _run_cpu(reindex)
+    except Exception as e:
+        return {"error": str(e)}
+
+
+@mcp.tool()
+async def search_docs(
     project: str,
     library: str,
     query: str,
@@ -561,13 +1246,8 @@ def search_docs(
     Returns:
         Search results with content snippets and source URLs
     """
-    filt: Dict[str, Any] = {"project": project,
-                            "content_type": content_type, "library": library}
-    if version:
-        filt["version"] = version
-    retriever = _vector.as_retriever(search_type="similarity", search_kwargs={
-                                     "k": max(1, int(limit))}, filter=filt)
-    docs = retriever.invoke(query)
+    filters = _search_filters(project, library, version, content_type)
+    docs = [d for d, _ in await _search_sections(query, limit, filters)]
     if not docs:
         return (f"No results for '{query}' in project={project}, library={library}, "
                 f"version={version or 'any'}, content_type={content_type}.")
@@ -586,14 +1266,84 @@ def search_docs(
     return final_answer
 
 
+def _name_matcher(patterns: str):
+    """Predicate for a comma-separated list of names or wildcards ('*', 'fast*'); empty matches all."""
+    parts = [p.strip() for p in patterns.split(",") if p.strip()] or ["*"]
+    return lambda name: any(fnmatch.fnmatchcase(name, p) for p in parts)
+
+
+async def _federated_filters(projects: str, libraries: str, version: str,
+                             content_type: str) -> List[Dict[str, Any]]:
+    """Store filters covering every matching project/library, including attached shared corpora."""
+    project_ok, library_ok = _name_matcher(projects), _name_matcher(libraries)
+    all_libraries = not libraries.strip() or libraries.strip() == "*"
+    names = [p for p in await _store.aprojects() if p != SHARED_PROJECT and project_ok(p)]
+
+    async def own(project: str) -> List[Dict[str, Any]]:
+        base = {"project": project, "content_type": content_type}
+        if all_libraries:
+            return [base]  # one query over the whole partition
+        libs = await _distinct_values("library", base)
+        return [{**base, "library": lib} for lib in libs if library_ok(lib)]
+
+    filters = [f for part in await asyncio.gather(*(own(p) for p in names)) for f in part]
+    for corpus in _corpora.attached(content_type=content_type):
+        if library_ok(corpus["library"]) and any(project_ok(p) for p in corpus["projects"]):
+            filters.append({"project": SHARED_PROJECT, "content_type": content_type,
+                            "library": corpus["library"], "version": corpus["version"]})
+    if version:
+        filters = [f for f in filters if f.get("version", version) == version]
+        filters = [{**f, "version": version} for f in filters]
+    unique = {tuple(sorted(f.items())): f for f in filters}
+    return list(unique.values())
+
+
+@mcp.tool()
+async def search_all_docs(
+    query: str,
+    projects: str = "*",
+    libraries: str = "*",
+    version: str = "",
+    content_type: str = "docs",
+    limit: int = 10,
+) -> str:
+    """Search many projects and libraries in one call and rank all results together.
+    Use this instead of calling search_docs per library when it is not known where the answer lives.
+
+    Args:
+        query: Search query text
+        projects: Comma-separated project names or wildcards (default: '*' for all projects)
+        libraries: Comma-separated library names or wildcards, e.g. 'fastapi,pydantic*' (default: '*')
+        version: Specific version to search (optional)
+        content_type: Type of content to search ('docs', 'api', etc.)
+        limit: Maximum number of results to return
+
+    Returns:
+        Best matching passages across all matching libraries, each with its project, library, version and URL
+    """
+    filters = await _federated_filters(projects, libraries, version, content_type)
+    if not filters:
+        return f"No indexed libraries match projects='{projects}', libraries='{libraries}' [{content_type}]."
+    results = await _search_sections(query, limit, filters)
+    if not results:
+        return f"No results for '{query}' in projects='{projects}', libraries='{libraries}' [{content_type}]."
+    result = f"🔎 Top {len(results)} results for '{query}' across {len(filters)} libraries/partitions:\n\n"
+    for i, (doc, distance) in enumerate(results, 1):
+        meta = doc.metadata
+        where = "shared" if meta.get("project") == SHARED_PROJECT else meta.get("project")
+        result += (f"### {i}. {where} / {meta.get('library')}@{meta.get('version')} "
+                   f"(distance {distance:.3f})\n🔗 {meta.get('url')}\n\n{doc.page_content.strip()}\n\n")
+    return result
+
+
 @mcp.tool()
-def list_projects() -> str:
+async def list_projects() -> str:
     """List all projects and their libraries with statistics.
 
     Returns:
         Formatted list showing projects, their libraries with versions, and document counts
     """
-    projects = _get_project_stats()
+    projects = await _get_project_stats()
     if not projects:
         return "No projects indexed yet. Use scrape_docs to create your first project!"
 
@@ -605,7 +1355,8 @@ def list_projects() -> str:
         for lib_name, versions in project['libraries'].items():
             result += f"  📚 {lib_name}:\n"
             for version in versions:
-                result += f"    - v{version['version']}: {version['documentCount']} docs, {version['uniqueUrlCount']} URLs\n"
+                shared = " (shared)" if version['status'] == "shared" else ""
+                result += f"    - v{version['version']}: {version['documentCount']} docs, {version['uniqueUrlCount']} URLs{shared}\n"
                 total_docs += version['documentCount']
                 total_urls += version['uniqueUrlCount']
         result += f"  📊 **Total**: {total_docs} docs, {total_urls} URLs\n\n"
@@ -614,7 +1365,7 @@ def list_projects() -> str:
 
 
 @mcp.tool()
-def check_project(project: str) -> str:
+async def check_project(project: str) -> str:
     """Check if a project exists and show its current libraries.
 
     Args:
@@ -623,7 +1374,7 @@ def check_project(project: str) -> str:
     Returns:
         Information about the project and its libraries, or message if not found
     """
-    projects = _get_project_stats()
+    projects = await _get_project_stats()
     for proj in projects:
         if proj['name'] == project:
             result = f"✅ Project '{project}' exists!\n\n"
@@ -631,14 +1382,15 @@ def check_project(project: str) -> str:
             for lib_name, versions in proj['libraries'].items():
                 result += f"  - {lib_name}:\n"
                 for version in versions:
-                    result += f"    - v{version['version']}: {version['documentCount']} docs, {version['uniqueUrlCount']} URLs\n"
+                    shared = " (shared)" if version['status'] == "shared" else ""
+                    result += f"    - v{version['version']}: {version['documentCount']} docs, {version['uniqueUrlCount']} URLs{shared}\n"
             return result
 
     return f"❌ Project '{project}' does not exist yet.\n\n💡 You can create it by using scrape_docs with this project name."
 
 
 @mcp.tool()
-def list_libraries(project: str = "") -> str:
+async def list_libraries(project: str = "") -> str:
     """List all libraries across projects or within a specific project.
 
     Args:
@@ -647,7 +1399,7 @@ def list_libraries(project: str = "") -> str:
     Returns:
         List of libraries with their projects and versions
     """
-    projects = _get_project_stats()
+    projects = await _get_project_stats()
     if not projects:
         return "No libraries indexed yet. Use scrape_docs to index your first library!"
 
@@ -670,20 +1422,22 @@ def list_libraries(project: str = "") -> str:
                     'project': proj['name'],
                     'version': version['version'],
                     'docs': version['documentCount'],
-                    'urls': version['uniqueUrlCount']
+                    'urls': version['uniqueUrlCount'],
+                    'shared': version['status'] == "shared"
                 })
 
     for lib_name, entries in sorted(all_libraries.items()):
         result += f"📖 **{lib_name}**\n"
         for entry in entries:
-            result += f"  - Project: {entry['project']}, Version: {entry['version']}, Docs: {entry['docs']}, URLs: {entry['urls']}\n"
+            shared = " (shared)" if entry['shared'] else ""
+            result += f"  - Project: {entry['project']}, Version: {entry['version']}, Docs: {entry['docs']}, URLs: {entry['urls']}{shared}\n"
         result += "\n"
 
     return result
 
 
 @mcp.tool()
-def find_version(project: str, library: str, content_type: str = "docs", targetVersion: str = "") -> str:
+async def find_version(project: str, library: str, content_type: str = "docs", targetVersion: str = "") -> str:
     """Find best matching version for a library within project.
 
     Args:
@@ -695,8 +1449,10 @@ def find_version(project: str, library: str, content_type: str = "docs", targetV
     Returns:
         Best matching version or available versions
     """
-    versions = sorted(set(_distinct_values("version", {
-                      "project": project, "content_type": content_type, "library": library})))
+    versions = set(await _distinct_values("version", {
+                   "project": project, "content_type": content_type, "library": library}))
+    versions.update(c["version"] for c in _corpora.attached(project, library, content_type=content_type))
+    versions = sorted(versions)
     if not versions:
         return f"No versions found for {library} in project={project} [{content_type}]."
     chosen = _match_target_version(versions, targetVersion)
@@ -707,7 +1463,33 @@ def find_version(project: str, library: str, content_type: str = "docs", targetV
 
 
 @mcp.tool()
-def remove_docs(project: str, library: str, version: str = "", content_type: str = "docs") -> str:
+async def attach_library(project: str, library: str, version: str = "", content_type: str = "docs") -> str:
+    """Attach a project to an already indexed shared corpus (see scrape_docs shared=True) without scraping it again.
+
+    Args:
+        project: Project name to attach
+        library: Library name of the shared corpus
+        version: Version to attach (optional, best match; latest if not specified)
+        content_type: Type of content ('docs', 'api', etc.)
+
+    Returns:
+        Confirmation message, or the shared versions available
+    """
+    versions = sorted(set(await _distinct_values("version", {
+                      "project": SHARED_PROJECT, "content_type": content_type, "library": library})))
+    if not versions:
+        return (f"No shared corpus for {library} [{content_type}]. "
+                f"Index it once with scrape_docs(..., shared=True).")
+    chosen = _match_target_version(versions, _normalize_version(version))
+    if not chosen:
+        return f'No shared corpus for {library}@{version} [{content_type}]. Available: {", ".join(versions)}'
+    corpus = _corpora.attach(project, library, chosen, content_type)
+    return (f"Attached project={project} to shared {library}@{chosen} [{content_type}] "
+            f"(referenced by {len(corpus['projects'])} projects)")
+
+
+@mcp.tool()
+async def remove_docs(project: str, library: str, version: str = "", content_type: str = "docs") -> str:
     """Remove indexed documentation for a library/version from a project.
 
     Args:
@@ -723,13 +1505,52 @@ def remove_docs(project: str, library: str, version: str = "", content_type: str
                                "content_type": content_type, "library": library}
     if version:
         filters["version"] = version
-    deleted = _delete_documents_by_metadata(filters)
+    deleted = await _delete_documents_by_metadata(filters)
+    await asyncio.to_thread(_forget_git_state, filters)
+    unwatched = await asyncio.to_thread(_watcher.remove_matching, filters)
     vtxt = version or "unversioned"
-    return f"Removed {deleted} chunks for project={project}, {library}@{vtxt} [{content_type}]"
+    result = f"Removed {deleted} chunks for project={project}, {library}@{vtxt} [{content_type}]"
+    if unwatched:
+        result += f"; stopped watching {len(unwatched)} folders"
+    refs = _corpora.detach(project, library, version or None, content_type)
+    if refs["detached"]:
+        reclaimed = await _reclaim_corpora(refs["unreferenced"])
+        result += (f"; detached from {len(refs['detached'])} shared corpora, "
+                   f"reclaimed {len(refs['unreferenced'])} no longer used by any project ({reclaimed} chunks)")
+    return result
 
 
 @mcp.tool()
-def fetch_url(url: str, project: str, content_type: str = "docs", followRedirects: bool = True) -> str:
+async def remove_project(project: str) -> str:
+    """Remove a whole project, dropping its storage partition.
+
+    Args:
+        project: Project name to remove
+
+    Returns:
+        Confirmation message with number of chunks removed
+    """
+    if project == SHARED_PROJECT:
+        return f"❌ '{project}' holds shared corpora; use remove_docs in the projects attached to them."
+    refs = _corpora.detach(project)
+    exists = project in await _store.aprojects()
+    if not exists and not refs["detached"]:
+        return f"❌ Project '{project}' does not exist."
+    deleted = await _store.adrop_project(project) if exists else 0
+    await asyncio.to_thread(_forget_git_state, {"project": project})
+    unwatched = await asyncio.to_thread(_watcher.remove_matching, {"project": project})
+    result = f"Removed project '{project}' ({deleted} chunks)"
+    if unwatched:
+        result += f"; stopped watching {len(unwatched)} folders"
+    if refs["detached"]:
+        reclaimed = await _reclaim_corpora(refs["unreferenced"])
+        result += (f"; detached from {len(refs['detached'])} shared corpora, "
+                   f"reclaimed {len(refs['unreferenced'])} no longer used by any project ({reclaimed} chunks)")
+    return result
+
+
+@mcp.tool()
+async def fetch_url(url: str, project: str, content_type: str = "docs", followRedirects: bool = True) -> str:
     """Fetch a URL and convert to Markdown (helper tool).
 
     Args:
@@ -742,27 +1563,25 @@ def fetch_url(url: str, project: str, content_type: str = "docs", followRedirect
         Markdown content of the URL or error message
     """
     try:
-        r = requests.get(
-            url,
-            allow_redirects=followRedirects,
-            timeout=(10, 20),
-            headers={"User-Agent": "Docs-MCP/1.0"},
-        )
-        if r.status_code != 200:
-            return f"Failed to fetch URL (status {r.status_code})."
-        ctype = r.headers.get("Content-Type", "")
-        if "text/html" in ctype:
-            _, markdown = _html_to_markdown(r.text)
-            return markdown
-        if r.text:
-            return r.text
-        return f"[{len(r.content)} bytes]"
+        fetched = await _fetch(url, followRedirects, kinds=("html", "text", "document"))
+        if fetched["status"] != 200:
+            return f"Failed to fetch URL (status {fetched['status']})."
+        if fetched["body"] is None:
+            if fetched["truncated"]:
+                return f"[{fetched['mime'] or 'document'} larger than {MAX_DOCUMENT_BYTES} bytes, not downloaded]"
+            return f"[{fetched['mime'] or 'binary content'}, not downloaded]"
+        if fetched["kind"] == "document":
+            return await _run_cpu(_document_bytes_to_markdown, fetched["body"], fetched["url"])
+        text = _decode(fetched["body"], fetched["mime"])
+        if fetched["kind"] == "html":
+            _, text = await _run_cpu(_html_to_markdown, text)
+        return text
     except Exception as e:
         return f"Failed to fetch URL: {e}"
 
 
 @mcp.tool()
-def detailed_stats(project: str = "", library: str = "", version: str = "") -> str:
+async def detailed_stats(project: str = "", library: str = "", version: str = "") -> str:
     """Get detailed statistics with URL-level granularity and flexible filtering.
 
     Args:
@@ -773,46 +1592,14 @@ def detailed_stats(project: str = "", library: str = "", version: str = "") -> s
     Returns:
         Detailed breakdown showing individual URLs and chunk counts with flexible filtering
     """
-    import psycopg
-
-    # Build dynamic query based on filters
-    clauses = [
-        "collection_id = (SELECT uuid FROM langchain_pg_collection WHERE name = %s)"]
-    params = [PG_COLLECTION]
-
+    filt: Dict[str, Any] = {}
     if project:
-        clauses.append("(cmetadata ->> 'project') = %s")
-        params.append(project)
+        filt["project"] = project
     if library:
-        clauses.append("(cmetadata ->> 'library') = %s")
-        params.append(library)
+        filt["library"] = library
     if version:
-        clauses.append("(cmetadata ->> 'version') = %s")
-        params.append(version)
-
-    sql = f"""
-    SELECT 
-        cmetadata ->> 'project' as project,
-        cmetadata ->> 'library' as library,
-        cmetadata ->> 'version' as version,
-        cmetadata ->> 'content_type' as content_type,
-        cmetadata ->> 'url' as url,
-        COUNT(*) as chunk_count
-    FROM langchain_pg_embedding 
-    WHERE {' AND '.join(clauses)}
-    GROUP BY 
-        cmetadata ->> 'project',
-        cmetadata ->> 'library', 
-        cmetadata ->> 'version',
-        cmetadata ->> 'content_type',
-        cmetadata ->> 'url'
-    ORDER BY project, library, version, content_type, url
-    """
-
-    with psycopg.connect(f"postgresql://{PG_USER}:{PG_PASSWORD}@{PG_HOST}:{PG_PORT}/{PG_DB}") as conn:
-        with conn.cursor() as cur:
-            cur.execute(sql, params)
-            rows = cur.fetchall()
+        filt["version"] = version
+    rows = await _store.aurl_stats(filt)
 
     if not rows:
         filter_desc = []
@@ -882,6 +1669,381 @@ def detailed_stats(project: str = "", library: str = "", version: str = "") -> s
     return result
 
 
+@mcp.tool()
+async def scrape_git_repo(
+    project: str,
+    library: str,
+    path: str,
+    version: str = "",
+    content_type: str = "docs",
+    ref: str = "HEAD",
+    pathspec: str = "",
+) -> Dict[str, Any]:
+    """
+    Index a local git repository (READMEs, docs folders, source files) at a commit.
+    Only tracked files are read, so .gitignore'd and build files are skipped. The indexed commit is recorded;
+    calling again re-indexes only files changed since then (git diff --name-status).
+
+    Args:
+        project: Project name
+        library: Library name
+        path: Path to the repository or a folder inside it (plain path or file:// URL)
+        version: Library version (optional, defaults to 'unversioned')
+        content_type: Type of content ('docs', 'api', etc.)
+        ref: Commit, branch or tag to index (default: HEAD)
+        pathspec: Only index paths matching this git pathspec, e.g. 'docs/' (optional)
+
+    Returns:
+        Summary with indexed commit, changed/deleted file counts and chunk counts
+    """
+    folder = _local_path(path)
+    repo = GitRepo.find(folder)
+    if repo is None:
+        return {"error": f"Not inside a git work tree: {folder}"}
+    base_meta = {"project": project, "content_type": content_type, "library": library,
+                 "version": _normalize_version(version) or "unversioned"}
+    spec = [pathspec] if pathspec else []
+    rel = os.path.relpath(os.path.realpath(folder), os.path.realpath(repo.root))
+    if not spec and rel != ".":
+        spec = [rel]
+    try:
+        return await _run_cpu(_ingest_git, repo, base_meta, ref, spec)
+    except GitError as e:
+        return {"error": f"git: {e}"}
+    except Exception as e:
+        return {"error": str(e)}
+
+
+def _watch_meta(project: str, library: str, version: str, content_type: str) -> Dict[str, str]:
+    return {"project": project, "library": library, "version": _normalize_version(version) or "unversioned",
+            "content_type": content_type}
+
+
+def _local_path(path: str) -> str:
+    return os.path.abspath(path[7:] if path.startswith("file://") else path)
+
+
+@mcp.tool()
+async def watch_folder(
+    project: str,
+    library: str,
+    path: str,
+    version: str = "",
+    content_type: str = "docs",
+    intervalSeconds: int = 30,
+    debounceSeconds: int = 5,
+) -> Dict[str, Any]:
+    """
+    Keep a local folder indexed: files added, modified or deleted under it are re-indexed or removed
+    automatically, in debounced batches. The first scan indexes the whole folder (unchanged chunks are reused).
+
+    Args:
+        project: Project name
+        library: Library name
+        path: Folder path (plain path or file:// URL)
+        version: Library version (optional, defaults to 'unversioned')
+        content_type: Type of content ('docs', 'api', etc.)
+        intervalSeconds: How often the folder is rescanned (default: 30)
+        debounceSeconds: How long a file must stay unchanged before it is indexed (default: 5)
+
+    Returns:
+        The registered watch
+    """
+    folder = _local_path(path)
+    if not os.path.isdir(folder):
+        return {"error": f"Folder not found: {folder}"}
+    watch = _watcher.add(folder, _watch_meta(project, library, version, content_type),
+                         max(1, int(intervalSeconds)), max(0, int(debounceSeconds)))
+    return {**watch.config(), "events": _watcher.uses_events,
+            "message": f"Watching '{folder}' for changes (scans every {watch.interval:g}s)"}
+
+
+@mcp.tool()
+async def unwatch_folder(
+    project: str,
+    library: str,
+    path: str,
+    version: str = "",
+    content_type: str = "docs",
+    removeDocs: bool = False,
+) -> str:
+    """Stop watching a local folder.
+
+    Args:
+        project: Project name
+        library: Library name
+        path: Folder path (plain path or file:// URL)
+        version: Library version (optional)
+        content_type: Type of content ('docs', 'api', etc.)
+        removeDocs: Also remove the folder's indexed files from the library
+
+    Returns:
+        Confirmation message
+    """
+    folder = _local_path(path)
+    watch = _watcher.find(folder, _watch_meta(project, library, version, content_type))
+    if watch is None or _watcher.remove(watch.key) is None:
+        return f"❌ '{folder}' is not watched for {library} in project={project}."
+    removed = 0
+    if removeDocs:
+        urls = [f"file://{fpath}" for fpath in watch.snapshot]
+        removed = await _run_cpu(lambda: sum(_store.delete({**watch.meta, "url": u}) for u in urls))
+    return f"Stopped watching '{folder}'" + (f"; removed {removed} chunks" if removeDocs else "")
+
+
+@mcp.tool()
+async def list_watches() -> str:
+    """List watched local folders with their last scan and indexing results.
+
+    Returns:
+        Watched folders, target libraries, tracked file counts and recent activity
+    """
+    if not _watcher.watches:
+        return "No folders are watched. Use watch_folder to keep a local folder indexed."
+    mode = "filesystem events + periodic scans" if _watcher.uses_events else "periodic scans"
+    result = f"👀 **Watched folders** ({mode}):\n\n"
+    for watch in _watcher.watches.values():
+        m, st = watch.meta, watch.stats
+        result += f"📁 {watch.path} → {m['project']}/{m['library']}@{m['version']} [{m['content_type']}]\n"
+        result += (f"  - {len(watch.snapshot)} files tracked, {len(watch.pending)} pending, "
+                   f"{st['filesIndexed']} indexed / {st['filesRemoved']} removed so far\n")
+        if st.get("lastSummary"):
+            result += f"  - Last batch: {st['lastSummary'].get('message')}\n"
+        if st.get("lastError"):
+            result += f"  - ⚠️ Last error: {st['lastError']}\n"
+    return result
+
+
+@mcp.tool()
+async def extraction_progress() -> Dict[str, Any]:
+    """Show per-page progress of PDF conversions that are running or finished recently.
+
+    Returns:
+        For each document: total pages, pages served from the page cache, pages converted so far and failed pages
+    """
+    return {"workers": PDF_WORKERS, "pagesPerTask": PDF_PAGES_PER_TASK, "documents": _pdf_progress.snapshot()}
+
+
+@mcp.tool()
+async def embedding_stats() -> str:
+    """Show embedding service metrics: queue wait per lane (query vs ingest), batching and ingest connection use.
+
+    Returns:
+        Per-lane request counts, queued items, busy time and queue-wait percentiles
+    """
+    stats = _embedder.stats()
+    result = "🧮 **Embedding Scheduler**\n\n"
+    for lane, lane_stats in stats["lanes"].items():
+        result += (f"  - {lane}: {lane_stats['requests']} requests, {lane_stats['items']} texts, "
+                   f"{lane_stats['queued']} queued, busy {lane_stats['busySeconds']}s, "
+                   f"wait p50 {lane_stats['waitP50Ms']} ms / p95 {lane_stats['waitP95Ms']} ms / "
+                   f"max {lane_stats['waitMaxMs']} ms\n")
+    conns = stats["ingestConnections"]
+    limit = conns["limit"] or "unlimited"
+    result += (f"  - ingest connections (limit {limit}): {conns['requests']} writes, "
+               f"wait p95 {conns['waitP95Ms']} ms / max {conns['waitMaxMs']} ms\n")
+    batching = stats["batching"]
+    result += (f"\nBatching: {batching['batches']} batches, avg {batching['avgBatchSize']} texts "
+               f"(max {batching['maxBatch']}, wait ≤ {batching['maxLatencyMs']} ms), "
+               f"{batching['embeddingsPerSec']} embeddings/s of model time\n")
+    result += f"Ingest share of model time: {stats['ingestShare']:.0%}\n"
+    return result
+
+
+@mcp.tool()
+async def start_reembed(
+    model: str,
+    batchSize: int = 64,
+    pauseMs: int = 200,
+    autoCutover: bool = True,
+    minRecallRatio: float = 0.9,
+    sample: int = 50,
+) -> Dict[str, Any]:
+    """
+    Re-embed all stored chunks with a new embedding model in the background, without re-crawling.
+    Search keeps using the current index; new ingestion is written to both. When the copy is complete,
+    a recall check compares the two indexes and (with autoCutover) switches to the new one atomically.
+
+    Args:
+        model: Embedding model name (e.g., 'BAAI/bge-base-en-v1.5')
+        batchSize: Chunks embedded per background batch (default: 64)
+        pauseMs: Pause between batches to leave capacity for live traffic (default: 200)
+        autoCutover: Switch to the new index as soon as the recall check passes (default: True)
+        minRecallRatio: Required recall of the new index relative to the current one (default: 0.9)
+        sample: Number of chunks sampled for the recall check (default: 50)
+
+    Returns:
+        Migration status
+    """
+    global _migration
+    if _migration is not None and _migration.state["phase"] in ACTIVE_PHASES + ("failed",):
+        return {"error": f"A migration to {_migration.state['model']} is {_migration.state['phase']}. "
+                         f"Use reembed_status, cutover_reembed or cancel_reembed."}
+    if model == EMBED_MODEL:
+        return {"error": f"{model} is already the active embedding model."}
+    state = {
+        **_shadow_index(model),
+        "phase": "backfill",
+        "batchSize": max(1, int(batchSize)),
+        "pauseMs": max(0, int(pauseMs)),
+        "autoCutover": bool(autoCutover),
+        "minRecallRatio": float(minRecallRatio),
+        "sample": max(1, int(sample)),
+        "fromModel": EMBED_MODEL,
+        "startedAt": time.time(),
+        "copied": 0,
+        "projects": {},
+    }
+    try:
+        os.makedirs(STATE_DIR, exist_ok=True)
+        _migration = await _run_cpu(_open_migration, state)
+        _migration.save()
+        _migration.start()
+    except Exception as e:
+        return {"error": f"Could not start migration: {e}"}
+    return _migration.status()
+
+
+@mcp.tool()
+async def reembed_status() -> Dict[str, Any]:
+    """Show progress of the current or last re-embed migration and the active embedding model.
+
+    Returns:
+        Phase, per-project copy progress, recall check results and the active index
+    """
+    active = {"model": EMBED_MODEL, **{k: v for k, v in _active_index.items() if k != "model"}}
+    if _migration is None:
+        return {"phase": "none", "active": active, "message": "No re-embed migration in this server session."}
+    return {**_migration.status(), "active": active}
+
+
+@mcp.tool()
+async def cutover_reembed(force: bool = False) -> Dict[str, Any]:
+    """Run the recall check and switch search and ingestion to the re-embedded index.
+
+    Args:
+        force: Switch even if the recall check does not pass
+
+    Returns:
+        Migration status after the check (and switch)
+    """
+    if _migration is None or _migration.state["phase"] not in ("verifying", "ready"):
+        phase = _migration.state["phase"] if _migration else "none"
+        return {"error": f"No migration ready for cutover (phase: {phase})."}
+    try:
+        recall = await _run_cpu(_migration.verify)
+        if not recall["passed"] and not force:
+            return {**_migration.status(), "message": "Recall check failed; index not switched (use force=True to override)."}
+        await _run_cpu(_migration.cutover, force)
+    except Exception as e:
+        return {"error": f"Cutover failed: {e}"}
+    return {**_migration.status(), "message": f"Now serving embeddings from {EMBED_MODEL}."}
+
+
+@mcp.tool()
+async def cancel_reembed(dropShadow: bool = True) -> Dict[str, Any]:
+    """Stop a re-embed migration and keep serving the current index.
+
+    Args:
+        dropShadow: Delete the partially built new index (default: True)
+
+    Returns:
+        Migration status
+    """
+    if _migration is None or _migration.state["phase"] not in ACTIVE_PHASES + ("failed",):
+        return {"error": "No running migration to cancel."}
+
+    def cancel() -> None:
+        global _store
+        _migration.stop()
+        _store = _migration.dual.primary
+        _migration.dual.close(discard=dropShadow)
+        if dropShadow:
+            drop_index(_migration.target)
+        _migration.state["phase"] = "cancelled"
+        _migration.save()
+
+    await _run_cpu(cancel)
+    return _migration.status()
+
+
+@mcp.tool()
+async def export_library(
+    project: str,
+    library: str,
+    version: str = "",
+    content_type: str = "docs",
+    path: str = "",
+) -> Dict[str, Any]:
+    """
+    Export an indexed library (chunk text, metadata, embeddings and stored pages) to a compressed NPZ snapshot.
+    Restore it with import_library on any server that uses the same embedding model.
+
+    Args:
+        project: Project name
+        library: Library name
+        version: Library version (optional, exports all versions if not specified)
+        content_type: Type of content ('docs', 'api', etc.)
+        path: Snapshot file to write (optional, defaults to the server's snapshot directory)
+
+    Returns:
+        Snapshot path, size, model, dimension and chunk/page counts
+    """
+    filters: Dict[str, Any] = {"project": project, "library": library, "content_type": content_type}
+    if version:
+        filters["version"] = _normalize_version(version) or version
+    if not path:
+        name = "-".join(re.sub(r"[^\w.-]+", "_", str(v)) for v in (project, library, version or "all", content_type))
+        path = os.path.join(SNAPSHOT_DIR, f"{name}.npz")
+    path = _local_path(path)
+    try:
+        return await _run_cpu(export_snapshot, _store, filters, path, EMBED_MODEL)
+    except Exception as e:
+        return {"error": str(e)}
+
+
+@mcp.tool()
+async def import_library(
+    path: str,
+    project: str = "",
+    library: str = "",
+    version: str = "",
+    content_type: str = "",
+    replace: bool = True,
+) -> Dict[str, Any]:
+    """
+    Load a snapshot written by export_library straight into the store, without crawling or embedding.
+    The snapshot must have been embedded with the model this server uses.
+
+    Args:
+        path: Snapshot file (plain path or file:// URL)
+        project: Import into this project instead of the exported one (optional)
+        library: Import as this library name (optional)
+        version: Import as this version (optional)
+        content_type: Import as this content type (optional)
+        replace: Remove chunks already stored for the imported library versions first (default: True)
+
+    Returns:
+        Snapshot header with imported and replaced chunk counts
+    """
+    path = _local_path(path)
+    if not os.path.isfile(path):
+        return {"error": f"Snapshot not found: {path}"}
+    overrides = {"project": project, "library": library,
+                 "version": _normalize_version(version) or version, "content_type": content_type}
+    try:
+        def load() -> Dict[str, Any]:
+            with _writable_store() as store:
+                dim = len(store.embeddings.embed_query("dimension probe"))
+                with store.embeddings.connection("ingest"):
+                    return import_snapshot(store, path, EMBED_MODEL, dim, overrides, _page_id, replace)
+
+        return await _run_cpu(load)
+    except Exception as e:
+        return {"error": str(e)}
+
+
 # ---- Run server ----
 if __name__ == "__main__":
+    start_background_tasks()
     mcp.run(transport="http", host="127.0.0.1", port=8009)
@@ -0,0 +1,273 @@
+"""
+sessions.py - Persistent, bounded ADK session service for the Docs-MCP agent API
+
+Sessions and their events are stored in SQLite, so they survive restarts and
+nothing accumulates in process memory between requests. Sessions idle for
+longer than `ttl` seconds are deleted. When a session grows past `max_events`
+events it is compacted to its most recent `keep_events`, starting at a user
+turn so the history never begins with a dangling tool call or response.
+
+State keys with the ADK "app:" and "user:" prefixes are stored per app and per
+user, as in InMemorySessionService; "temp:" keys are never stored.
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+from google.adk.events import Event
+from google.adk.sessions import BaseSessionService, Session
+from google.adk.sessions.base_session_service import GetSessionConfig, ListSessionsResponse
+
+APP_PREFIX = "app:"
+USER_PREFIX = "user:"
+TEMP_PREFIX = "temp:"
+
+
+class SQLiteSessionService(BaseSessionService):
+    # Expired sessions are purged at most this often (seconds)
+    PURGE_INTERVAL = 60.0
+
+    def __init__(self, path: str, ttl: float = 7 * 24 * 3600, max_events: int = 200,
+                 keep_events: Optional[int] = None):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.ttl = ttl
+        self.max_events = max(2, max_events)
+        self.keep_events = min(self.max_events, keep_events or self.max_events // 2)
+        self._lock = threading.Lock()
+        self._last_purge = 0.0
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS sessions (
+                app_name TEXT NOT NULL,
+                user_id TEXT NOT NULL,
+                id TEXT NOT NULL,
+                state TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (app_name, user_id, id)
+            );
+            CREATE INDEX IF NOT EXISTS ix_sessions_updated ON sessions (updated_at);
+            CREATE TABLE IF NOT EXISTS events (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                app_name TEXT NOT NULL,
+                user_id TEXT NOT NULL,
+                session_id TEXT NOT NULL,
+                timestamp REAL NOT NULL,
+                is_user_turn INTEGER NOT NULL,
+                event TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS ix_events_session ON events (app_name, user_id, session_id, seq);
+            CREATE TABLE IF NOT EXISTS app_state (app_name TEXT PRIMARY KEY, state TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS user_state (
+                app_name TEXT NOT NULL,
+                user_id TEXT NOT NULL,
+                state TEXT NOT NULL,
+                PRIMARY KEY (app_name, user_id)
+            );
+            """
+        )
+        self._db.commit()
+
+    # -- state --
+
+    def _load_state(self, table: str, where: str, params: Tuple) -> Dict[str, Any]:
+        row = self._db.execute(f"SELECT state FROM {table} WHERE {where}", params).fetchone()
+        return json.loads(row[0]) if row else {}
+
+    def _merged_state(self, app_name: str, user_id: str, session_state: Dict[str, Any]) -> Dict[str, Any]:
+        state = dict(session_state)
+        for k, v in self._load_state("app_state", "app_name = ?", (app_name,)).items():
+            state[APP_PREFIX + k] = v
+        for k, v in self._load_state("user_state", "app_name = ? AND user_id = ?", (app_name, user_id)).items():
+            state[USER_PREFIX + k] = v
+        return state
+
+    def _save_state(self, app_name: str, user_id: str, session_id: str, delta: Dict[str, Any]) -> None:
+        """Apply a state delta to the session, user and app state rows (caller holds the lock)."""
+        scoped: Dict[str, Dict[str, Any]] = {"app": {}, "user": {}, "session": {}}
+        for key, value in delta.items():
+            if key.startswith(TEMP_PREFIX):
+                continue
+            if key.startswith(APP_PREFIX):
+                scoped["app"][key[len(APP_PREFIX):]] = value
+            elif key.startswith(USER_PREFIX):
+                scoped["user"][key[len(USER_PREFIX):]] = value
+            else:
+                scoped["session"][key] = value
+        if scoped["app"]:
+            state = {**self._load_state("app_state", "app_name = ?", (app_name,)), **scoped["app"]}
+            self._db.execute("INSERT OR REPLACE INTO app_state (app_name, state) VALUES (?, ?)",
+                             (app_name, json.dumps(state)))
+        if scoped["user"]:
+            state = {**self._load_state("user_state", "app_name = ? AND user_id = ?", (app_name, user_id)),
+                     **scoped["user"]}
+            self._db.execute("INSERT OR REPLACE INTO user_state (app_name, user_id, state) VALUES (?, ?, ?)",
+                             (app_name, user_id, json.dumps(state)))
+        if scoped["session"]:
+            state = {**self._load_state("sessions", "app_name = ? AND user_id = ? AND id = ?",
+                                        (app_name, user_id, session_id)), **scoped["session"]}
+            self._db.execute("UPDATE sessions SET state = ? WHERE app_name = ? AND user_id = ? AND id = ?",
+                             (json.dumps(state), app_name, user_id, session_id))
+
+    # -- expiry and compaction --
+
+    def _purge(self, now: float) -> int:
+        """Delete sessions idle for longer than the TTL (caller holds the lock)."""
+        if now - self._last_purge < self.PURGE_INTERVAL:
+            return 0
+        self._last_purge = now
+        cutoff = now - self.ttl
+        expired = self._db.execute("SELECT app_name, user_id, id FROM sessions WHERE updated_at < ?",
+                                   (cutoff,)).fetchall()
+        for app_name, user_id, session_id in expired:
+            self._delete(app_name, user_id, session_id)
+        self._db.commit()
+        return len(expired)
+
+    def _delete(self, app_name: str, user_id: str, session_id: str) -> None:
+        self._db.execute("DELETE FROM events WHERE app_name = ? AND user_id = ? AND session_id = ?",
+                         (app_name, user_id, session_id))
+        self._db.execute("DELETE FROM sessions WHERE app_name = ? AND user_id = ? AND id = ?",
+                         (app_name, user_id, session_id))
+
+    def _compact(self, app_name: str, user_id: str, session_id: str) -> Optional[int]:
+        """Drop old events once a session exceeds max_events; returns the number kept, if compacted."""
+        key = (app_name, user_id, session_id)
+        count = self._db.execute("SELECT COUNT(*) FROM events WHERE app_name = ? AND user_id = ? AND session_id = ?",
+                                 key).fetchone()[0]
+        if count <= self.max_events:
+            return None
+        rows = self._db.execute(
+            "SELECT seq, is_user_turn FROM events WHERE app_name = ? AND user_id = ? AND session_id = ?"
+            " ORDER BY seq DESC LIMIT ?", key + (self.keep_events,)).fetchall()
+        # Start the kept window at its oldest user turn; without one, keep the window as is.
+        user_turns = [seq for seq, is_user in rows if is_user]
+        first = min(user_turns) if user_turns else rows[-1][0]
+        self._db.execute("DELETE FROM events WHERE app_name = ? AND user_id = ? AND session_id = ? AND seq < ?",
+                         key + (first,))
+        return sum(1 for seq, _ in rows if seq >= first)
+
+    # -- BaseSessionService --
+
+    async def create_session(self, *, app_name: str, user_id: str, state: Optional[Dict[str, Any]] = None,
+                             session_id: Optional[str] = None) -> Session:
+        return await asyncio.to_thread(self._create, app_name, user_id, state or {}, session_id)
+
+    def _create(self, app_name: str, user_id: str, state: Dict[str, Any], session_id: Optional[str]) -> Session:
+        session_id = (session_id or "").strip() or str(uuid.uuid4())
+        now = time.time()
+        with self._lock:
+            self._purge(now)
+            exists = self._db.execute("SELECT 1 FROM sessions WHERE app_name = ? AND user_id = ? AND id = ?",
+                                      (app_name, user_id, session_id)).fetchone()
+            if exists:
+                raise ValueError(f"Session with id {session_id} already exists.")
+            self._db.execute(
+                "INSERT INTO sessions (app_name, user_id, id, state, created_at, updated_at) VALUES (?, ?, ?, '{}', ?, ?)",
+                (app_name, user_id, session_id, now, now))
+            self._save_state(app_name, user_id, session_id, state)
+            self._db.commit()
+            session_state = self._load_state("sessions", "app_name = ? AND user_id = ? AND id = ?",
+                                             (app_name, user_id, session_id))
+            merged = self._merged_state(app_name, user_id, session_state)
+        return Session(id=session_id, app_name=app_name, user_id=user_id, state=merged, last_update_time=now)
+
+    async def get_session(self, *, app_name: str, user_id: str, session_id: str,
+                          config: Optional[GetSessionConfig] = None) -> Optional[Session]:
+        return await asyncio.to_thread(self._get, app_name, user_id, session_id, config)
+
+    def _get(self, app_name: str, user_id: str, session_id: str,
+             config: Optional[GetSessionConfig]) -> Optional[Session]:
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT state, updated_at FROM sessions WHERE app_name = ? AND user_id = ? AND id = ?",
+                                   (app_name, user_id, session_id)).fetchone()
+            if row is None:
+                return None
+            if row[1] < now - self.ttl:
+                self._delete(app_name, user_id, session_id)
+                self._db.commit()
+                return None
+            where = "app_name = ? AND user_id = ? AND session_id = ?"
+            params: List[Any] = [app_name, user_id, session_id]
+            if config is not None and config.after_timestamp is not None:
+                where += " AND timestamp >= ?"
+                params.append(config.after_timestamp)
+            if config is not None and config.num_recent_events is not None:
+                sql = (f"SELECT event FROM (SELECT seq, event FROM events WHERE {where} ORDER BY seq DESC LIMIT ?)"
+                       " ORDER BY seq")
+                params.append(config.num_recent_events)
+            else:
+                sql = f"SELECT event FROM events WHERE {where} ORDER BY seq"
+            events = [Event.model_validate_json(r[0]) for r in self._db.execute(sql, params).fetchall()]
+            state = self._merged_state(app_name, user_id, json.loads(row[0]))
+        return Session(id=session_id, app_name=app_name, user_id=user_id, state=state, events=events,
+                       last_update_time=row[1])
+
+    async def list_sessions(self, *, app_name: str, user_id: Optional[str] = None) -> ListSessionsResponse:
+        return await asyncio.to_thread(self._list, app_name, user_id)
+
+    def _list(self, app_name: str, user_id: Optional[str]) -> ListSessionsResponse:
+        with self._lock:
+            self._purge(time.time())
+            sql = "SELECT user_id, id, updated_at FROM sessions WHERE app_name = ?"
+            params: List[Any] = [app_name]
+            if user_id is not None:
+                sql += " AND user_id = ?"
+                params.append(user_id)
+            rows = self._db.execute(sql + " ORDER BY updated_at", params).fetchall()
+        return ListSessionsResponse(sessions=[
+            Session(id=sid, app_name=app_name, user_id=uid, state={}, events=[], last_update_time=updated)
+            for uid, sid, updated in rows
+        ])
+
+    async def delete_session(self, *, app_name: str, user_id: str, session_id: str) -> None:
+        def delete() -> None:
+            with self._lock:
+                self._delete(app_name, user_id, session_id)
+                self._db.commit()
+
+        await asyncio.to_thread(delete)
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        if event.partial:
+            return event
+        event = await super().append_event(session, event)
+        await asyncio.to_thread(self._append, session, event)
+        return event
+
+    def _append(self, session: Session, event: Event) -> None:
+        now = time.time()
+        is_user_turn = event.author == "user" and not event.get_function_responses()
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO events (app_name, user_id, session_id, timestamp, is_user_turn, event)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (session.app_name, session.user_id, session.id, event.timestamp, int(is_user_turn),
+                 event.model_dump_json(exclude_none=True)))
+            if event.actions and event.actions.state_delta:
+                self._save_state(session.app_name, session.user_id, session.id, event.actions.state_delta)
+            self._db.execute("UPDATE sessions SET updated_at = ? WHERE app_name = ? AND user_id = ? AND id = ?",
+                             (now, session.app_name, session.user_id, session.id))
+            kept = self._compact(session.app_name, session.user_id, session.id)
+            self._db.commit()
+            self._purge(now)
+        if kept is not None and len(session.events) > kept:
+            # Keep the in-memory session of the running turn in line with what is stored.
+            del session.events[:len(session.events) - kept]
+        session.last_update_time = now
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            sessions = self._db.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+            events = self._db.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+        return {"sessions": sessions, "events": events, "ttlSeconds": self.ttl,
+                "maxEventsPerSession": self.max_events, "keepEventsOnCompaction": self.keep_events}
@@ -0,0 +1,137 @@
+"""
+snapshot.py - Portable library snapshots (chunks, metadata, embeddings, pages) for Docs-MCP
+
+A snapshot is one compressed NPZ file with columnar arrays:
+
+    header          JSON: format, model, dim, source filters, counts
+    embeddings      float32 [chunks, dim]
+    chunk_text      UTF-8 text of all chunks, concatenated; chunk_offsets marks the boundaries
+    chunk_meta      JSON metadata per chunk (same layout)
+    page_text       page markdown, concatenated (same layout, page_offsets)
+    page_meta       JSON {"page_id", "url", ...} per page (same layout)
+
+Strings are stored as one uint8 buffer plus int64 offsets so no pickling is
+needed. Importing loads the vectors straight into the store without embedding.
+"""
+
+import json
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from store import CORE_FIELDS, VectorStore
+
+FORMAT = "docs-mcp-snapshot/1"
+
+
+def _pack_strings(values: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    encoded = [v.encode("utf-8") for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(e) for e in encoded], out=offsets[1:])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+def _unpack_strings(data: np.ndarray, offsets: np.ndarray) -> List[str]:
+    raw = data.tobytes()
+    return [raw[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(len(offsets) - 1)]
+
+
+def export_snapshot(store: VectorStore, filters: Dict[str, Any], path: str, model: str) -> Dict[str, Any]:
+    """Write every chunk (and page) matching filters to `path`; returns the header."""
+    rows = [r for r in store.rows(filters, with_embeddings=True) if r["document"]]
+    if not rows:
+        raise ValueError(f"No chunks match {filters}")
+    vectors = np.asarray([r["embedding"] for r in rows], dtype=np.float32)
+
+    pages: Dict[str, Dict[str, Any]] = {}
+    for r in rows:
+        meta = r["metadata"]
+        if meta.get("page_id"):
+            pages.setdefault(meta["page_id"], {f: meta.get(f) for f in CORE_FIELDS})
+    page_text: Dict[str, str] = {}
+    for project in {str(m["project"]) for m in pages.values()}:
+        ids = [pid for pid, m in pages.items() if str(m["project"]) == project]
+        page_text.update(store.get_pages(project, ids))
+    page_ids = [pid for pid in pages if pid in page_text]
+
+    header = {
+        "format": FORMAT,
+        "model": model,
+        "dim": int(vectors.shape[1]),
+        "filters": filters,
+        "chunks": len(rows),
+        "pages": len(page_ids),
+        "createdAt": time.time(),
+    }
+    chunk_text, chunk_offsets = _pack_strings([r["document"] for r in rows])
+    chunk_meta, chunk_meta_offsets = _pack_strings([json.dumps(r["metadata"]) for r in rows])
+    ptext, page_offsets = _pack_strings([page_text[pid] for pid in page_ids])
+    pmeta, page_meta_offsets = _pack_strings([json.dumps({"page_id": pid, **pages[pid]}) for pid in page_ids])
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = f"{path}.tmp.npz"
+    np.savez_compressed(
+        tmp,
+        header=np.frombuffer(json.dumps(header).encode("utf-8"), dtype=np.uint8),
+        embeddings=vectors,
+        chunk_text=chunk_text, chunk_offsets=chunk_offsets,
+        chunk_meta=chunk_meta, chunk_meta_offsets=chunk_meta_offsets,
+        page_text=ptext, page_offsets=page_offsets,
+        page_meta=pmeta, page_meta_offsets=page_meta_offsets,
+    )
+    os.replace(tmp, path)
+    return {**header, "path": path, "bytes": os.path.getsize(path)}
+
+
+def import_snapshot(store: VectorStore, path: str, model: str, dim: Optional[int],
+                    overrides: Dict[str, str], page_id: Callable[[Dict[str, Any], str], str],
+                    replace: bool = True, batch_size: int = 1000) -> Dict[str, Any]:
+    """Load a snapshot into `store` without embedding.
+
+    The snapshot's model (and dimension, if given) must match the store's.
+    `overrides` replaces core fields (e.g. a different project) in every chunk and
+    page. `page_id(meta, url)` recomputes page ids for the target library so later
+    scrapes of the same pages reuse the imported chunks. With replace, chunks
+    already stored for the target libraries are deleted first.
+    """
+    with np.load(path, allow_pickle=False) as data:
+        header = json.loads(data["header"].tobytes().decode("utf-8"))
+        if header.get("format") != FORMAT:
+            raise ValueError(f"Unsupported snapshot format: {header.get('format')}")
+        if header["model"] != model:
+            raise ValueError(f"Snapshot was embedded with {header['model']}, but this index uses {model}")
+        if dim is not None and header["dim"] != dim:
+            raise ValueError(f"Snapshot dimension {header['dim']} does not match index dimension {dim}")
+        vectors = data["embeddings"]
+        texts = _unpack_strings(data["chunk_text"], data["chunk_offsets"])
+        metas = [json.loads(m) for m in _unpack_strings(data["chunk_meta"], data["chunk_meta_offsets"])]
+        page_texts = _unpack_strings(data["page_text"], data["page_offsets"])
+        page_metas = [json.loads(m) for m in _unpack_strings(data["page_meta"], data["page_meta_offsets"])]
+
+    def target(meta: Dict[str, Any]) -> Dict[str, Any]:
+        meta = {**meta, **{k: v for k, v in overrides.items() if v}}
+        base = {f: meta.get(f) for f in ("project", "library", "version", "content_type")}
+        if meta.get("url") is not None:
+            meta["page_id"] = page_id(base, meta["url"])
+        return meta
+
+    page_metas = [target(m) for m in page_metas]
+    metas = [target(m) if m.get("page_id") else {**m, **{k: v for k, v in overrides.items() if v}}
+             for m in metas]
+
+    removed = 0
+    if replace:
+        libraries = {tuple(m.get(f) for f in ("project", "library", "version", "content_type")) for m in metas}
+        for project, library, version, content_type in libraries:
+            removed += store.delete({"project": project, "library": library, "version": version,
+                                     "content_type": content_type})
+
+    for meta, text in zip(page_metas, page_texts):
+        page_meta = {f: meta.get(f) for f in CORE_FIELDS}
+        store.put_page(page_meta, meta["page_id"], text)
+    for i in range(0, len(texts), batch_size):
+        store.add_embeddings(texts[i:i + batch_size], vectors[i:i + batch_size].tolist(), metas[i:i + batch_size])
+
+    return {**header, "chunksImported": len(texts), "pagesImported": len(page_texts), "chunksReplaced": removed}
@@ -0,0 +1,1243 @@
+"""
+store.py - Vector storage backends for Docs-MCP
+
+DOCS_MCP_STORE=pgvector (default): langchain_postgres PGVector tables in Postgres.
+DOCS_MCP_STORE=local: vectors in a memory-mapped NumPy file, metadata in SQLite.
+
+Both backends keep every Docs-MCP project in its own partition.
+"""
+
+import abc
+import asyncio
+import contextlib
+import hashlib
+import json
+import os
+import re
+import shutil
+import sqlite3
+import threading
+import uuid
+import zlib
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+# Metadata keys that every chunk carries; the local backend keeps them as real columns.
+CORE_FIELDS = ("project", "library", "version", "content_type", "url")
+
+
+class VectorStore(abc.ABC):
+    """Storage interface used by the Docs-MCP tools.
+
+    Search returns (Document, distance) pairs where distance is cosine distance
+    (0 = identical), matching PGVector's default strategy.
+    """
+
+    def __init__(self, embeddings):
+        self.embeddings = embeddings
+
+    def hold_writes(self):
+        """Context manager around a group of writes that must land in the same index."""
+        return contextlib.nullcontext()
+
+    def add(self, texts: List[str], metadatas: List[Dict[str, Any]], ids: Optional[List[str]] = None) -> int:
+        if not texts:
+            return 0
+        vectors = self.embeddings.embed_documents(texts)
+        return self.add_embeddings(texts, vectors, metadatas, ids)
+
+    @abc.abstractmethod
+    def add_embeddings(self, texts: List[str], embeddings: List[List[float]], metadatas: List[Dict[str, Any]],
+                       ids: Optional[List[str]] = None) -> int:
+        """Store chunks with precomputed vectors; ids are generated unless given."""
+        raise NotImplementedError
+
+    def search(self, query: str, k: int, filters: Dict[str, Any]) -> List[Tuple[Document, float]]:
+        return self.search_by_vector(self.embeddings.embed_query(query), k, filters)
+
+    def search_by_vector(self, embedding: List[float], k: int, filters: Dict[str, Any]) -> List[Tuple[Document, float]]:
+        results = self._search_by_vector(embedding, k, filters)
+        texts = self._hydrate([(d.metadata, d.page_content) for d, _ in results])
+        for (d, _), text in zip(results, texts):
+            d.page_content = text
+        return results
+
+    @abc.abstractmethod
+    def _search_by_vector(self, embedding: List[float], k: int, filters: Dict[str, Any]) -> List[Tuple[Document, float]]:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def delete(self, filters: Dict[str, Any]) -> int:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def distinct_values(self, field: str, filters: Optional[Dict[str, Any]] = None) -> List[str]:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def project_stats(self) -> List[Tuple[str, str, str, int, int]]:
+        """Rows of (project, library, version, chunk_count, unique_url_count)."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def url_stats(self, filters: Dict[str, Any]) -> List[Tuple[str, str, str, str, str, int]]:
+        """Rows of (project, library, version, content_type, url, chunk_count)."""
+        raise NotImplementedError
+
+    def rows(self, filters: Dict[str, Any], with_embeddings: bool = False) -> List[Dict[str, Any]]:
+        """All stored chunks matching filters as dicts with id, document, metadata (and embedding)."""
+        return self._hydrate_rows(self._rows(filters, with_embeddings))
+
+    def iter_rows(self, filters: Dict[str, Any], batch_size: int = 500,
+                  hydrate: bool = True) -> Iterator[List[Dict[str, Any]]]:
+        """Chunks matching filters in id order, in batches of at most batch_size (without embeddings).
+
+        With hydrate=False, chunks stored as page offsets keep their empty stored text.
+        """
+        after = ""
+        while True:
+            rows = self._rows_after(filters, after, batch_size)
+            if not rows:
+                return
+            yield self._hydrate_rows(rows) if hydrate else rows
+            if len(rows) < batch_size:
+                return
+            after = rows[-1]["id"]
+
+    def rows_by_ids(self, project: str, ids: List[str], hydrate: bool = True) -> List[Dict[str, Any]]:
+        """Chunks of a project by id (without embeddings); unknown ids are skipped."""
+        rows = self._rows_by_ids(project, list(ids)) if ids else []
+        return self._hydrate_rows(rows) if hydrate else rows
+
+    def _hydrate_rows(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        texts = self._hydrate([(r["metadata"], r["document"]) for r in rows])
+        for r, text in zip(rows, texts):
+            r["document"] = text
+        return rows
+
+    @abc.abstractmethod
+    def _rows(self, filters: Dict[str, Any], with_embeddings: bool = False) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def _rows_after(self, filters: Dict[str, Any], after: str, limit: int) -> List[Dict[str, Any]]:
+        """Up to limit chunks matching filters with id > after, ordered by id."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def _rows_by_ids(self, project: str, ids: List[str]) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def chunk_hashes(self, filters: Dict[str, Any]) -> Dict[Optional[str], List[str]]:
+        """Map chunk_hash -> chunk ids for stored chunks matching filters."""
+        out: Dict[Optional[str], List[str]] = {}
+        for r in self.rows(filters):
+            out.setdefault(r["metadata"].get("chunk_hash"), []).append(r["id"])
+        return out
+
+    @abc.abstractmethod
+    def delete_ids(self, project: str, ids: List[str]) -> int:
+        """Delete chunks of a project by id."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def update_offsets(self, project: str, offsets: Dict[str, Tuple[int, int]]) -> None:
+        """Point existing chunks (by id) at new (start, end) offsets within their page."""
+        raise NotImplementedError
+
+    # -- page store --
+    # Chunks that carry a page_id keep no text of their own: their text is
+    # page[start:end] of the page stored once, compressed, under that id.
+
+    @abc.abstractmethod
+    def put_page(self, meta: Dict[str, Any], page_id: str, content: str) -> None:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_pages(self, project: str, page_ids: List[str]) -> Dict[str, str]:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def delete_pages(self, filters: Dict[str, Any]) -> int:
+        raise NotImplementedError
+
+    def _hydrate(self, items: List[Tuple[Dict[str, Any], str]]) -> List[str]:
+        """Chunk texts for (metadata, stored_text) pairs, sliced from the page store where needed."""
+        pages: Dict[Tuple[str, str], str] = {}
+        for project, ids in _pages_wanted(items).items():
+            for page_id, content in self.get_pages(project, ids).items():
+                pages[(project, page_id)] = content
+        return _slice_pages(items, pages)
+
+    @abc.abstractmethod
+    def projects(self) -> List[str]:
+        """Names of all projects that have a partition."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def drop_project(self, project: str) -> int:
+        """Drop a project's partition; returns the number of chunks removed."""
+        raise NotImplementedError
+
+    # -- async API used by the MCP tools --
+    # Defaults run the sync implementation in a worker thread; backends with a
+    # native async driver override the read paths.
+
+    async def asearch(self, query: str, k: int, filters: Dict[str, Any]) -> List[Tuple[Document, float]]:
+        embedding = await asyncio.to_thread(self.embeddings.embed_query, query)
+        return await self.asearch_by_vector(embedding, k, filters)
+
+    async def asearch_by_vector(self, embedding: List[float], k: int,
+                                filters: Dict[str, Any]) -> List[Tuple[Document, float]]:
+        results = await self._asearch_by_vector(embedding, k, filters)
+        items = [(d.metadata, d.page_content) for d, _ in results]
+        pages: Dict[Tuple[str, str], str] = {}
+        for project, ids in _pages_wanted(items).items():
+            for page_id, content in (await self.aget_pages(project, ids)).items():
+                pages[(project, page_id)] = content
+        for (d, _), text in zip(results, _slice_pages(items, pages)):
+            d.page_content = text
+        return results
+
+    async def asearch_any(self, query: str, k: int,
+                          filters: List[Dict[str, Any]]) -> List[Tuple[Document, float]]:
+        """Top k chunks matching any of several filters: one query embedding, the
+        filters searched concurrently, results merged by distance."""
+        if not filters:
+            return []
+        embedding = await asyncio.to_thread(self.embeddings.embed_query, query)
+        results = await asyncio.gather(*(self.asearch_by_vector(embedding, k, f) for f in filters))
+        return _merge_results(list(results), k)
+
+    async def _asearch_by_vector(self, embedding, k, filters):
+        return await asyncio.to_thread(self._search_by_vector, embedding, k, filters)
+
+    async def aget_pages(self, project: str, page_ids: List[str]) -> Dict[str, str]:
+        return await asyncio.to_thread(self.get_pages, project, page_ids)
+
+    async def adelete(self, filters: Dict[str, Any]) -> int:
+        return await asyncio.to_thread(self.delete, filters)
+
+    async def adistinct_values(self, field: str, filters: Optional[Dict[str, Any]] = None) -> List[str]:
+        return await asyncio.to_thread(self.distinct_values, field, filters)
+
+    async def aproject_stats(self) -> List[Tuple[str, str, str, int, int]]:
+        return await asyncio.to_thread(self.project_stats)
+
+    async def aurl_stats(self, filters: Dict[str, Any]) -> List[Tuple[str, str, str, str, str, int]]:
+        return await asyncio.to_thread(self.url_stats, filters)
+
+    async def aprojects(self) -> List[str]:
+        return await asyncio.to_thread(self.projects)
+
+    async def adrop_project(self, project: str) -> int:
+        return await asyncio.to_thread(self.drop_project, project)
+
+
+def _pages_wanted(items: List[Tuple[Dict[str, Any], str]]) -> Dict[str, List[str]]:
+    """project -> page ids needed to rebuild the text of chunks stored without it."""
+    wanted: Dict[str, set] = {}
+    for meta, text in items:
+        if not text and meta.get("page_id"):
+            wanted.setdefault(str(meta.get("project", "")), set()).add(meta["page_id"])
+    return {project: sorted(ids) for project, ids in wanted.items()}
+
+
+def _slice_pages(items: List[Tuple[Dict[str, Any], str]], pages: Dict[Tuple[str, str], str]) -> List[str]:
+    out = []
+    for meta, text in items:
+        page = None if text else pages.get((str(meta.get("project", "")), meta.get("page_id")))
+        out.append(page[int(meta["start"]):int(meta["end"])] if page is not None else text)
+    return out
+
+
+def _stored_text(text: str, meta: Dict[str, Any]) -> str:
+    return "" if meta.get("page_id") else text
+
+
+def _pack(text: str) -> bytes:
+    return zlib.compress(text.encode("utf-8"), 6)
+
+
+def _unpack(data: bytes) -> str:
+    return zlib.decompress(bytes(data)).decode("utf-8")
+
+
+def _merge_results(results: List[List[Tuple[Document, float]]], k: int) -> List[Tuple[Document, float]]:
+    merged = [r for part in results for r in part]
+    merged.sort(key=lambda r: r[1])
+    return merged[:k]
+
+
+# ---- Postgres / pgvector ----
+
+
+class PGVectorStore(VectorStore):
+    """PGVector backend with one langchain collection per project.
+
+    Project `p` lives in collection "<collection>:<p>", so a project's queries only
+    touch rows with its collection_id (served by ix_docs_mcp_partition). All
+    collections share langchain's langchain_pg_embedding table, so dropping a
+    project is still a DELETE of its rows (one indexed statement), not a table drop.
+    Rows written before partitioning, in the bare "<collection>", are moved on startup.
+
+    Sync calls borrow connections from the SQLAlchemy engine pool that the PGVector
+    partitions use; async reads use a psycopg AsyncConnectionPool.
+
+    Page markdown is kept zlib-compressed in docs_mcp_pages, keyed by
+    (collection, page_id).
+    """
+
+    def __init__(self, embeddings, collection: str, dsn: str, pool_size: int = 10):
+        super().__init__(embeddings)
+        self.collection = collection
+        self.dsn = dsn
+        self.pool_size = pool_size
+        self._partitions: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self._pool = None
+        self._pool_lock = asyncio.Lock()
+        self._engine = None
+        self._engine_lock = threading.Lock()
+        # The legacy collection also makes langchain create its tables before we index them.
+        self._legacy = self._pgvector(collection)
+        self._ensure_indexes()
+        self._migrate_legacy()
+
+    def _get_engine(self):
+        with self._engine_lock:
+            if self._engine is None:
+                from sqlalchemy import create_engine
+                # One engine, and so one connection pool, shared by every project's PGVector
+                self._engine = create_engine(self.dsn.replace("postgresql://", "postgresql+psycopg://", 1),
+                                             pool_size=self.pool_size, pool_pre_ping=True)
+            return self._engine
+
+    def _pgvector(self, name: str):
+        from langchain_postgres import PGVector
+        return PGVector(
+            embeddings=self.embeddings,
+            collection_name=name,
+            connection=self._get_engine(),
+            use_jsonb=True,
+        )
+
+    @contextlib.contextmanager
+    def _connect(self):
+        """A pooled psycopg connection; the block's work is committed when it exits cleanly."""
+        raw = self._get_engine().raw_connection()
+        try:
+            yield raw.driver_connection
+            raw.commit()
+        except BaseException:
+            raw.rollback()
+            raise
+        finally:
+            raw.close()
+
+    def _partition_name(self, project: str) -> str:
+        return f"{self.collection}:{project}"
+
+    def _partition(self, project: str):
+        with self._lock:
+            vector = self._partitions.get(project)
+            if vector is None:
+                vector = self._pgvector(self._partition_name(project))
+                self._partitions[project] = vector
+            return vector
+
+    def _ensure_indexes(self) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS ix_docs_mcp_partition ON langchain_pg_embedding "
+                "(collection_id, (cmetadata ->> 'library'), (cmetadata ->> 'version'))"
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS docs_mcp_pages (
+                    collection TEXT NOT NULL,
+                    page_id TEXT NOT NULL,
+                    library TEXT,
+                    version TEXT,
+                    content_type TEXT,
+                    url TEXT,
+                    content BYTEA NOT NULL,
+                    PRIMARY KEY (collection, page_id)
+                )
+                """
+            )
+            # Tables created by earlier versions carried an unused full-text column and GIN index.
+            conn.execute("ALTER TABLE docs_mcp_pages DROP COLUMN IF EXISTS fts")
+
+    def _migrate_legacy(self) -> None:
+        """Move rows written before partitioning into their projects' partitions (a no-op once done)."""
+        legacy = "(SELECT uuid FROM langchain_pg_collection WHERE name = %s)"
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT DISTINCT cmetadata ->> 'project' FROM langchain_pg_embedding "
+                f"WHERE collection_id = {legacy} AND coalesce(cmetadata ->> 'project', '') <> ''",
+                [self.collection],
+            ).fetchall()
+        if not rows:
+            return
+        for (project,) in rows:
+            self._partition(project)
+        with self._connect() as conn:
+            cur = conn.execute(
+                f"UPDATE langchain_pg_embedding e SET collection_id = c.uuid FROM langchain_pg_collection c "
+                f"WHERE e.collection_id = {legacy} AND c.name = %s || (e.cmetadata ->> 'project')",
+                [self.collection, self.collection + ":"],
+            )
+            print(f"Moved {cur.rowcount} legacy chunks of {len(rows)} projects into per-project partitions")
+
+    def _like_prefix(self) -> str:
+        escaped = self.collection.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        return escaped + ":%"
+
+    def _where(self, filters: Optional[Dict[str, Any]]) -> Tuple[str, List[Any]]:
+        filters = dict(filters or {})
+        project = filters.pop("project", None)
+        if project is not None:
+            clauses = ["collection_id = (SELECT uuid FROM langchain_pg_collection WHERE name = %s)"]
+            params: List[Any] = [self._partition_name(str(project))]
+        else:
+            clauses = ["collection_id IN (SELECT uuid FROM langchain_pg_collection WHERE name LIKE %s)"]
+            params = [self._like_prefix()]
+        for k, v in filters.items():
+            clauses.append("(cmetadata ->> %s) = %s")
+            params.extend([k, str(v)])
+        return " AND ".join(clauses), params
+
+    def add_embeddings(self, texts, embeddings, metadatas, ids=None) -> int:
+        if not texts:
+            return 0
+        ids = ids or [str(uuid.uuid4()) for _ in texts]
+        by_project: Dict[str, List[int]] = {}
+        for i, meta in enumerate(metadatas):
+            by_project.setdefault(str(meta.get("project", "")), []).append(i)
+        for project, idx in by_project.items():
+            self._partition(project).add_embeddings(
+                texts=[_stored_text(texts[i], metadatas[i]) for i in idx],
+                embeddings=[list(map(float, embeddings[i])) for i in idx],
+                metadatas=[metadatas[i] for i in idx],
+                ids=[ids[i] for i in idx],
+            )
+        return len(texts)
+
+    def _search_sql(self, embedding, k, filters) -> Tuple[str, List[Any]]:
+        # One query across all of the store's partitions; with a project filter it
+        # only touches that partition's rows. Same cosine distance langchain uses.
+        where, params = self._where(filters)
+        vector = "[" + ",".join(repr(float(x)) for x in embedding) + "]"
+        sql = (f"SELECT id, document, cmetadata, embedding <=> %s::vector AS distance "
+               f"FROM langchain_pg_embedding WHERE {where} ORDER BY distance LIMIT %s")
+        return sql, [vector] + params + [int(k)]
+
+    @staticmethod
+    def _search_results(rows) -> List[Tuple[Document, float]]:
+        return [(Document(page_content=doc or "", metadata=meta or {}, id=str(cid)), float(dist))
+                for cid, doc, meta, dist in rows]
+
+    def _search_by_vector(self, embedding, k, filters):
+        sql, params = self._search_sql(embedding, k, filters)
+        with self._connect() as conn:
+            return self._search_results(conn.execute(sql, params).fetchall())
+
+    # -- async read paths over a shared psycopg pool --
+
+    async def _apool(self):
+        if self._pool is None:
+            async with self._pool_lock:
+                if self._pool is None:
+                    from psycopg_pool import AsyncConnectionPool
+                    pool = AsyncConnectionPool(self.dsn, min_size=1, max_size=self.pool_size, open=False)
+                    await pool.open()
+                    self._pool = pool
+        return self._pool
+
+    async def _afetch(self, sql: str, params: List[Any]) -> List[Tuple]:
+        pool = await self._apool()
+        async with pool.connection() as conn:
+            cur = await conn.execute(sql, params)
+            return await cur.fetchall()
+
+    async def aclose(self) -> None:
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+
+    async def _asearch_by_vector(self, embedding, k, filters):
+        sql, params = self._search_sql(embedding, k, filters)
+        return self._search_results(await self._afetch(sql, params))
+
+    async def aget_pages(self, project, page_ids) -> Dict[str, str]:
+        if not page_ids:
+            return {}
+        rows = await self._afetch(
+            "SELECT page_id, content FROM docs_mcp_pages WHERE collection = %s AND page_id = ANY(%s)",
+            [self._partition_name(project), list(page_ids)],
+        )
+        return {pid: _unpack(content) for pid, content in rows}
+
+    async def adistinct_values(self, field, filters=None) -> List[str]:
+        where, params = self._where(filters)
+        rows = await self._afetch(
+            f"SELECT DISTINCT cmetadata ->> %s AS v FROM langchain_pg_embedding WHERE {where}", [field] + params
+        )
+        return [r[0] for r in rows if r and r[0]]
+
+    async def aproject_stats(self):
+        return await self._afetch(*self._project_stats_sql())
+
+    async def aurl_stats(self, filters):
+        return await self._afetch(*self._url_stats_sql(filters))
+
+    async def aprojects(self) -> List[str]:
+        rows = await self._afetch("SELECT name FROM langchain_pg_collection WHERE name LIKE %s", [self._like_prefix()])
+        prefix = len(self.collection) + 1
+        return sorted(r[0][prefix:] for r in rows)
+
+    def delete(self, filters) -> int:
+        if set(filters) == {"project"}:
+            return self.drop_project(str(filters["project"]))
+        where, params = self._where(filters)
+        with self._connect() as conn:
+            with conn.cursor() as cur:
+                cur.execute(f"DELETE FROM langchain_pg_embedding WHERE {where}", params)
+                deleted = cur.rowcount or 0
+        if set(filters) <= set(CORE_FIELDS):
+            self.delete_pages(filters)
+        return deleted
+
+    def _page_where(self, filters: Dict[str, Any]) -> Tuple[str, List[Any]]:
+        filters = dict(filters)
+        project = filters.pop("project", None)
+        if project is not None:
+            clauses = ["collection = %s"]
+            params: List[Any] = [self._partition_name(str(project))]
+        else:
+            clauses = ["collection LIKE %s"]
+            params = [self._like_prefix()]
+        for k, v in filters.items():
+            if k not in CORE_FIELDS:
+                raise ValueError(f"Pages cannot be filtered by {k}")
+            clauses.append(f"{k} = %s")
+            params.append(str(v))
+        return " AND ".join(clauses), params
+
+    def put_page(self, meta, page_id, content) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                """
+                INSERT INTO docs_mcp_pages (collection, page_id, library, version, content_type, url, content)
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
+                ON CONFLICT (collection, page_id) DO UPDATE
+                SET content = EXCLUDED.content
+                """,
+                [self._partition_name(str(meta["project"])), page_id, meta.get("library"), meta.get("version"),
+                 meta.get("content_type"), meta.get("url"), _pack(content)],
+            )
+
+    def get_pages(self, project, page_ids) -> Dict[str, str]:
+        if not page_ids:
+            return {}
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT page_id, content FROM docs_mcp_pages WHERE collection = %s AND page_id = ANY(%s)",
+                [self._partition_name(project), list(page_ids)],
+            ).fetchall()
+        return {pid: _unpack(content) for pid, content in rows}
+
+    def delete_pages(self, filters) -> int:
+        where, params = self._page_where(filters)
+        with self._connect() as conn:
+            return conn.execute(f"DELETE FROM docs_mcp_pages WHERE {where}", params).rowcount or 0
+
+    def update_offsets(self, project, offsets) -> None:
+        if not offsets:
+            return
+        where, params = self._where({"project": project})
+        with self._connect() as conn:
+            with conn.cursor() as cur:
+                cur.executemany(
+                    "UPDATE langchain_pg_embedding SET cmetadata = cmetadata || "
+                    f"jsonb_build_object('start', %s::int, 'end', %s::int) WHERE {where} AND id = %s",
+                    [[start, end] + params + [cid] for cid, (start, end) in offsets.items()],
+                )
+
+    def chunk_hashes(self, filters):
+        where, params = self._where(filters)
+        out: Dict[Optional[str], List[str]] = {}
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT id, cmetadata ->> 'chunk_hash' FROM langchain_pg_embedding WHERE {where}", params
+            ).fetchall()
+        for cid, digest in rows:
+            out.setdefault(digest, []).append(str(cid))
+        return out
+
+    def delete_ids(self, project, ids) -> int:
+        if not ids:
+            return 0
+        where, params = self._where({"project": project})
+        with self._connect() as conn:
+            cur = conn.execute(f"DELETE FROM langchain_pg_embedding WHERE {where} AND id = ANY(%s)",
+                               params + [list(ids)])
+            return cur.rowcount or 0
+
+    def projects(self) -> List[str]:
+        with self._connect() as conn:
+            rows = conn.execute("SELECT name FROM langchain_pg_collection WHERE name LIKE %s",
+                                [self._like_prefix()]).fetchall()
+        prefix = len(self.collection) + 1
+        return sorted(r[0][prefix:] for r in rows)
+
+    def drop_project(self, project: str) -> int:
+        name = self._partition_name(project)
+        with self._connect() as conn:
+            # Deleting the rows directly reports the count without a separate COUNT(*) scan.
+            count = conn.execute(
+                "DELETE FROM langchain_pg_embedding "
+                "WHERE collection_id = (SELECT uuid FROM langchain_pg_collection WHERE name = %s)",
+                [name],
+            ).rowcount or 0
+            conn.execute("DELETE FROM langchain_pg_collection WHERE name = %s", [name])
+            conn.execute("DELETE FROM docs_mcp_pages WHERE collection = %s", [name])
+        with self._lock:
+            self._partitions.pop(project, None)
+        return count
+
+    def distinct_values(self, field, filters=None) -> List[str]:
+        where, params = self._where(filters)
+        sql = f"SELECT DISTINCT cmetadata ->> %s AS v FROM langchain_pg_embedding WHERE {where}"
+        with self._connect() as conn:
+            with conn.cursor() as cur:
+                cur.execute(sql, [field] + params)
+                rows = cur.fetchall()
+        return [r[0] for r in rows if r and r[0]]
+
+    def _project_stats_sql(self) -> Tuple[str, List[Any]]:
+        where, params = self._where(None)
+        sql = f"""
+        SELECT
+            cmetadata ->> 'project' as project,
+            cmetadata ->> 'library' as library,
+            cmetadata ->> 'version' as version,
+            COUNT(*) as document_count,
+            COUNT(DISTINCT cmetadata ->> 'url') as unique_url_count
+        FROM langchain_pg_embedding
+        WHERE {where}
+        AND cmetadata ->> 'project' IS NOT NULL
+        AND cmetadata ->> 'library' IS NOT NULL
+        GROUP BY cmetadata ->> 'project', cmetadata ->> 'library', cmetadata ->> 'version'
+        ORDER BY project, library, version
+        """
+        return sql, params
+
+    def project_stats(self):
+        sql, params = self._project_stats_sql()
+        with self._connect() as conn:
+            with conn.cursor() as cur:
+                cur.execute(sql, params)
+                return cur.fetchall()
+
+    def _url_stats_sql(self, filters) -> Tuple[str, List[Any]]:
+        where, params = self._where(filters)
+        sql = f"""
+        SELECT
+            cmetadata ->> 'project' as project,
+            cmetadata ->> 'library' as library,
+            cmetadata ->> 'version' as version,
+            cmetadata ->> 'content_type' as content_type,
+            cmetadata ->> 'url' as url,
+            COUNT(*) as chunk_count
+        FROM langchain_pg_embedding
+        WHERE {where}
+        GROUP BY
+            cmetadata ->> 'project',
+            cmetadata ->> 'library',
+            cmetadata ->> 'version',
+            cmetadata ->> 'content_type',
+            cmetadata ->> 'url'
+        ORDER BY project, library, version, content_type, url
+        """
+        return sql, params
+
+    def url_stats(self, filters):
+        sql, params = self._url_stats_sql(filters)
+        with self._connect() as conn:
+            with conn.cursor() as cur:
+                cur.execute(sql, params)
+                return cur.fetchall()
+
+    def _rows(self, filters, with_embeddings=False):
+        where, params = self._where(filters)
+        cols = "id, document, cmetadata" + (", embedding::text" if with_embeddings else "")
+        with self._connect() as conn:
+            with conn.cursor() as cur:
+                cur.execute(f"SELECT {cols} FROM langchain_pg_embedding WHERE {where}", params)
+                rows = cur.fetchall()
+        out = []
+        for r in rows:
+            item = {"id": str(r[0]), "document": r[1], "metadata": r[2] or {}}
+            if with_embeddings:
+                item["embedding"] = json.loads(r[3])
+            out.append(item)
+        return out
+
+    def _rows_after(self, filters, after, limit):
+        where, params = self._where(filters)
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT id, document, cmetadata FROM langchain_pg_embedding WHERE {where} AND id > %s "
+                f"ORDER BY id LIMIT %s", params + [after, int(limit)],
+            ).fetchall()
+        return [{"id": str(cid), "document": doc, "metadata": meta or {}} for cid, doc, meta in rows]
+
+    def _rows_by_ids(self, project, ids):
+        where, params = self._where({"project": project})
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT id, document, cmetadata FROM langchain_pg_embedding WHERE {where} AND id = ANY(%s)",
+                params + [list(ids)],
+            ).fetchall()
+        return [{"id": str(cid), "document": doc, "metadata": meta or {}} for cid, doc, meta in rows]
+
+
+# ---- Embedded: memory-mapped vectors + SQLite ----
+
+
+class _LocalPartition(VectorStore):
+    """One project's slice of the embedded backend.
+
+    Vectors live in an append-only float32 memmap (`vectors.f32`); each SQLite row
+    points at its slot. Deletes leave dead slots behind; once there are at least
+    COMPACT_MIN_DEAD of them and they outnumber live rows, the memmap is rewritten
+    with only live vectors. With index="ivf", rows are assigned to k-means lists once
+    the partition holds IVF_MIN_ROWS chunks and only the `nprobe` closest lists are scanned.
+    """
+
+    IVF_MIN_ROWS = 4096
+    COMPACT_MIN_DEAD = 1024
+
+    def __init__(self, embeddings, path: str, index: str = "flat", nprobe: int = 8):
+        super().__init__(embeddings)
+        if index not in ("flat", "ivf"):
+            raise ValueError(f"Unknown local index type: {index}")
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.index = index
+        self.nprobe = nprobe
+        self._lock = threading.RLock()
+        self._vec_path = os.path.join(path, "vectors.f32")
+        self._centroid_path = os.path.join(path, "centroids.npy")
+
+        self._db = sqlite3.connect(os.path.join(path, "meta.db"), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS chunks (
+                slot INTEGER PRIMARY KEY,
+                id TEXT UNIQUE NOT NULL,
+                project TEXT, library TEXT, version TEXT, content_type TEXT, url TEXT,
+                document TEXT NOT NULL,
+                cmetadata TEXT NOT NULL,
+                list_id INTEGER NOT NULL DEFAULT -1
+            );
+            CREATE INDEX IF NOT EXISTS ix_chunks_lib ON chunks (project, library, content_type, version);
+            CREATE INDEX IF NOT EXISTS ix_chunks_list ON chunks (list_id);
+            CREATE TABLE IF NOT EXISTS store_meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS pages (
+                page_id TEXT PRIMARY KEY,
+                library TEXT, version TEXT, content_type TEXT, url TEXT,
+                content BLOB NOT NULL
+            );
+            """
+        )
+        self._db.commit()
+
+        self._finish_compaction()
+        dim = self._get_meta("dim")
+        self._dim: Optional[int] = int(dim) if dim else None
+        self._slots = int(self._get_meta("slots") or 0)
+        self._mm: Optional[np.memmap] = None
+        if self._dim and os.path.exists(self._vec_path):
+            self._open_memmap()
+        self._centroids: Optional[np.ndarray] = None
+        if index == "ivf" and os.path.exists(self._centroid_path):
+            self._centroids = np.load(self._centroid_path)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._mm is not None:
+                self._mm.flush()
+                self._mm = None
+            self._db.close()
+
+    # -- bookkeeping --
+
+    def _get_meta(self, key: str) -> Optional[str]:
+        row = self._db.execute("SELECT value FROM store_meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: Any) -> None:
+        self._db.execute("INSERT OR REPLACE INTO store_meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    def _open_memmap(self) -> None:
+        capacity = os.path.getsize(self._vec_path) // (self._dim * 4)
+        self._mm = np.memmap(self._vec_path, dtype=np.float32, mode="r+", shape=(capacity, self._dim))
+
+    def _ensure_capacity(self, needed: int) -> None:
+        capacity = self._mm.shape[0] if self._mm is not None else 0
+        if needed <= capacity:
+            return
+        new_capacity = max(needed, capacity * 2, 1024)
+        if self._mm is not None:
+            self._mm.flush()
+            self._mm = None
+        with open(self._vec_path, "ab") as f:
+            f.truncate(new_capacity * self._dim * 4)
+        self._open_memmap()
+
+    def _finish_compaction(self) -> None:
+        """Complete or discard a compaction interrupted between writing vectors and swapping files."""
+        tmp = f"{self._vec_path}.compact"
+        if self._get_meta("compacting"):
+            if os.path.exists(tmp):
+                os.replace(tmp, self._vec_path)
+            self._db.execute("DELETE FROM store_meta WHERE key = 'compacting'")
+            self._db.commit()
+        elif os.path.exists(tmp):
+            os.remove(tmp)
+
+    def _maybe_compact(self) -> None:
+        if self._mm is None:
+            return
+        live = self._db.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+        dead = self._slots - live
+        if dead < self.COMPACT_MIN_DEAD or dead <= live:
+            return
+        slots = [r[0] for r in self._db.execute("SELECT slot FROM chunks ORDER BY slot")]
+        tmp = f"{self._vec_path}.compact"
+        capacity = max(live, 1024)
+        packed = np.memmap(tmp, dtype=np.float32, mode="w+", shape=(capacity, self._dim))
+        for i in range(0, live, 8192):
+            batch = slots[i:i + 8192]
+            packed[i:i + len(batch)] = self._mm[batch]
+        packed.flush()
+        del packed
+        # Slots only move down and keep their order, so renumbering in ascending order never collides.
+        self._db.executemany("UPDATE chunks SET slot = ? WHERE slot = ?",
+                             [(new, old) for new, old in enumerate(slots) if new != old])
+        self._slots = live
+        self._set_meta("slots", live)
+        self._set_meta("compacting", 1)
+        self._db.commit()
+        self._mm.flush()
+        self._mm = None
+        self._finish_compaction()
+        self._open_memmap()
+
+    @staticmethod
+    def _field(key: str) -> Tuple[str, List[Any]]:
+        if key in CORE_FIELDS:
+            return key, []
+        return "json_extract(cmetadata, ?)", [f"$.{key}"]
+
+    def _where(self, filters: Optional[Dict[str, Any]]) -> Tuple[str, List[Any]]:
+        clauses = ["1 = 1"]
+        params: List[Any] = []
+        for k, v in (filters or {}).items():
+            expr, p = self._field(k)
+            clauses.append(f"{expr} = ?")
+            params.extend(p + [str(v)])
+        return " AND ".join(clauses), params
+
+    # -- writes --
+
+    def add_embeddings(self, texts, embeddings, metadatas, ids=None) -> int:
+        if not texts:
+            return 0
+        ids = ids or [str(uuid.uuid4()) for _ in texts]
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        with self._lock:
+            if self._dim is None:
+                self._dim = int(vectors.shape[1])
+                self._set_meta("dim", self._dim)
+            elif vectors.shape[1] != self._dim:
+                raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match store dimension {self._dim}")
+
+            start = self._slots
+            self._ensure_capacity(start + len(texts))
+            self._mm[start:start + len(texts)] = vectors
+            self._mm.flush()
+
+            lists = self._assign_lists(vectors)
+            self._db.executemany(
+                "INSERT OR IGNORE INTO chunks"
+                " (slot, id, project, library, version, content_type, url, document, cmetadata, list_id)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (start + i, ids[i], *(meta.get(f) for f in CORE_FIELDS),
+                     _stored_text(text, meta), json.dumps(meta), int(lists[i]))
+                    for i, (text, meta) in enumerate(zip(texts, metadatas))
+                ],
+            )
+            self._slots = start + len(texts)
+            self._set_meta("slots", self._slots)
+            self._db.commit()
+            self._maybe_train()
+        return len(texts)
+
+    def delete(self, filters) -> int:
+        where, params = self._where(filters)
+        with self._lock:
+            cur = self._db.execute(f"DELETE FROM chunks WHERE {where}", params)
+            self._db.commit()
+            deleted = cur.rowcount or 0
+            self._maybe_compact()
+        if set(filters) <= set(CORE_FIELDS):
+            self.delete_pages(filters)
+        return deleted
+
+    def put_page(self, meta, page_id, content) -> None:
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO pages (page_id, library, version, content_type, url, content)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (page_id, meta.get("library"), meta.get("version"), meta.get("content_type"), meta.get("url"),
+                 _pack(content)),
+            )
+            self._db.commit()
+
+    def get_pages(self, project, page_ids) -> Dict[str, str]:
+        if not page_ids:
+            return {}
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT page_id, content FROM pages WHERE page_id IN ({','.join('?' * len(page_ids))})", list(page_ids)
+            ).fetchall()
+        return {pid: _unpack(content) for pid, content in rows}
+
+    def delete_pages(self, filters) -> int:
+        clauses = ["1 = 1"]
+        params: List[Any] = []
+        for k, v in filters.items():
+            if k == "project":
+                continue
+            if k not in CORE_FIELDS:
+                raise ValueError(f"Pages cannot be filtered by {k}")
+            clauses.append(f"{k} = ?")
+            params.append(str(v))
+        with self._lock:
+            cur = self._db.execute(f"DELETE FROM pages WHERE {' AND '.join(clauses)}", params)
+            self._db.commit()
+            return cur.rowcount or 0
+
+    def update_offsets(self, project, offsets) -> None:
+        with self._lock:
+            self._db.executemany(
+                "UPDATE chunks SET cmetadata = json_set(cmetadata, '$.start', ?, '$.end', ?) WHERE id = ?",
+                [(start, end, cid) for cid, (start, end) in offsets.items()],
+            )
+            self._db.commit()
+
+    def delete_ids(self, project, ids) -> int:
+        with self._lock:
+            cur = self._db.executemany("DELETE FROM chunks WHERE id = ?", [(cid,) for cid in ids])
+            self._db.commit()
+            self._maybe_compact()
+            return cur.rowcount or 0
+
+    # -- IVF --
+
+    def _assign_lists(self, vectors: np.ndarray) -> np.ndarray:
+        if self._centroids is None:
+            return np.full(len(vectors), -1, dtype=np.int64)
+        return np.argmax(vectors @ self._centroids.T, axis=1)
+
+    def _maybe_train(self) -> None:
+        if self.index != "ivf":
+            return
+        live = self._db.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+        trained = int(self._get_meta("ivf_trained_rows") or 0)
+        if live < self.IVF_MIN_ROWS or (self._centroids is not None and live < trained * 2):
+            return
+        self._train(live)
+
+    def _train(self, live: int, iterations: int = 10, sample: int = 50_000) -> None:
+        slots = np.asarray([r[0] for r in self._db.execute("SELECT slot FROM chunks")], dtype=np.int64)
+        rng = np.random.default_rng(0)
+        nlist = max(1, int(np.sqrt(live)))
+        train = self._mm[rng.choice(slots, size=min(sample, len(slots)), replace=False)]
+        centroids = train[rng.choice(len(train), size=nlist, replace=False)].copy()
+        # Spherical k-means: vectors are normalized, so assignment is by max dot product.
+        for _ in range(iterations):
+            assign = np.argmax(train @ centroids.T, axis=1)
+            for c in range(nlist):
+                members = train[assign == c]
+                if len(members):
+                    centroid = members.mean(axis=0)
+                    centroids[c] = centroid / (np.linalg.norm(centroid) or 1.0)
+        self._centroids = centroids.astype(np.float32)
+        np.save(self._centroid_path, self._centroids)
+
+        lists = np.empty(len(slots), dtype=np.int64)
+        for i in range(0, len(slots), 8192):
+            lists[i:i + 8192] = self._assign_lists(self._mm[slots[i:i + 8192]])
+        self._db.executemany("UPDATE chunks SET list_id = ? WHERE slot = ?",
+                             [(int(l), int(s)) for l, s in zip(lists, slots)])
+        self._set_meta("ivf_trained_rows", live)
+        self._db.commit()
+
+    # -- reads --
+
+    def _search_by_vector(self, embedding, k, filters):
+        q = np.asarray(embedding, dtype=np.float32)
+        where, params = self._where(filters)
+        with self._lock:
+            if self._mm is None:
+                return []
+            if self._centroids is not None:
+                probe = np.argsort(-(self._centroids @ q))[: self.nprobe]
+                where += f" AND list_id IN ({','.join('?' * len(probe))})"
+                params = params + [int(p) for p in probe]
+            slots = np.asarray([r[0] for r in self._db.execute(f"SELECT slot FROM chunks WHERE {where}", params)],
+                               dtype=np.int64)
+            if not len(slots):
+                return []
+            scores = self._mm[slots] @ q
+            top = np.argsort(-scores)[:k] if len(scores) <= k else np.argpartition(-scores, k)[:k]
+            top = top[np.argsort(-scores[top])]
+            chosen = [int(slots[i]) for i in top]
+            rows = self._db.execute(
+                f"SELECT slot, id, document, cmetadata FROM chunks WHERE slot IN ({','.join('?' * len(chosen))})",
+                chosen,
+            ).fetchall()
+        by_slot = {r[0]: r for r in rows}
+        out = []
+        for i in top:
+            slot, cid, document, meta = by_slot[int(slots[i])]
+            out.append((Document(id=cid, page_content=document, metadata=json.loads(meta)), 1.0 - float(scores[i])))
+        return out
+
+    def distinct_values(self, field, filters=None) -> List[str]:
+        expr, fparams = self._field(field)
+        where, params = self._where(filters)
+        with self._lock:
+            rows = self._db.execute(f"SELECT DISTINCT {expr} FROM chunks WHERE {where}", fparams + params).fetchall()
+        return [r[0] for r in rows if r and r[0]]
+
+    def chunk_hashes(self, filters):
+        where, params = self._where(filters)
+        out: Dict[Optional[str], List[str]] = {}
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT id, json_extract(cmetadata, '$.chunk_hash') FROM chunks WHERE {where}", params).fetchall()
+        for cid, digest in rows:
+            out.setdefault(digest, []).append(cid)
+        return out
+
+    def project_stats(self):
+        with self._lock:
+            return self._db.execute(
+                """
+                SELECT project, library, version, COUNT(*), COUNT(DISTINCT url)
+                FROM chunks
+                WHERE project IS NOT NULL AND library IS NOT NULL
+                GROUP BY project, library, version
+                ORDER BY project, library, version
+                """
+            ).fetchall()
+
+    def url_stats(self, filters):
+        where, params = self._where(filters)
+        with self._lock:
+            return self._db.execute(
+                f"""
+                SELECT project, library, version, content_type, url, COUNT(*)
+                FROM chunks
+                WHERE {where}
+                GROUP BY project, library, version, content_type, url
+                ORDER BY project, library, version, content_type, url
+                """,
+                params,
+            ).fetchall()
+
+    def _rows(self, filters, with_embeddings=False):
+        where, params = self._where(filters)
+        with self._lock:
+            rows = self._db.execute(f"SELECT slot, id, document, cmetadata FROM chunks WHERE {where}", params).fetchall()
+            out = []
+            for slot, cid, document, meta in rows:
+                item = {"id": cid, "document": document, "metadata": json.loads(meta)}
+                if with_embeddings:
+                    item["embedding"] = self._mm[slot].tolist()
+                out.append(item)
+        return out
+
+    def _rows_after(self, filters, after, limit):
+        where, params = self._where(filters)
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT id, document, cmetadata FROM chunks WHERE {where} AND id > ? ORDER BY id LIMIT ?",
+                params + [after, int(limit)],
+            ).fetchall()
+        return [{"id": cid, "document": document, "metadata": json.loads(meta)} for cid, document, meta in rows]
+
+    def projects(self) -> List[str]:
+        with self._lock:
+            project = self._get_meta("project")
+        return [project] if project is not None else []
+
+    def drop_project(self, project: str) -> int:
+        """Close the partition and remove its directory."""
+        with self._lock:
+            count = self._db.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+        self.close()
+        shutil.rmtree(self.path, ignore_errors=True)
+        return count
+
+    def _rows_by_ids(self, project, ids):
+        out = []
+        with self._lock:
+            # Stay well below SQLite's bound-parameter limit
+            for i in range(0, len(ids), 500):
+                part = ids[i:i + 500]
+                rows = self._db.execute(
+                    f"SELECT id, document, cmetadata FROM chunks WHERE id IN ({','.join('?' * len(part))})", part,
+                ).fetchall()
+                out.extend({"id": cid, "document": document, "metadata": json.loads(meta)}
+                           for cid, document, meta in rows)
+        return out
+
+
+class LocalVectorStore(VectorStore):
+    """Embedded backend for dev boxes and small deployments.
+
+    Each project is a separate directory under `<path>/projects/` with its own
+    memmap and SQLite file, so dropping a project is a directory removal.
+    """
+
+    def __init__(self, embeddings, path: str, index: str = "flat", nprobe: int = 8):
+        super().__init__(embeddings)
+        if index not in ("flat", "ivf"):
+            raise ValueError(f"Unknown local index type: {index}")
+        self.path = path
+        self.index = index
+        self.nprobe = nprobe
+        self._root = os.path.join(path, "projects")
+        os.makedirs(self._root, exist_ok=True)
+        self._lock = threading.Lock()
+        self._partitions: Dict[str, _LocalPartition] = {}
+        for name in os.listdir(self._root):
+            part = _LocalPartition(self.embeddings, os.path.join(self._root, name), index, nprobe)
+            project = part._get_meta("project")
+            if project is not None:
+                self._partitions[project] = part
+
+    @staticmethod
+    def _dirname(project: str) -> str:
+        slug = re.sub(r"[^A-Za-z0-9_.-]", "_", project)[:48]
+        return f"{slug}-{hashlib.sha1(project.encode('utf-8')).hexdigest()[:8]}"
+
+    def _partition(self, project: str, create: bool = False) -> Optional[_LocalPartition]:
+        with self._lock:
+            part = self._partitions.get(project)
+            if part is None and create:
+                part = _LocalPartition(self.embeddings, os.path.join(self._root, self._dirname(project)),
+                                       self.index, self.nprobe)
+                part._set_meta("project", project)
+                part._db.commit()
+                self._partitions[project] = part
+            return part
+
+    def _targets(self, filters: Optional[Dict[str, Any]]) -> List[_LocalPartition]:
+        project = (filters or {}).get("project")
+        if project is not None:
+            part = self._partition(str(project))
+            return [part] if part is not None else []
+        with self._lock:
+            return list(self._partitions.values())
+
+    def add_embeddings(self, texts, embeddings, metadatas, ids=None) -> int:
+        if not texts:
+            return 0
+        by_project: Dict[str, List[int]] = {}
+        for i, meta in enumerate(metadatas):
+            by_project.setdefault(str(meta.get("project", "")), []).append(i)
+        for project, idx in by_project.items():
+            self._partition(project, create=True).add_embeddings(
+                [texts[i] for i in idx], [embeddings[i] for i in idx], [metadatas[i] for i in idx],
+                [ids[i] for i in idx] if ids else None)
+        return len(texts)
+
+    def _search_by_vector(self, embedding, k, filters):
+        return _merge_results([p._search_by_vector(embedding, k, filters) for p in self._targets(filters)], k)
+
+    def delete(self, filters) -> int:
+        if set(filters) == {"project"}:
+            return self.drop_project(str(filters["project"]))
+        return sum(p.delete(filters) for p in self._targets(filters))
+
+    def delete_ids(self, project, ids) -> int:
+        part = self._partition(project)
+        return part.delete_ids(project, ids) if part is not None else 0
+
+    def chunk_hashes(self, filters):
+        out: Dict[Optional[str], List[str]] = {}
+        for p in self._targets(filters):
+            for digest, ids in p.chunk_hashes(filters).items():
+                out.setdefault(digest, []).extend(ids)
+        return out
+
+    def distinct_values(self, field, filters=None) -> List[str]:
+        values: List[str] = []
+        for p in self._targets(filters):
+            values.extend(v for v in p.distinct_values(field, filters) if v not in values)
+        return values
+
+    def project_stats(self):
+        return sorted((r for p in self._targets(None) for r in p.project_stats()),
+                      key=lambda r: tuple(x or "" for x in r[:3]))
+
+    def url_stats(self, filters):
+        return sorted((r for p in self._targets(filters) for r in p.url_stats(filters)),
+                      key=lambda r: tuple(x or "" for x in r[:5]))
+
+    def _rows(self, filters, with_embeddings=False):
+        return [r for p in self._targets(filters) for r in p._rows(filters, with_embeddings)]
+
+    def _rows_after(self, filters, after, limit):
+        rows = [r for p in self._targets(filters) for r in p._rows_after(filters, after, limit)]
+        return sorted(rows, key=lambda r: r["id"])[:limit]
+
+    def _rows_by_ids(self, project, ids):
+        part = self._partition(project)
+        return part._rows_by_ids(project, ids) if part is not None else []
+
+    def update_offsets(self, project, offsets) -> None:
+        part = self._partition(project)
+        if part is not None:
+            part.update_offsets(project, offsets)
+
+    def put_page(self, meta, page_id, content) -> None:
+        self._partition(str(meta["project"]), create=True).put_page(meta, page_id, content)
+
+    def get_pages(self, project, page_ids) -> Dict[str, str]:
+        part = self._partition(project)
+        return part.get_pages(project, page_ids) if part is not None else {}
+
+    def delete_pages(self, filters) -> int:
+        return sum(p.delete_pages(filters) for p in self._targets(filters))
+
+    def projects(self) -> List[str]:
+        with self._lock:
+            return sorted(self._partitions)
+
+    def drop_project(self, project: str) -> int:
+        with self._lock:
+            part = self._partitions.pop(project, None)
+        return part.drop_project(project) if part is not None else 0
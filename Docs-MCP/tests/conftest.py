@@ -0,0 +1,37 @@
+import hashlib
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# The Docs-MCP modules are imported as top-level modules, as server.py and main.py do.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class HashEmbeddings:
+    """Deterministic bag-of-words embeddings, so texts sharing words end up close."""
+
+    def __init__(self, dim: int = 64, salt: str = ""):
+        self.dim = dim
+        self.salt = salt
+        self.calls = 0
+
+    def _vector(self, text: str):
+        v = np.zeros(self.dim, dtype=np.float32)
+        for word in text.lower().split():
+            v[int(hashlib.sha1((self.salt + word).encode("utf-8")).hexdigest(), 16) % self.dim] += 1.0
+        norm = np.linalg.norm(v)
+        return (v / norm if norm else v).tolist()
+
+    def embed_documents(self, texts):
+        self.calls += 1
+        return [self._vector(t) for t in texts]
+
+    def embed_query(self, text):
+        return self._vector(text)
+
+
+@pytest.fixture
+def embeddings():
+    return HashEmbeddings()
@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+
+from admission import AdmissionController, Overloaded
+
+
+def test_concurrency_is_bounded():
+    async def run():
+        controller = AdmissionController(max_concurrent=2, max_queue=10)
+        running = peak = 0
+
+        async def turn(i):
+            nonlocal running, peak
+            ticket = await controller.acquire(f"session-{i}")
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            controller.release(ticket)
+
+        await asyncio.gather(*(turn(i) for i in range(6)))
+        return peak, controller.stats()
+
+    peak, stats = asyncio.run(run())
+    assert peak == 2
+    assert stats["admitted"] == 6 and stats["active"] == 0 and stats["sessions"] == 0
+
+
+def test_burst_beyond_the_queue_is_rejected():
+    async def run():
+        controller = AdmissionController(max_concurrent=1, max_queue=2, queue_timeout=0.05)
+        results = await asyncio.gather(*(controller.acquire(i) for i in range(5)), return_exceptions=True)
+        return controller, results
+
+    controller, results = asyncio.run(run())
+    stats = controller.stats()
+    # One runs, two wait (and time out, since nothing releases) and two are turned away at once.
+    assert sum(1 for r in results if not isinstance(r, Overloaded)) == 1
+    assert stats["rejected"] == 2 and stats["timedOut"] == 2
+    assert all(r.retry_after >= 1 for r in results if isinstance(r, Overloaded))
+
+
+def test_queue_timeout_raises_overloaded():
+    async def run():
+        controller = AdmissionController(max_concurrent=1, max_queue=1, queue_timeout=0.05)
+        ticket = await controller.acquire("a")
+        with pytest.raises(Overloaded):
+            await controller.acquire("b")
+        controller.release(ticket)
+        return controller.stats()
+
+    stats = asyncio.run(run())
+    assert stats["timedOut"] == 1 and stats["queued"] == 0 and stats["sessions"] == 0
+
+
+def test_turns_on_one_session_are_serialised():
+    async def run():
+        controller = AdmissionController(max_concurrent=4, max_queue=4)
+        order = []
+
+        async def turn(name):
+            ticket = await controller.acquire("same-session")
+            order.append(f"{name} start")
+            await asyncio.sleep(0.01)
+            order.append(f"{name} end")
+            controller.release(ticket)
+
+        await asyncio.gather(turn("a"), turn("b"))
+        return order
+
+    assert asyncio.run(run()) == ["a start", "a end", "b start", "b end"]
@@ -0,0 +1,36 @@
+from archive import PageArchive
+
+LIB = {"project": "acme", "library": "widgets", "version": "1.0", "content_type": "docs"}
+
+
+def test_latest_returns_the_newest_fetch_per_url(tmp_path):
+    archive = PageArchive(str(tmp_path))
+    archive.append("https://acme.test/a", b"<html>first</html>", "text/html", 200, LIB)
+    archive.append("https://acme.test/b", b"%PDF-1.7 binary\n\x00data", "application/pdf", 200, LIB)
+    archive.append("https://acme.test/a", b"<html>second</html>", "text/html", 200, LIB)
+    archive.append("https://acme.test/a", b"<html>other</html>", "text/html", 200, {**LIB, "project": "beta"})
+
+    records = list(archive.latest(LIB))
+    assert [r["url"] for r in records] == ["https://acme.test/a", "https://acme.test/b"]
+    assert archive.read(records[0]) == b"<html>second</html>"
+    assert archive.read(records[1]) == b"%PDF-1.7 binary\n\x00data"
+    assert records[1]["mime"] == "application/pdf"
+    assert archive.stats()["records"] == 4 and archive.stats()["urls"] == 2
+
+
+def test_latest_filters_by_url_prefix(tmp_path):
+    archive = PageArchive(str(tmp_path))
+    archive.append("https://acme.test/docs/a", b"a", "text/html", 200, LIB)
+    archive.append("https://acme.test/blog/b", b"b", "text/html", 200, LIB)
+    assert [r["url"] for r in archive.latest(LIB, "https://acme.test/docs/")] == ["https://acme.test/docs/a"]
+
+
+def test_archive_survives_reopen_and_rolls_segments(tmp_path, monkeypatch):
+    monkeypatch.setattr(PageArchive, "SEGMENT_BYTES", 1)
+    archive = PageArchive(str(tmp_path))
+    archive.append("https://acme.test/a", b"a" * 100, "text/html", 200, LIB)
+    archive.append("https://acme.test/b", b"b" * 100, "text/html", 200, LIB)
+
+    records = list(PageArchive(str(tmp_path)).latest(LIB))
+    assert len({r["segment"] for r in records}) == 2
+    assert [archive.read(r) for r in records] == [b"a" * 100, b"b" * 100]
@@ -0,0 +1,37 @@
+from checkpoint import CrawlCheckpoint
+
+
+def test_checkpoint_round_trip(tmp_path):
+    checkpoint = CrawlCheckpoint(str(tmp_path), "acme", "https://acme.test/docs")
+    assert not checkpoint.exists() and not checkpoint.load()
+    checkpoint.frontier.extend([("https://acme.test/docs/a", 1), ("https://acme.test/docs/b", 2)])
+    checkpoint.seen.update({"https://acme.test/docs", "https://acme.test/docs/a"})
+    checkpoint.status["https://acme.test/docs"] = "indexed"
+    checkpoint.pages_total = 1
+    checkpoint.save({"maxPages": 50})
+
+    resumed = CrawlCheckpoint(str(tmp_path), "acme", "https://acme.test/docs")
+    assert resumed.load()
+    assert list(resumed.frontier) == list(checkpoint.frontier)
+    assert resumed.seen == checkpoint.seen
+    assert resumed.status == {"https://acme.test/docs": "indexed"}
+    assert resumed.pages_total == 1
+
+    resumed.clear()
+    assert not resumed.exists()
+    resumed.clear()
+
+
+def test_checkpoints_are_keyed_by_crawl(tmp_path):
+    a = CrawlCheckpoint(str(tmp_path), "acme", "https://acme.test/docs")
+    b = CrawlCheckpoint(str(tmp_path), "beta", "https://acme.test/docs")
+    a.save()
+    assert a.path != b.path
+    assert not b.exists()
+
+
+def test_unreadable_checkpoint_is_ignored(tmp_path):
+    checkpoint = CrawlCheckpoint(str(tmp_path), "acme")
+    with open(checkpoint.path, "w", encoding="utf-8") as f:
+        f.write('{"frontier": [')
+    assert not checkpoint.load()
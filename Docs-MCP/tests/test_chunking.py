@@ -0,0 +1,75 @@
+import random
+
+import pytest
+
+from chunking import cdc_spans, child_spans, chunk_spans, section_spans
+
+
+def _page(lines: int = 2000, seed: int = 1) -> str:
+    rng = random.Random(seed)
+    words = ["alpha", "beta", "gamma", "delta", "api", "config", "returns", "value", "the", "a"]
+    out = []
+    for i in range(lines):
+        if i % 97 == 0:
+            out.append(f"## Section {i}\n")
+        out.append(" ".join(rng.choice(words) for _ in range(rng.randint(3, 14))) + "\n")
+    return "".join(out)
+
+
+def _contiguous(text, spans):
+    return spans[0][0] == 0 and spans[-1][1] == len(text) and all(a[1] == b[0] for a, b in zip(spans, spans[1:]))
+
+
+def test_fixed_windows_overlap():
+    text = "x" * 3000
+    assert chunk_spans(text) == [(0, 1200), (800, 2000), (1600, 2800), (2400, 3000)]
+    assert chunk_spans("") == []
+
+
+def test_unknown_mode_raises():
+    with pytest.raises(ValueError):
+        chunk_spans("text", "sentences")
+
+
+def test_cdc_spans_are_contiguous_and_bounded():
+    text = _page()
+    spans = cdc_spans(text)
+    assert _contiguous(text, spans)
+    assert all(b - a <= 2000 for a, b in spans)
+    assert all(b - a >= 400 for a, b in spans[:-1])
+
+
+def test_cdc_resynchronises_after_an_edit():
+    text = _page()
+    edited = text[:500] + "an inserted line\n" + text[500:]
+    before = {text[a:b] for a, b in cdc_spans(text)}
+    after = {edited[a:b] for a, b in cdc_spans(edited)}
+    # Only the chunk containing the edit changes.
+    assert len(before - after) <= 2
+
+
+def test_cdc_cuts_long_lines_at_whitespace():
+    text = " ".join(["word"] * 2000)
+    spans = cdc_spans(text)
+    assert _contiguous(text, spans)
+    assert all(text[b - 1] == " " for _, b in spans[:-1])
+
+
+def test_cdc_does_not_split_at_headings_inside_code_fences():
+    text = "intro line\n" * 60 + "```\n# not a heading\n```\n" + "more text\n" * 10
+    starts = {a for a, _ in cdc_spans(text)}
+    assert text.index("# not a heading") not in starts
+
+
+def test_sections_start_at_headings():
+    text = "intro\n# One\nbody\n```\n# comment\n```\n## Two\nmore\n"
+    spans = section_spans(text)
+    assert [text[a:b].splitlines()[0] for a, b in spans] == ["intro", "# One", "## Two"]
+
+
+def test_child_spans_stay_within_sections():
+    text = _page(400)
+    sections = section_spans(text, 1000)
+    for a, b in child_spans(text, 200, 1000):
+        assert b - a <= 200
+        assert any(sa <= a and b <= sb for sa, sb in sections)
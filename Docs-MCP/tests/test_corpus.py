@@ -0,0 +1,45 @@
+from corpus import CorpusRegistry, corpus_key
+
+
+def test_corpus_is_unreferenced_only_after_the_last_detach(tmp_path):
+    registry = CorpusRegistry(str(tmp_path / "corpora.json"))
+    registry.attach("alpha", "react", "18", "docs")
+    registry.attach("beta", "react", "18", "docs")
+    registry.attach("alpha", "react", "18", "docs")
+    assert registry.attached(library="react")[0]["projects"] == ["alpha", "beta"]
+
+    result = registry.detach("alpha", "react")
+    assert [c["projects"] for c in result["detached"]] == [["beta"]]
+    assert result["unreferenced"] == []
+
+    result = registry.detach("beta", "react", "18", "docs")
+    assert len(result["detached"]) == 1
+    assert [corpus_key(c["library"], c["version"], c["content_type"]) for c in result["unreferenced"]] == \
+        ["react@18 [docs]"]
+    assert registry.attached() == []
+
+
+def test_detach_matches_only_the_given_fields(tmp_path):
+    registry = CorpusRegistry(str(tmp_path / "corpora.json"))
+    registry.attach("alpha", "react", "18", "docs")
+    registry.attach("alpha", "react", "19", "docs")
+    registry.attach("alpha", "vue", "3", "docs")
+
+    assert registry.detach("alpha", "react", "20")["detached"] == []
+    result = registry.detach("alpha", "react")
+    assert sorted(c["version"] for c in result["unreferenced"]) == ["18", "19"]
+    assert [c["library"] for c in registry.attached("alpha")] == ["vue"]
+    assert registry.attached("beta") == []
+
+
+def test_references_survive_a_restart(tmp_path):
+    path = str(tmp_path / "state" / "corpora.json")
+    registry = CorpusRegistry(path)
+    registry.attach("alpha", "react", "18", "docs")
+    registry.attach("beta", "react", "18", "docs")
+    registry.detach("alpha")
+
+    reloaded = CorpusRegistry(path)
+    assert reloaded.attached("beta", "react")[0]["projects"] == ["beta"]
+    assert reloaded.detach("beta")["unreferenced"][0]["library"] == "react"
+    assert CorpusRegistry(path).attached() == []
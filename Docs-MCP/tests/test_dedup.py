@@ -0,0 +1,52 @@
+from dedup import BoilerplateFilter, NearDuplicateIndex, simhash
+
+
+def test_learned_boilerplate_is_stripped_once_frequent():
+    f = BoilerplateFilter(min_pages=3, ratio=0.5)
+    pages = [f"Site nav: Home Docs Blog\n\nPage {i} explains feature {i}.\n" for i in range(4)]
+    for page in pages:
+        f.observe("site", page)
+    cleaned = f.clean("site", pages[0])
+    assert "Site nav" not in cleaned
+    assert "Page 0 explains feature 0." in cleaned
+    assert f.removed == 1
+
+
+def test_learned_boilerplate_is_per_site():
+    f = BoilerplateFilter(min_pages=2, ratio=0.5)
+    for _ in range(3):
+        f.observe("a", "Shared footer line\n")
+    assert "Shared footer line" in f.clean("b", "Shared footer line\n")
+
+
+def test_headings_and_code_are_never_boilerplate():
+    f = BoilerplateFilter(min_pages=1, ratio=0.0)
+    page = "# Install\n```\npip install x\n```\n"
+    for _ in range(5):
+        f.observe("site", page)
+    assert f.clean("site", page) == page
+
+
+def test_known_phrases_only_match_whole_lines():
+    f = BoilerplateFilter()
+    text = ("[Edit this page](https://example.com/edit)\n"
+            "Privacy Policy | Terms of Use\n"
+            "Copyright 2024 Example Inc.\n"
+            "Read the privacy policy before storing user data.\n")
+    assert f.clean("site", text) == "Read the privacy policy before storing user data.\n"
+
+
+def test_simhash_is_close_for_similar_text():
+    a = simhash("the quick brown fox jumps over the lazy dog near the river bank today")
+    b = simhash("the quick brown fox jumps over the lazy dog near the river bank")
+    c = simhash("completely different content about database connection pooling settings")
+    assert bin(a ^ b).count("1") < bin(a ^ c).count("1")
+
+
+def test_near_duplicate_index():
+    index = NearDuplicateIndex(max_distance=3)
+    text = "Configure the client with an API key and a base URL before sending requests. " * 3
+    assert not index.seen(text)
+    assert index.seen(text)
+    assert not index.seen("An unrelated paragraph about rendering charts with custom colour palettes.")
+    assert index.skipped == 1
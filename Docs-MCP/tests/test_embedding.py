@@ -0,0 +1,94 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from embedding import EmbeddingScheduler
+
+
+class _Model:
+    """Records every model call; blocks while `gate` is cleared."""
+
+    def __init__(self):
+        self.batches = []
+        self.gate = threading.Event()
+        self.gate.set()
+        self.entered = threading.Event()
+
+    def embed_documents(self, texts):
+        self.entered.set()
+        self.gate.wait(5)
+        if "boom" in texts:
+            raise RuntimeError("model failed")
+        self.batches.append(list(texts))
+        return [[float(len(t)), 1.0] for t in texts]
+
+
+def test_concurrent_requests_share_model_calls():
+    model = _Model()
+    scheduler = EmbeddingScheduler(model, max_batch=32, max_latency=0.05)
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(lambda i: scheduler.embed_documents([f"text {i}", f"more {i}"]), range(8)))
+    assert results[3] == [[6.0, 1.0], [6.0, 1.0]]
+    assert len(model.batches) < 8
+    assert sum(len(b) for b in model.batches) == 16
+    assert scheduler.stats()["batching"]["batches"] == len(model.batches)
+
+
+def test_large_requests_are_split_at_max_batch():
+    model = _Model()
+    scheduler = EmbeddingScheduler(model, max_batch=4, max_latency=0.0)
+    vectors = scheduler.embed_documents([str(i) for i in range(10)])
+    assert len(vectors) == 10
+    assert max(len(b) for b in model.batches) <= 4
+
+
+def test_queries_run_before_queued_ingestion_and_are_never_mixed():
+    model = _Model()
+    scheduler = EmbeddingScheduler(model, max_batch=2, max_latency=0.0)
+    model.gate.clear()
+    with ThreadPoolExecutor(4) as pool:
+        first = pool.submit(scheduler.embed_documents, ["ingest-0"])
+        assert model.entered.wait(5)
+        # The worker is busy; queue more ingestion, then a query.
+        ingest = pool.submit(scheduler.embed_documents, [f"ingest-{i}" for i in range(1, 7)])
+        while scheduler.stats()["lanes"]["ingest"]["queued"] < 6:
+            time.sleep(0.001)
+        query = pool.submit(scheduler.embed_query, "query")
+        while scheduler.stats()["lanes"]["query"]["queued"] < 1:
+            time.sleep(0.001)
+        model.gate.set()
+        first.result(5), ingest.result(5), query.result(5)
+    assert model.batches[1] == ["query"]
+    assert all(b == ["query"] or all(t.startswith("ingest") for t in b) for b in model.batches)
+
+
+def test_model_errors_reach_the_caller():
+    scheduler = EmbeddingScheduler(_Model(), max_latency=0.0)
+    with pytest.raises(RuntimeError, match="model failed"):
+        scheduler.embed_documents(["boom"])
+    assert scheduler.embed_query("still works") == [11.0, 1.0]
+
+
+def test_ingest_connections_are_limited():
+    scheduler = EmbeddingScheduler(_Model(), ingest_connections=2)
+    active = peak = 0
+    lock = threading.Lock()
+
+    def write(_):
+        nonlocal active, peak
+        with scheduler.connection("ingest"):
+            with lock:
+                active += 1
+                peak = max(peak, active)
+            time.sleep(0.01)
+            with lock:
+                active -= 1
+
+    with ThreadPoolExecutor(6) as pool:
+        list(pool.map(write, range(6)))
+    assert peak == 2
+    assert scheduler.stats()["ingestConnections"]["requests"] == 6
+    with scheduler.connection("query"):
+        pass
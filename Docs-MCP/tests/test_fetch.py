@@ -0,0 +1,78 @@
+import asyncio
+
+import httpx
+import pytest
+
+import server
+from server import _fetch, _sniff_kind
+
+HTML = b"<!DOCTYPE html><html><body>" + b"x" * 300 + b"</body></html>"
+PDF = b"%PDF-1.7\n" + b"\x00" * 300
+
+
+def test_sniff_kind_trusts_content_over_headers():
+    assert _sniff_kind("application/octet-stream", PDF, "https://acme.test/download") == "document"
+    assert _sniff_kind("text/plain", HTML, "https://acme.test/page") == "html"
+    assert _sniff_kind("application/zip", b"PK\x03\x04....", "https://acme.test/slides.pptx") == "document"
+    assert _sniff_kind("application/zip", b"PK\x03\x04....", "https://acme.test/archive.zip") == "other"
+    assert _sniff_kind("application/json; charset=utf-8", b'{"a": 1}', "https://acme.test/a") == "text"
+    assert _sniff_kind("", b"plain words", "https://acme.test/README") == "text"
+    assert _sniff_kind("", b"\x7fELF\x00\x00", "https://acme.test/tool") == "other"
+
+
+@pytest.fixture
+def serve(monkeypatch):
+    """Route server._fetch to a handler; returns the list of requested URLs."""
+    requested = []
+
+    def use(handler):
+        def record(request):
+            requested.append(str(request.url))
+            return handler(request)
+
+        monkeypatch.setattr(server, "_http", httpx.AsyncClient(transport=httpx.MockTransport(record)))
+        return requested
+
+    return use
+
+
+def _fetch_sync(url, **kwargs):
+    return asyncio.run(_fetch(url, **kwargs))
+
+
+def test_html_over_the_cap_is_truncated(serve, monkeypatch):
+    monkeypatch.setattr(server, "MAX_FETCH_BYTES", 100)
+    serve(lambda r: httpx.Response(200, headers={"Content-Type": "text/html"}, content=HTML))
+    result = _fetch_sync("https://acme.test/page")
+    assert result["kind"] == "html" and result["truncated"]
+    assert result["body"] == HTML[:100]
+
+
+def test_unwanted_kinds_are_not_downloaded(serve):
+    serve(lambda r: httpx.Response(200, headers={"Content-Type": "application/octet-stream"}, content=PDF))
+    result = _fetch_sync("https://acme.test/file")
+    assert result["kind"] == "document" and result["body"] is None
+    assert _fetch_sync("https://acme.test/file", kinds=("html", "document"))["body"] == PDF
+
+
+def test_documents_over_the_cap_are_dropped(serve, monkeypatch):
+    monkeypatch.setattr(server, "MAX_DOCUMENT_BYTES", 100)
+    serve(lambda r: httpx.Response(200, headers={"Content-Type": "application/pdf"}, content=PDF))
+    result = _fetch_sync("https://acme.test/manual.pdf", kinds=("document",))
+    assert result["truncated"] and result["body"] is None
+
+
+def test_errors_and_redirects_are_reported(serve):
+    def handler(request):
+        if request.url.path == "/old":
+            return httpx.Response(301, headers={"Location": "https://acme.test/new"})
+        if request.url.path == "/new":
+            return httpx.Response(200, headers={"Content-Type": "text/html"}, content=HTML)
+        return httpx.Response(404)
+
+    requested = serve(handler)
+    result = _fetch_sync("https://acme.test/old")
+    assert result["url"] == "https://acme.test/new" and result["body"] == HTML
+    assert requested == ["https://acme.test/old", "https://acme.test/new"]
+    missing = _fetch_sync("https://acme.test/missing")
+    assert missing["status"] == 404 and missing["body"] is None
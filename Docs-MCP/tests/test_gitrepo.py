@@ -0,0 +1,61 @@
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from gitrepo import GitError, GitRepo
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="git is not installed")
+
+
+def _git(path, *args):
+    env = {**os.environ, "GIT_AUTHOR_NAME": "t", "GIT_AUTHOR_EMAIL": "t@example.com",
+           "GIT_COMMITTER_NAME": "t", "GIT_COMMITTER_EMAIL": "t@example.com"}
+    subprocess.run(["git", "-C", str(path), *args], check=True, capture_output=True, env=env)
+
+
+@pytest.fixture
+def repo(tmp_path):
+    _git(tmp_path, "init", "-q")
+    (tmp_path / "docs").mkdir()
+    (tmp_path / "docs" / "a.md").write_text("# A\n")
+    (tmp_path / "docs" / "b.md").write_text("# B\n")
+    (tmp_path / ".gitignore").write_text("build/\n")
+    (tmp_path / "build").mkdir()
+    (tmp_path / "build" / "out.md").write_text("generated\n")
+    os.symlink("docs/a.md", tmp_path / "link.md")
+    _git(tmp_path, "add", "-A")
+    _git(tmp_path, "commit", "-q", "-m", "first")
+    return tmp_path
+
+
+def test_files_and_blobs_come_from_the_commit(repo):
+    git = GitRepo(str(repo / "docs"))
+    head = git.resolve()
+    assert git.has_commit(head) and not git.has_commit("0" * 40)
+    assert sorted(git.files(head)) == [".gitignore", "docs/a.md", "docs/b.md"]
+    assert git.files(head, ["docs"]) == ["docs/a.md", "docs/b.md"]
+
+    (repo / "docs" / "a.md").write_text("uncommitted\n")
+    assert dict(git.blobs(head, ["docs/a.md", "missing.md", "docs"])) == {"docs/a.md": b"# A\n"}
+
+
+def test_diff_lists_changed_and_deleted_paths(repo):
+    git = GitRepo(str(repo))
+    first = git.resolve()
+    (repo / "docs" / "a.md").write_text("# A, edited\n")
+    (repo / "docs" / "c.md").write_text("# C\n")
+    _git(repo, "rm", "-q", "docs/b.md")
+    _git(repo, "add", "-A")
+    _git(repo, "commit", "-q", "-m", "second")
+
+    changed, deleted = git.diff(first, git.resolve())
+    assert sorted(changed) == ["docs/a.md", "docs/c.md"]
+    assert deleted == ["docs/b.md"]
+
+
+def test_paths_outside_a_work_tree(tmp_path):
+    assert GitRepo.find(str(tmp_path)) is None
+    with pytest.raises(GitError):
+        GitRepo(str(tmp_path))
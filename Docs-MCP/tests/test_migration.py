@@ -0,0 +1,132 @@
+import threading
+import time
+
+import pytest
+
+from conftest import HashEmbeddings
+from migration import DualWriteStore, ReembedMigration, read_json
+from store import LocalVectorStore
+
+LIB = {"library": "widgets", "version": "1.0", "content_type": "docs"}
+
+
+def _text(i):
+    return f"widget option{i} controls how flag{i} renders the panel header on page {i}"
+
+
+def _stores(tmp_path):
+    old, new = HashEmbeddings(salt="old"), HashEmbeddings(salt="new")
+    primary = LocalVectorStore(old, str(tmp_path / "old"))
+    shadow = LocalVectorStore(new, str(tmp_path / "new"))
+    for project in ("acme", "beta"):
+        primary.add([_text(i) for i in range(6)], [{**LIB, "project": project, "url": f"u{i}"} for i in range(6)],
+                    [f"{project}-{i}" for i in range(6)])
+    return primary, shadow, new
+
+
+def _migration(tmp_path, dual, activated):
+    state = {"model": "new", "backend": "local", "phase": "backfill", "projects": {}, "batchSize": 4,
+             "sample": 8, "minRecallRatio": 0.9}
+    return ReembedMigration(str(tmp_path / "reembed.json"), dual, state, activated.append)
+
+
+def _ids(store, project):
+    return sorted(r["id"] for r in store.rows({"project": project}))
+
+
+def test_dual_write_backfill_and_cutover(tmp_path, monkeypatch):
+    monkeypatch.setattr(ReembedMigration, "DROP_GRACE_SECONDS", 0.0)
+    primary, shadow, new = _stores(tmp_path)
+    dual = DualWriteStore(primary, shadow)
+    activated = []
+    migration = _migration(tmp_path, dual, activated)
+
+    # Writes during the backfill land in both indexes.
+    dual.add(["a chunk written while the migration runs"], [{**LIB, "project": "acme", "url": "live"}], ["live"])
+    dual.delete_ids("beta", ["beta-5"])
+    for project in primary.projects():
+        migration._sync_project(project, throttle=True)
+    dual.flush()
+    for project in ("acme", "beta"):
+        assert _ids(shadow, project) == _ids(primary, project)
+    assert migration.state["projects"]["acme"] == {"chunks": 7, "copied": 7}
+
+    # The shadow holds vectors from its own model.
+    row = next(r for r in shadow.rows({"project": "acme"}, with_embeddings=True) if r["id"] == "acme-0")
+    assert row["document"] == _text(0)
+    assert row["embedding"] == pytest.approx(new.embed_query(_text(0)))
+
+    assert migration.verify()["passed"]
+    migration.cutover()
+    assert activated == [migration]
+    assert dual.cut_over and migration.state["phase"] == "done"
+    assert read_json(str(tmp_path / "reembed.json"))["phase"] == "done"
+
+    # A write that reaches the dual store after cutover goes to the new index only.
+    dual.add(["written after the cutover"], [{**LIB, "project": "acme", "url": "late"}], ["late"])
+    assert "late" in _ids(shadow, "acme") and "late" not in _ids(primary, "acme")
+
+    deadline = time.monotonic() + 5
+    while migration.state.get("previousIndex") != "dropped" and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert migration.state["previousIndex"] == "dropped"
+    assert primary.projects() == []
+
+
+def test_cutover_waits_for_writes_in_flight(tmp_path, monkeypatch):
+    monkeypatch.setattr(ReembedMigration, "DROP_GRACE_SECONDS", 3600.0)
+    primary, shadow, _ = _stores(tmp_path)
+    dual = DualWriteStore(primary, shadow)
+    migration = _migration(tmp_path, dual, [])
+    for project in primary.projects():
+        migration._sync_project(project, throttle=True)
+
+    done = threading.Event()
+    with dual.hold_writes():
+        worker = threading.Thread(target=lambda: (migration.cutover(), done.set()))
+        worker.start()
+        assert not done.wait(0.1)
+        dual.put_page({**LIB, "project": "acme", "url": "p"}, "p", "a page indexed during cutover")
+        dual.add(["a chunk of the same page"], [{**LIB, "project": "acme", "url": "p", "page_id": "p",
+                                                  "start": 0, "end": 7}], ["p-0"])
+    worker.join(5)
+    assert done.is_set()
+    assert shadow.get_pages("acme", ["p"]) == {"p": "a page indexed during cutover"}
+    assert "p-0" in _ids(shadow, "acme")
+
+
+def test_mirroring_blocks_instead_of_dropping_writes(tmp_path, monkeypatch):
+    monkeypatch.setattr(DualWriteStore, "MAX_PENDING", 2)
+    primary, shadow, _ = _stores(tmp_path)
+    slow_add = shadow.add
+
+    def add(*args):
+        time.sleep(0.005)
+        return slow_add(*args)
+
+    monkeypatch.setattr(shadow, "add", add)
+    dual = DualWriteStore(primary, shadow)
+    for i in range(20):
+        dual.add([f"burst chunk {i}"], [{**LIB, "project": "burst", "url": f"b{i}"}], [f"b{i}"])
+    dual.flush()
+    assert _ids(shadow, "burst") == sorted(f"b{i}" for i in range(20))
+    dual.close()
+
+
+def test_failed_shadow_writes_block_cutover(tmp_path):
+    primary, shadow, _ = _stores(tmp_path)
+    dual = DualWriteStore(primary, shadow)
+    migration = _migration(tmp_path, dual, [])
+
+    def fail(*args):
+        raise OSError("disk full")
+
+    shadow.put_page = fail
+    dual.put_page({**LIB, "project": "acme", "url": "p"}, "p", "page")
+    dual.flush()
+    assert dual.shadow_errors == ["fail: disk full"]
+    assert migration.status()["shadowWriteErrors"] == 1
+    with pytest.raises(RuntimeError, match="shadow writes failed"):
+        migration.cutover()
+    assert not dual.cut_over
+    dual.close(discard=True)
@@ -0,0 +1,74 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import pdfpages
+from pdfpages import ExtractionProgress, PageCache, _ranges, convert_pdf
+
+
+class _Converter:
+    def __init__(self, bad_pages=()):
+        self.bad_pages = set(bad_pages)
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def __call__(self, path, first, last):
+        with self._lock:
+            self.calls.append((first, last))
+        if self.bad_pages & set(range(first, last + 1)):
+            raise RuntimeError("cannot convert")
+        return {page: f"Page {page} text" for page in range(first, last + 1)}
+
+
+@pytest.fixture
+def pdf(tmp_path, monkeypatch):
+    path = tmp_path / "manual.pdf"
+    path.write_bytes(b"%PDF-1.7 ten pages")
+    monkeypatch.setattr(pdfpages, "page_count", lambda p: 10)
+    return str(path)
+
+
+def test_ranges_group_consecutive_pages():
+    assert _ranges([1, 2, 3, 4, 5], 2) == [(1, 2), (3, 4), (5, 5)]
+    assert _ranges([1, 2, 5, 6, 7, 9], 4) == [(1, 2), (5, 7), (9, 9)]
+    assert _ranges([], 4) == []
+
+
+def test_pages_are_converted_in_ranges_and_cached(tmp_path, pdf):
+    cache, progress, convert = PageCache(str(tmp_path / "cache")), ExtractionProgress(), _Converter()
+    with ThreadPoolExecutor(3) as pool:
+        markdown, summary = convert_pdf(pdf, convert, pool, cache, progress, pages_per_task=4)
+        assert markdown == "\n\n".join(f"Page {p} text" for p in range(1, 11))
+        assert sorted(convert.calls) == [(1, 4), (5, 8), (9, 10)]
+        assert summary == {"pages": 10, "cachedPages": 0, "convertedPages": 10, "failedPages": []}
+
+        again = _Converter()
+        assert convert_pdf(pdf, again, pool, cache, progress)[0] == markdown
+    assert again.calls == []
+    assert [e["cached"] for e in progress.snapshot()] == [10]
+
+
+def test_failed_pages_are_retried_alone_and_left_out(tmp_path, pdf):
+    cache, progress, convert = PageCache(str(tmp_path / "cache")), ExtractionProgress(), _Converter(bad_pages={6})
+    with ThreadPoolExecutor(2) as pool:
+        markdown, summary = convert_pdf(pdf, convert, pool, cache, progress, pages_per_task=4, label="manual")
+    assert summary["failedPages"] == [6]
+    assert "Page 5 text" in markdown and "Page 7 text" in markdown and "Page 6 text" not in markdown
+    assert {(p, p) for p in (5, 6, 7, 8)} <= set(convert.calls)
+    assert cache.get(pdfpages.file_digest(pdf), 6) is None
+    entry = progress.snapshot()[0]
+    assert entry["path"] == "manual" and entry["failed"] == [6] and entry["finishedAt"] is not None
+
+
+def test_a_document_with_no_convertible_page_fails(tmp_path, pdf):
+    with ThreadPoolExecutor(2) as pool:
+        with pytest.raises(RuntimeError, match="All 10 pages"):
+            convert_pdf(pdf, _Converter(bad_pages=range(1, 11)), pool, PageCache(str(tmp_path)),
+                        ExtractionProgress())
+
+
+def test_unreadable_page_count_falls_back(tmp_path, monkeypatch):
+    monkeypatch.setattr(pdfpages, "page_count", lambda p: None)
+    with pytest.raises(ValueError):
+        convert_pdf(str(tmp_path / "x.pdf"), _Converter(), None, PageCache(str(tmp_path)), ExtractionProgress())
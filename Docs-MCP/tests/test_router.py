@@ -0,0 +1,34 @@
+import pytest
+
+from router import classify
+
+
+@pytest.mark.parametrize("query, tool, args", [
+    ("list projects", "list_projects", {}),
+    ("Which projects are indexed?", "list_projects", {}),
+    ("what's in project acme-docs", "check_project", {"project": "acme-docs"}),
+    ("does the project 'react' exist?", "check_project", {"project": "react"}),
+    ("list libraries in project acme", "list_libraries", {"project": "acme"}),
+    ("show detailed stats for library fastapi", "detailed_stats", {"library": "fastapi"}),
+    ("stats for project acme", "detailed_stats", {"project": "acme"}),
+    ("please show embedding stats", "embedding_stats", {}),
+    ("re-embed status", "reembed_status", {}),
+])
+def test_catalogue_questions_route_with_high_confidence(query, tool, args):
+    route = classify(query)
+    assert route is not None
+    assert (route.tool, route.args) == (tool, args)
+    assert route.confidence >= 0.9
+
+
+@pytest.mark.parametrize("query", [
+    "list projects that use react hooks for state management",
+    "how do I configure retries in the httpx client?",
+])
+def test_other_questions_do_not_clear_the_threshold(query):
+    route = classify(query)
+    assert route is None or route.confidence < 0.9
+
+
+def test_empty_query():
+    assert classify("  ?? ") is None
@@ -0,0 +1,63 @@
+import asyncio
+
+from google.adk.events import Event, EventActions
+from google.genai.types import Content, Part
+
+from sessions import SQLiteSessionService
+
+APP = "docs_mcp_agent"
+
+
+def _event(author: str, text: str, **kwargs) -> Event:
+    role = "user" if author == "user" else "model"
+    return Event(invocation_id=Event.new_id(), author=author, content=Content(role=role, parts=[Part(text=text)]),
+                 **kwargs)
+
+
+def test_sessions_survive_a_restart(tmp_path):
+    path = str(tmp_path / "sessions.db")
+
+    async def write():
+        service = SQLiteSessionService(path)
+        session = await service.create_session(app_name=APP, user_id="u", state={"k": "v"})
+        await service.append_event(session, _event("user", "hello"))
+        await service.append_event(session, _event("agent", "hi", actions=EventActions(
+            state_delta={"user:lang": "en", "temp:scratch": 1})))
+        return session.id
+
+    async def read(session_id):
+        service = SQLiteSessionService(path)
+        return await service.get_session(app_name=APP, user_id="u", session_id=session_id)
+
+    session = asyncio.run(read(asyncio.run(write())))
+    assert [e.content.parts[0].text for e in session.events] == ["hello", "hi"]
+    assert session.state["k"] == "v" and session.state["user:lang"] == "en"
+    assert "temp:scratch" not in session.state
+
+
+def test_long_sessions_are_compacted_from_a_user_turn(tmp_path):
+    async def run():
+        service = SQLiteSessionService(str(tmp_path / "sessions.db"), max_events=6, keep_events=3)
+        session = await service.create_session(app_name=APP, user_id="u")
+        for i in range(5):
+            await service.append_event(session, _event("user", f"q{i}"))
+            await service.append_event(session, _event("agent", f"a{i}"))
+        return session, await service.get_session(app_name=APP, user_id="u", session_id=session.id)
+
+    live, stored = asyncio.run(run())
+    texts = [e.content.parts[0].text for e in stored.events]
+    assert len(texts) <= 6 and texts[0].startswith("q") and texts[-1] == "a4"
+    assert [e.content.parts[0].text for e in live.events] == texts
+
+
+def test_idle_sessions_expire(tmp_path):
+    async def run():
+        service = SQLiteSessionService(str(tmp_path / "sessions.db"), ttl=0)
+        service.PURGE_INTERVAL = 0
+        old = await service.create_session(app_name=APP, user_id="u")
+        await asyncio.sleep(0.01)
+        current = await service.create_session(app_name=APP, user_id="u")
+        await service.append_event(current, _event("user", "hello"))
+        return await service.get_session(app_name=APP, user_id="u", session_id=old.id)
+
+    assert asyncio.run(run()) is None
@@ -0,0 +1,68 @@
+import pytest
+
+from snapshot import export_snapshot, import_snapshot
+from store import LocalVectorStore
+
+LIB = {"project": "acme", "library": "widgets", "version": "1.0", "content_type": "docs"}
+PAGE = "# Widgets\n\nWidgets are configured with option flags.\n\nEach flag has a default."
+
+
+def _page_id(meta, url):
+    return f"{meta['project']}|{meta['library']}|{url}"
+
+
+def _source(path, embeddings):
+    store = LocalVectorStore(embeddings, str(path))
+    meta = {**LIB, "url": "https://acme.test/widgets"}
+    page_meta = {**meta, "page_id": _page_id(meta, meta["url"])}
+    store.put_page(page_meta, page_meta["page_id"], PAGE)
+    split = PAGE.index("Each flag")
+    store.add([PAGE[:split], PAGE[split:]],
+              [{**page_meta, "start": 0, "end": split}, {**page_meta, "start": split, "end": len(PAGE)}],
+              ["c1", "c2"])
+    store.add(["A chunk without a page"], [{**LIB, "url": "https://acme.test/other"}], ["c3"])
+    return store
+
+
+def test_export_import_round_trip_without_embedding(tmp_path, embeddings):
+    source = _source(tmp_path / "source", embeddings)
+    path = str(tmp_path / "widgets.npz")
+    header = export_snapshot(source, LIB, path, "hash-model")
+    assert (header["chunks"], header["pages"], header["dim"]) == (3, 1, embeddings.dim)
+
+    target = LocalVectorStore(embeddings, str(tmp_path / "target"))
+    calls = embeddings.calls
+    result = import_snapshot(target, path, "hash-model", embeddings.dim, {"project": "team"}, _page_id)
+    assert embeddings.calls == calls
+    assert (result["chunksImported"], result["pagesImported"]) == (3, 1)
+
+    rows = {r["document"]: r for r in target.rows({"project": "team"}, with_embeddings=True)}
+    originals = {r["document"]: r for r in source.rows({"project": "acme"}, with_embeddings=True)}
+    assert sorted(rows) == sorted(originals)
+    for text, row in rows.items():
+        assert row["embedding"] == pytest.approx(originals[text]["embedding"])
+    page_id = _page_id({**LIB, "project": "team"}, "https://acme.test/widgets")
+    assert rows[PAGE[PAGE.index("Each flag"):]]["metadata"]["page_id"] == page_id
+    assert target.get_pages("team", [page_id]) == {page_id: PAGE}
+
+
+def test_import_replaces_the_target_library(tmp_path, embeddings):
+    source = _source(tmp_path / "source", embeddings)
+    path = str(tmp_path / "widgets.npz")
+    export_snapshot(source, LIB, path, "hash-model")
+
+    result = import_snapshot(source, path, "hash-model", None, {}, _page_id)
+    assert result["chunksReplaced"] == 3
+    assert len(source.rows(LIB)) == 3
+
+
+def test_import_rejects_another_model(tmp_path, embeddings):
+    source = _source(tmp_path / "source", embeddings)
+    path = str(tmp_path / "widgets.npz")
+    export_snapshot(source, LIB, path, "hash-model")
+    target = LocalVectorStore(embeddings, str(tmp_path / "target"))
+    with pytest.raises(ValueError, match="embedded with hash-model"):
+        import_snapshot(target, path, "other-model", None, {}, _page_id)
+    with pytest.raises(ValueError, match="dimension"):
+        import_snapshot(target, path, "hash-model", embeddings.dim + 1, {}, _page_id)
+    assert target.projects() == []
@@ -0,0 +1,95 @@
+import os
+
+from store import LocalVectorStore, _LocalPartition
+
+LIB = {"project": "acme", "library": "widgets", "version": "1.0", "content_type": "docs"}
+
+
+def _chunks(count, **meta):
+    texts = [f"chunk {i} explains widget option{i} and flag{i}" for i in range(count)]
+    metas = [{**LIB, **meta, "url": f"https://acme.test/p{i}"} for i in range(count)]
+    return texts, metas
+
+
+def test_local_store_round_trip_survives_reopen(tmp_path, embeddings):
+    store = LocalVectorStore(embeddings, str(tmp_path))
+    texts, metas = _chunks(5)
+    store.add(texts, metas, [f"id{i}" for i in range(5)])
+
+    results = store.search("widget option3 flag3", 2, {"project": "acme"})
+    assert results[0][0].page_content == texts[3]
+    assert results[0][1] < results[1][1]
+
+    reopened = LocalVectorStore(embeddings, str(tmp_path))
+    assert reopened.projects() == ["acme"]
+    rows = [r for batch in reopened.iter_rows({"project": "acme"}, batch_size=2) for r in batch]
+    assert [r["id"] for r in rows] == [f"id{i}" for i in range(5)]
+    assert [r["document"] for r in rows] == texts
+    assert reopened.search("widget option1 flag1", 1, {"project": "acme"})[0][0].page_content == texts[1]
+
+
+def test_chunks_stored_as_page_offsets_are_sliced_from_the_page(tmp_path, embeddings):
+    store = LocalVectorStore(embeddings, str(tmp_path))
+    page = "# Widgets\n\nThe first section.\n\nThe second section."
+    meta = {**LIB, "url": "https://acme.test/w", "page_id": "w"}
+    store.put_page(meta, "w", page)
+    start = page.index("The second")
+    store.add([page[start:]], [{**meta, "start": start, "end": len(page)}], ["c1"])
+
+    assert store.get_pages("acme", ["w", "missing"]) == {"w": page}
+    assert store.rows_by_ids("acme", ["c1"])[0]["document"] == "The second section."
+    assert store.rows_by_ids("acme", ["c1"], hydrate=False)[0]["document"] == ""
+
+
+def test_projects_are_separate_partitions(tmp_path, embeddings):
+    store = LocalVectorStore(embeddings, str(tmp_path))
+    texts, metas = _chunks(3)
+    store.add(texts, metas)
+    store.add(texts, [{**m, "project": "other"} for m in metas])
+    assert store.projects() == ["acme", "other"]
+
+    assert all(d.metadata["project"] == "other" for d, _ in store.search("widget", 10, {"project": "other"}))
+    assert len(store.search("widget", 10, {})) == 6
+
+    partition = store._partition("acme").path
+    assert store.drop_project("acme") == 3
+    assert not os.path.exists(partition)
+    assert store.projects() == ["other"]
+    assert LocalVectorStore(embeddings, str(tmp_path)).projects() == ["other"]
+
+
+def test_delete_by_library_keeps_other_libraries(tmp_path, embeddings):
+    store = LocalVectorStore(embeddings, str(tmp_path))
+    texts, metas = _chunks(4)
+    store.add(texts[:2], metas[:2])
+    store.add(texts[2:], [{**m, "library": "gadgets"} for m in metas[2:]])
+    assert store.delete({"project": "acme", "library": "widgets"}) == 2
+    assert store.distinct_values("library", {"project": "acme"}) == ["gadgets"]
+
+
+def test_compaction_keeps_live_vectors(tmp_path, embeddings, monkeypatch):
+    monkeypatch.setattr(_LocalPartition, "COMPACT_MIN_DEAD", 4)
+    store = LocalVectorStore(embeddings, str(tmp_path))
+    texts, metas = _chunks(12)
+    for i, meta in enumerate(metas):
+        meta["library"] = "old" if i < 8 else "new"
+    store.add(texts, metas)
+    assert store.delete({"project": "acme", "library": "old"}) == 8
+
+    partition = store._partition("acme")
+    assert partition._slots == 4
+    results = store.search(texts[10], 1, {"project": "acme"})
+    assert results[0][0].page_content == texts[10]
+    assert results[0][1] < 1e-5
+
+
+def test_ivf_index_finds_exact_matches(tmp_path, embeddings, monkeypatch):
+    monkeypatch.setattr(_LocalPartition, "IVF_MIN_ROWS", 50)
+    store = LocalVectorStore(embeddings, str(tmp_path), index="ivf", nprobe=64)
+    texts, metas = _chunks(80)
+    store.add(texts, metas)
+
+    partition = store._partition("acme")
+    assert partition._centroids is not None
+    results = store.search(texts[42], 1, {"project": "acme"})
+    assert results[0][0].page_content == texts[42]
@@ -0,0 +1,107 @@
+import os
+
+from watch import FolderWatch, FolderWatcher
+
+META = {"project": "acme", "library": "notes", "version": "latest", "content_type": "docs"}
+
+
+class _Indexer:
+    def __init__(self):
+        self.calls = []
+        self.results = []
+
+    def __call__(self, watch, changed, deleted):
+        self.calls.append(([os.path.basename(p) for p in changed], [os.path.basename(p) for p in deleted]))
+        return self.results.pop(0) if self.results else {}
+
+
+def _watcher(tmp_path, interval=10.0, debounce=1.0):
+    folder = tmp_path / "notes"
+    folder.mkdir()
+    indexer = _Indexer()
+    watcher = FolderWatcher(str(tmp_path / "state"), indexer)
+    # Ticks are driven by the test; the background thread is never started.
+    watch = FolderWatch(watcher.state_dir, str(folder), META, interval, debounce)
+    watcher.watches[watch.key] = watch
+    return watcher, watch, folder, indexer
+
+
+def test_changes_are_indexed_once_settled(tmp_path):
+    watcher, watch, folder, indexer = _watcher(tmp_path)
+    (folder / "a.md").write_text("alpha")
+    (folder / "b.md").write_text("beta")
+    os.makedirs(folder / ".git")
+    (folder / ".git" / "HEAD").write_text("ref")
+
+    watcher._tick(watch, 0.0, woken=False)
+    assert indexer.calls == []
+    (folder / "b.md").write_text("beta, still being written")
+    watcher._tick(watch, 0.8, woken=True)
+    watcher._tick(watch, 1.2, woken=False)
+    assert indexer.calls == [(["a.md"], [])]
+    watcher._tick(watch, 2.0, woken=False)
+    assert indexer.calls == [(["a.md"], []), (["b.md"], [])]
+    assert sorted(os.path.basename(p) for p in watch.snapshot) == ["a.md", "b.md"]
+
+    (folder / "a.md").write_text("alpha, edited")
+    (folder / "b.md").unlink()
+    watcher._tick(watch, 3.0, woken=True)
+    watcher._tick(watch, 4.0, woken=False)
+    assert indexer.calls[-1] == (["a.md"], ["b.md"])
+    assert [os.path.basename(p) for p in watch.snapshot] == ["a.md"]
+    assert watch.stats["filesIndexed"] == 3 and watch.stats["filesRemoved"] == 1
+
+    reloaded = FolderWatch(watcher.state_dir, str(folder), META, 10.0, 1.0)
+    assert reloaded.snapshot == watch.snapshot
+    watcher._tick(reloaded, 20.0, woken=True)
+    assert reloaded.pending == {}
+
+
+def test_vanished_files_are_left_out_of_the_snapshot(tmp_path):
+    watcher, watch, folder, indexer = _watcher(tmp_path)
+    (folder / "a.md").write_text("alpha")
+    (folder / "tmp.md").write_text("editor swap file")
+    watcher._tick(watch, 0.0, woken=False)
+    indexer.results.append({"vanished": [str(folder / "tmp.md")]})
+    watcher._tick(watch, 1.0, woken=False)
+
+    assert [os.path.basename(p) for p in watch.snapshot] == ["a.md"]
+    assert watch.pending == {}
+    assert watch.stats["filesIndexed"] == 1 and watch.stats["filesRemoved"] == 1
+
+
+def test_failed_files_are_retried_after_the_interval(tmp_path):
+    watcher, watch, folder, indexer = _watcher(tmp_path, interval=10.0)
+    (folder / "a.md").write_text("alpha")
+    (folder / "bad.pdf").write_text("not really a pdf")
+    watcher._tick(watch, 0.0, woken=False)
+    indexer.results.append({"failed": {str(folder / "bad.pdf"): "conversion failed"}})
+    watcher._tick(watch, 1.0, woken=False)
+
+    assert [os.path.basename(p) for p in watch.snapshot] == ["a.md"]
+    assert watch.stats["lastError"].startswith("1 files failed, e.g. ")
+    assert watch.stats["filesIndexed"] == 1
+
+    watcher._tick(watch, 5.0, woken=True)
+    assert len(indexer.calls) == 1
+    watcher._tick(watch, 12.0, woken=False)
+    assert indexer.calls[-1] == (["bad.pdf"], [])
+    assert sorted(os.path.basename(p) for p in watch.snapshot) == ["a.md", "bad.pdf"]
+    assert watch.stats["lastError"] is None
+
+
+def test_remove_matching_forgets_the_snapshot(tmp_path):
+    watcher, watch, folder, indexer = _watcher(tmp_path)
+    (folder / "a.md").write_text("alpha")
+    watcher._tick(watch, 0.0, woken=False)
+    watcher._tick(watch, 1.0, woken=False)
+    snapshot_path = os.path.join(watcher.state_dir, f"{watch.key}.json")
+    assert os.path.exists(snapshot_path)
+
+    assert watcher.remove_matching({"project": "other"}) == []
+    assert watcher.remove_matching({"project": "acme", "library": "notes"}) == [watch]
+    assert watcher.watches == {}
+    assert not os.path.exists(snapshot_path)
+    watch.save()
+    assert not os.path.exists(snapshot_path)
+    assert FolderWatch(watcher.state_dir, str(folder), META, 10.0, 1.0).snapshot == {}
@@ -0,0 +1,271 @@
+"""
+watch.py - Watch local folders and re-index only the files that changed
+
+Each watched folder keeps a snapshot of (mtime, size) per file, saved in the
+state directory. The folder is rescanned every `interval` seconds. If the
+optional watchdog package is installed, filesystem events trigger a rescan
+right away. A file is handed to the indexer once its stat has been stable for
+`debounce` seconds, batched with the other settled changes of that folder.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+import traceback
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Optional inotify/FSEvents support
+try:
+    from watchdog.events import FileSystemEventHandler  # type: ignore
+    from watchdog.observers import Observer  # type: ignore
+except Exception:
+    FileSystemEventHandler = object  # type: ignore
+    Observer = None  # type: ignore
+
+# Directories never worth indexing
+SKIP_DIRS = {".git", ".hg", ".svn", "__pycache__", "node_modules", ".venv", ".tox"}
+
+# indexer(watch, changed_paths, deleted_paths) -> summary dict; the summary may list
+# changed paths that had disappeared by the time they were read under "vanished",
+# and map changed paths that could not be indexed to their error under "failed".
+Indexer = Callable[["FolderWatch", List[str], List[str]], Dict[str, Any]]
+
+
+def scan_folder(path: str) -> Dict[str, Tuple[int, int]]:
+    """Map absolute file path -> (mtime_ns, size) for every file under path."""
+    out: Dict[str, Tuple[int, int]] = {}
+    for root, dirs, files in os.walk(path):
+        dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
+        for fname in files:
+            fpath = os.path.join(root, fname)
+            try:
+                st = os.stat(fpath)
+            except OSError:
+                continue
+            out[fpath] = (st.st_mtime_ns, st.st_size)
+    return out
+
+
+def watch_key(path: str, meta: Dict[str, str]) -> str:
+    key = "\0".join([os.path.abspath(path)] + [str(meta[k]) for k in sorted(meta)])
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+
+class FolderWatch:
+    """One watched folder: its target library, snapshot and pending changes."""
+
+    def __init__(self, state_dir: str, path: str, meta: Dict[str, str], interval: float, debounce: float):
+        self.path = os.path.abspath(path)
+        self.meta = dict(meta)
+        self.interval = interval
+        self.debounce = debounce
+        self.key = watch_key(self.path, meta)
+        self._snapshot_path = os.path.join(state_dir, f"{self.key}.json")
+        self.snapshot: Dict[str, Tuple[int, int]] = {}
+        # path -> (stat or None if deleted, monotonic time the change was last seen)
+        self.pending: Dict[str, Tuple[Optional[Tuple[int, int]], float]] = {}
+        self.next_scan = 0.0
+        self.removed = False
+        self.stats: Dict[str, Any] = {"lastScanAt": None, "lastIndexedAt": None, "filesIndexed": 0,
+                                      "filesRemoved": 0, "lastError": None, "lastSummary": None}
+        self._load()
+
+    def config(self) -> Dict[str, Any]:
+        return {"path": self.path, **self.meta, "interval": self.interval, "debounce": self.debounce}
+
+    def _load(self) -> None:
+        try:
+            with open(self._snapshot_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        self.snapshot = {p: (int(m), int(s)) for p, (m, s) in data.get("files", {}).items()}
+        self.stats.update(data.get("stats", {}))
+
+    def save(self) -> None:
+        if self.removed:
+            # A batch that finished after the watch was removed must not bring its snapshot back.
+            return
+        tmp = f"{self._snapshot_path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"config": self.config(), "files": self.snapshot, "stats": self.stats}, f)
+        os.replace(tmp, self._snapshot_path)
+
+    def forget(self) -> None:
+        self.removed = True
+        try:
+            os.remove(self._snapshot_path)
+        except FileNotFoundError:
+            pass
+
+    def scan(self, now: float) -> None:
+        """Record files whose stat differs from the snapshot as pending."""
+        current = scan_folder(self.path) if os.path.isdir(self.path) else {}
+        for fpath, stat in current.items():
+            if self.snapshot.get(fpath) != stat:
+                previous = self.pending.get(fpath)
+                if previous is None or previous[0] != stat:
+                    self.pending[fpath] = (stat, now)
+            else:
+                self.pending.pop(fpath, None)
+        for fpath in self.snapshot:
+            if fpath not in current:
+                previous = self.pending.get(fpath)
+                if previous is None or previous[0] is not None:
+                    self.pending[fpath] = (None, now)
+        self.stats["lastScanAt"] = time.time()
+
+    def settled(self, now: float) -> Dict[str, Optional[Tuple[int, int]]]:
+        """Pending changes that have not moved for `debounce` seconds."""
+        return {p: stat for p, (stat, seen) in self.pending.items() if now - seen >= self.debounce}
+
+
+class _Wakeup(FileSystemEventHandler):  # type: ignore[misc]
+    def __init__(self, event: threading.Event):
+        self._event = event
+
+    def on_any_event(self, event) -> None:
+        self._event.set()
+
+
+class FolderWatcher:
+    """Runs all folder watches on one background thread; watches persist in `<state_dir>/watches.json`."""
+
+    def __init__(self, state_dir: str, indexer: Indexer):
+        self.state_dir = os.path.join(state_dir, "watches")
+        os.makedirs(self.state_dir, exist_ok=True)
+        self._config_path = os.path.join(self.state_dir, "watches.json")
+        self.indexer = indexer
+        self.watches: Dict[str, FolderWatch] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._observer = Observer() if Observer is not None else None
+        self._observed: Dict[str, Any] = {}
+        try:
+            with open(self._config_path, "r", encoding="utf-8") as f:
+                configs = json.load(f)
+        except (OSError, ValueError):
+            configs = []
+        for c in configs:
+            meta = {k: v for k, v in c.items() if k not in ("path", "interval", "debounce")}
+            watch = FolderWatch(self.state_dir, c["path"], meta, float(c["interval"]), float(c["debounce"]))
+            self.watches[watch.key] = watch
+
+    @property
+    def uses_events(self) -> bool:
+        return self._observer is not None
+
+    def _save_config(self) -> None:
+        tmp = f"{self._config_path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump([w.config() for w in self.watches.values()], f, indent=2)
+        os.replace(tmp, self._config_path)
+
+    def _observe(self, watch: FolderWatch) -> None:
+        if self._observer is None or watch.key in self._observed or not os.path.isdir(watch.path):
+            return
+        try:
+            self._observed[watch.key] = self._observer.schedule(_Wakeup(self._wake), watch.path, recursive=True)
+        except Exception as e:
+            print(f"Filesystem events unavailable for {watch.path}: {e}")
+
+    def start(self) -> None:
+        if self._thread is not None or not self.watches:
+            return
+        if self._observer is not None:
+            for watch in self.watches.values():
+                self._observe(watch)
+            self._observer.start()
+        self._thread = threading.Thread(target=self._run, name="docs-mcp-watch", daemon=True)
+        self._thread.start()
+
+    def add(self, path: str, meta: Dict[str, str], interval: float, debounce: float) -> FolderWatch:
+        watch = FolderWatch(self.state_dir, path, meta, interval, debounce)
+        with self._lock:
+            existing = self.watches.get(watch.key)
+            if existing is not None:
+                existing.interval, existing.debounce = interval, debounce
+                watch = existing
+            else:
+                self.watches[watch.key] = watch
+            self._save_config()
+        if self._thread is None:
+            self.start()
+        else:
+            self._observe(watch)
+        self._wake.set()
+        return watch
+
+    def remove(self, key: str) -> Optional[FolderWatch]:
+        with self._lock:
+            watch = self.watches.pop(key, None)
+            if watch is None:
+                return None
+            self._save_config()
+            watch.forget()
+        handle = self._observed.pop(key, None)
+        if handle is not None and self._observer is not None:
+            self._observer.unschedule(handle)
+        return watch
+
+    def remove_matching(self, meta: Dict[str, Any]) -> List[FolderWatch]:
+        """Remove every watch whose target library matches all fields of meta."""
+        with self._lock:
+            keys = [k for k, w in self.watches.items() if all(w.meta.get(f) == v for f, v in meta.items())]
+        return [w for w in (self.remove(k) for k in keys) if w is not None]
+
+    def find(self, path: str, meta: Dict[str, str]) -> Optional[FolderWatch]:
+        return self.watches.get(watch_key(path, meta))
+
+    def _run(self) -> None:
+        while True:
+            now = time.monotonic()
+            woken = self._wake.is_set()
+            self._wake.clear()
+            with self._lock:
+                watches = list(self.watches.values())
+            for watch in watches:
+                try:
+                    self._tick(watch, now, woken)
+                except Exception as e:
+                    traceback.print_exc()
+                    watch.stats["lastError"] = str(e)
+                    # Retry the batch after the next scan rather than immediately.
+                    watch.pending = {p: (stat, now + watch.interval) for p, (stat, _) in watch.pending.items()}
+            waits = [w.next_scan - time.monotonic() for w in watches]
+            waits += [w.debounce for w in watches if w.pending]
+            self._wake.wait(max(0.2, min(waits)) if waits else None)
+
+    def _tick(self, watch: FolderWatch, now: float, woken: bool) -> None:
+        if woken or now >= watch.next_scan:
+            watch.scan(now)
+            watch.next_scan = now + watch.interval
+        settled = watch.settled(now)
+        if not settled:
+            return
+        changed = sorted(p for p, stat in settled.items() if stat is not None)
+        deleted = sorted(p for p, stat in settled.items() if stat is None)
+        summary = self.indexer(watch, changed, deleted)
+        vanished = set(summary.pop("vanished", None) or ())
+        failed = summary.get("failed") or {}
+        for fpath, stat in settled.items():
+            if fpath in failed:
+                # Left out of the snapshot and retried after the next scan.
+                watch.pending[fpath] = (stat, now + watch.interval)
+                continue
+            watch.pending.pop(fpath, None)
+            if stat is None or fpath in vanished:
+                watch.snapshot.pop(fpath, None)
+            else:
+                watch.snapshot[fpath] = stat
+        error = None
+        if failed:
+            fpath, message = next(iter(sorted(failed.items())))
+            error = f"{len(failed)} files failed, e.g. {fpath}: {message}"
+        watch.stats.update(lastIndexedAt=time.time(), lastSummary=summary, lastError=error,
+                           filesIndexed=watch.stats["filesIndexed"] + len(changed) - len(vanished) - len(failed),
+                           filesRemoved=watch.stats["filesRemoved"] + len(deleted) + len(vanished))
+        watch.save()